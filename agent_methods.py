@@ -1,9 +1,28 @@
-import os
+import asyncio
+import contextlib
+import contextvars
+import functools
 import json
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain.agents import initialize_agent, AgentType
-from tools import get_available_tools
+from langchain.agents import initialize_agent, AgentType, AgentExecutor, \
+    create_tool_calling_agent
+from langchain_core.callbacks import AsyncCallbackManager, CallbackManager
+from langchain_core.messages import SystemMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from tools import get_available_tools, get_applicant_context, current_posting
+from llm import build_llm
+from callbacks import UsageCallbackHandler, FinalAnswerStreamHandler
+from profiles import Profile, current_profile, get_profile_store, \
+    use_profile
+from prompts import layout, tool_descriptions
+from response_cache import ResponseCache, make_key
+from tracing import TracingCallbackHandler, get_trace_logger
+from preprocessing import DEFAULT_ENCODING, preprocess_posting
+from ranking import rank_drafts, word_limit
+from length_guard import AnswerLimit, answer_limit, trim_to_limit
 
 
 ERROR_MESSAGES = {
@@ -16,12 +35,91 @@ ERROR_MESSAGES = {
     "503": "Error: Service unavailable. Please wait and retry.",
 }
 
+GENERATION_MODES = ("agent", "prefetch")
 
-with open("config/system_prompt.txt", "r", encoding="utf-8") as sys_file:
-    system_prompt = sys_file.read()
+AGENT_STOPPED = "Agent stopped due to"
 
-with open("config/api_config.json", "r", encoding="utf-8") as api_file:
-    api_config = json.load(api_file)
+TOOL_CALLING = "tool-calling"
+
+TOOL_CALLING_INSTRUCTION = (
+    "Request every tool you need in a single turn; they are run in parallel."
+)
+
+DRAFT_STRATEGIES = ("n", "parallel")
+
+DEFAULT_DRAFTS = {
+    "count": 1,
+    "strategy": "n"
+}
+
+PREFETCH_INSTRUCTION = (
+    "The applicant data the tools described below return is provided after "
+    "them, so no tools are needed. Write the cover letter directly."
+)
+
+REVISION_INSTRUCTION = (
+    "Revise the cover letter below. Make only the changes the instruction "
+    "and the updated applicant data call for, keep the rest as written, "
+    "keep it under {limit} words and output only the revised letter."
+)
+
+_logger = logging.getLogger(__name__)
+
+_tool_threads = ThreadPoolExecutor(thread_name_prefix="agent-tool")
+
+
+@functools.cache
+def load_system_prompt() -> str:
+    """
+    Read the system prompt on first use.
+
+    Returns:
+        str: The contents of system_prompt.txt.
+    """
+    with open("config/system_prompt.txt", "r", encoding="utf-8") as sys_file:
+        return sys_file.read()
+
+
+@functools.cache
+def load_api_config() -> dict:
+    """
+    Read the API config on first use. Every caller shares the same dict.
+
+    Returns:
+        dict: The parsed api_config.json.
+    """
+    with open("config/api_config.json", "r", encoding="utf-8") as api_file:
+        return json.load(api_file)
+
+
+class ConcurrentToolExecutor(AgentExecutor):
+    """
+    AgentExecutor that runs the tool calls of one turn concurrently on its
+    sync path too, as AgentExecutor already does on its async path.
+    """
+    def _perform_agent_action(self, *args, **kwargs) -> Future:
+        """
+        Start a tool call on a worker thread, in a copy of the caller's
+        context so the tools see the current profile and posting.
+
+        Returns:
+            Future: The call's AgentStep.
+        """
+        return _tool_threads.submit(contextvars.copy_context().run,
+                                    super()._perform_agent_action,
+                                    *args, **kwargs)
+
+    def _iter_next_step(self, *args, **kwargs):
+        """
+        Run the next step, starting all of its tool calls before waiting
+        for the first.
+
+        Yields:
+            AgentAction | AgentStep | AgentFinish: The step's actions, then
+            their results in order, or the final answer.
+        """
+        for output in list(super()._iter_next_step(*args, **kwargs)):
+            yield output.result() if isinstance(output, Future) else output
 
 
 class CoverLetterAgent:
@@ -29,53 +127,836 @@ class CoverLetterAgent:
     Agent to generate cover letters using a language model with available
     tools.
     """
-    def __init__(self):
+    def __init__(self, mode=None):
         """
         Initialize the agent, load environment variables, and set up LLM and
         tools.
 
         Loads the API key from environment variables and initializes the LLM
-        with the specified model and parameters. Sets up available tools and
-        configures the agent.
+        with the specified model and parameters. Every LLM call goes through
+        the model's shared rate limit scheduler. Sets up available tools and
+        configures the agent: a LangChain AgentType named by "agent_type" in
+        api_config.json (ReAct by default), or "tool-calling" for an agent
+        built on native tool calling, which can request several tools in one
+        turn.
+
+        Args:
+            mode (str, optional): "agent" to let the ReAct agent gather the
+                                  applicant data through tools, or "prefetch"
+                                  to inline the data and make a single LLM
+                                  call. Defaults to "generation_mode" in
+                                  api_config.json.
         """
+        self.api_config = load_api_config()
+        self.system_prompt = load_system_prompt()
+        self.mode = mode or self.api_config.get("generation_mode", "agent")
+        if self.mode not in GENERATION_MODES:
+            raise ValueError(f"Unknown generation mode: {self.mode}")
+
         load_dotenv(dotenv_path="config/.env")
 
-        self.llm = ChatOpenAI(
-            model_name=api_config["model"],
-            temperature=0.7,
-            max_tokens=500,
-            openai_api_base=api_config["api_base"],
-            openai_api_key=os.getenv("TOGETHER_API_KEY")
-        )
+        self.llm = build_llm(self.api_config)
+
+        self.agent_type = self.api_config.get(
+            "agent_type", AgentType.ZERO_SHOT_REACT_DESCRIPTION.value)
+        if self.agent_type == TOOL_CALLING:
+            self.tools = get_available_tools(
+                self.api_config.get("retrieval"), structured=True,
+                observations=self.api_config.get("observations"))
+            self.agent = self._tool_calling_agent()
+        else:
+            self.tools = get_available_tools(
+                self.api_config.get("retrieval"),
+                observations=self.api_config.get("observations"))
+            self.agent = initialize_agent(
+                tools=self.tools,
+                llm=self.llm,
+                agent=AgentType(self.agent_type),
+                verbose=True,
+            )
 
-        self.tools = get_available_tools()
+        drafts = {**DEFAULT_DRAFTS, **self.api_config.get("drafts", {})}
+        self.draft_count = max(int(drafts["count"]), 1)
+        self.draft_strategy = drafts["strategy"]
+        if self.draft_strategy not in DRAFT_STRATEGIES:
+            raise ValueError(f"Unknown draft strategy: {self.draft_strategy}")
 
-        self.agent = initialize_agent(
-            tools=self.tools,
-            llm=self.llm,
-            agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-            verbose=True,
-        )
+        self.response_cache = ResponseCache.from_config(self.api_config)
+        self.profiles = get_profile_store(self.api_config.get("profiles"))
+        self.trace_logger = get_trace_logger(self.api_config.get("tracing"))
 
-    def generate_cover_letter(self, job_posting):
+    def generate_cover_letter(self, job_posting, raise_errors=False,
+                              callbacks=None, use_cache=True, profile=None):
         """
         Generate a cover letter based on the provided job posting.
 
+        The posting is first cleaned of boilerplate and fitted to the token
+        budget. A previously generated letter is returned from the response
+        cache if the posting, applicant data, system prompt and model
+        settings are all unchanged. With several drafts configured, the best
+        ranked draft is returned.
+
         Args:
             job_posting (str): The job posting description used to generate
                                the cover letter.
+            raise_errors (bool): Raise exceptions instead of returning an
+                                 error message.
+            callbacks (list, optional): LangChain callback handlers for the
+                                        run.
+            use_cache (bool): Set to False to always generate a fresh draft.
+                              The new draft still replaces the cached one.
+            profile (str, optional): ID of the applicant profile to use
+                                     instead of the default applicant data.
 
         Returns:
             str: The generated cover letter, or an error message if an
                  exception occurs.
         """
-        prompt = f"{system_prompt}\nJob Posting: {job_posting}"
+        return self.generate_drafts(job_posting, raise_errors, callbacks,
+                                    use_cache, profile)[0]["text"]
+
+    async def agenerate_cover_letter(self, job_posting, raise_errors=False,
+                                     callbacks=None, use_cache=True,
+                                     profile=None):
+        """
+        Async counterpart of generate_cover_letter, built on the async
+        LangChain and OpenAI clients.
 
+        Many generations can run concurrently on one event loop. Cancelling
+        the task aborts the HTTP request in flight.
+
+        Args:
+            job_posting (str): The job posting description used to generate
+                               the cover letter.
+            raise_errors (bool): Raise exceptions instead of returning an
+                                 error message.
+            callbacks (list, optional): LangChain callback handlers for the
+                                        run.
+            use_cache (bool): Set to False to always generate a fresh draft.
+            profile (str, optional): ID of the applicant profile to use.
+
+        Returns:
+            str: The generated cover letter, or an error message if an
+                 exception occurs.
+        """
+        drafts = await self.agenerate_drafts(job_posting, raise_errors,
+                                             callbacks, use_cache, profile)
+        return drafts[0]["text"]
+
+    def generate_drafts(self, job_posting, raise_errors=False,
+                        callbacks=None, use_cache=True, profile=None
+                        ) -> list[dict]:
+        """
+        Generate the configured number of candidate letters and rank them.
+
+        Only the best draft is stored in the response cache, so a cache hit
+        returns a single draft.
+
+        Args:
+            job_posting (str): The job posting description used to generate
+                               the cover letters.
+            raise_errors (bool): Raise exceptions instead of returning an
+                                 error message.
+            callbacks (list, optional): LangChain callback handlers for the
+                                        run.
+            use_cache (bool): Set to False to always generate fresh drafts.
+            profile (str, optional): ID of the applicant profile to use
+                                     instead of the default applicant data.
+
+        Returns:
+            list[dict]: The ranked drafts, best first, as returned by
+            rank_drafts, or a single {"text": error message} entry if an
+            exception occurs.
+        """
+        try:
+            applicant = self.profile(profile)
+        except ValueError as e:
+            if raise_errors:
+                raise
+            return [{"text": self.parse_error(error_message=str(e))}]
+        with use_profile(applicant):
+            return self._ranked_drafts(job_posting, raise_errors, callbacks,
+                                       use_cache)
+
+    async def agenerate_drafts(self, job_posting, raise_errors=False,
+                               callbacks=None, use_cache=True, profile=None
+                               ) -> list[dict]:
+        """
+        Async counterpart of generate_drafts.
+
+        Args:
+            job_posting (str): The job posting description used to generate
+                               the cover letters.
+            raise_errors (bool): Raise exceptions instead of returning an
+                                 error message.
+            callbacks (list, optional): LangChain callback handlers for the
+                                        run.
+            use_cache (bool): Set to False to always generate fresh drafts.
+            profile (str, optional): ID of the applicant profile to use.
+
+        Returns:
+            list[dict]: The ranked drafts, best first, or a single
+            {"text": error message} entry if an exception occurs.
+        """
         try:
-            response = self.agent.run(prompt)
-            return response.strip()
+            applicant = self.profile(profile)
+        except ValueError as e:
+            if raise_errors:
+                raise
+            return [{"text": self.parse_error(error_message=str(e))}]
+        with use_profile(applicant):
+            return await self._aranked_drafts(job_posting, raise_errors,
+                                              callbacks, use_cache)
+
+    def profile(self, profile_id) -> Profile | None:
+        """
+        Look up an applicant profile in the shared profile store.
+
+        Args:
+            profile_id (str | None): The profile ID.
+
+        Returns:
+            Profile | None: The profile, or None for the current one.
+
+        Raises:
+            ValueError: If the profile does not exist.
+        """
+        return None if profile_id is None else self.profiles.get(profile_id)
+
+    def _ranked_drafts(self, job_posting, raise_errors, callbacks,
+                       use_cache) -> list[dict]:
+        """
+        Generate and rank drafts for the current profile, see
+        generate_drafts.
+
+        Args:
+            job_posting (str): The job posting description.
+            raise_errors (bool): Raise exceptions instead of returning an
+                                 error message.
+            callbacks (list | None): LangChain callback handlers.
+            use_cache (bool): Whether a cached letter may be returned.
+
+        Returns:
+            list[dict]: The ranked drafts, best first.
+        """
+        callbacks = self._traced(callbacks)
+        job_posting = self.preprocess(job_posting, callbacks)
+        posting_token = current_posting.set(job_posting)
+        limit_token = answer_limit.set(self.letter_limit())
+        try:
+            cache_key = None
+            if self.response_cache is not None:
+                cache_key = self.cache_key(job_posting)
+                if use_cache and \
+                        (cached := self.response_cache.get(cache_key)):
+                    return self.rank(job_posting, [cached])
+
+            with self._generation_run(callbacks) as run_callbacks:
+                if self.draft_count > 1:
+                    drafts = self._generate_drafts(job_posting, run_callbacks)
+                elif self.mode == "prefetch":
+                    drafts = [self._generate_prefetched(job_posting,
+                                                        run_callbacks)]
+                else:
+                    drafts = [self._generate_with_agent(job_posting,
+                                                        run_callbacks)]
+            ranked = self.rank(job_posting, drafts)
+            if cache_key is not None and ranked[0]["text"]:
+                self.response_cache.put(cache_key, ranked[0]["text"])
+            return ranked
+        except Exception as e:
+            if raise_errors:
+                raise
+            return [{"text": self.parse_error(error_message=str(e))}]
+        finally:
+            answer_limit.reset(limit_token)
+            current_posting.reset(posting_token)
+
+    async def _aranked_drafts(self, job_posting, raise_errors, callbacks,
+                              use_cache) -> list[dict]:
+        """
+        Async counterpart of _ranked_drafts.
+
+        Args:
+            job_posting (str): The job posting description.
+            raise_errors (bool): Raise exceptions instead of returning an
+                                 error message.
+            callbacks (list | None): LangChain callback handlers.
+            use_cache (bool): Whether a cached letter may be returned.
+
+        Returns:
+            list[dict]: The ranked drafts, best first.
+        """
+        callbacks = self._traced(callbacks)
+        job_posting = await asyncio.to_thread(self.preprocess, job_posting,
+                                              callbacks)
+        posting_token = current_posting.set(job_posting)
+        limit_token = answer_limit.set(self.letter_limit())
+        try:
+            cache_key = None
+            if self.response_cache is not None:
+                cache_key = await asyncio.to_thread(self.cache_key,
+                                                    job_posting)
+                cached = await asyncio.to_thread(
+                    self.response_cache.get, cache_key) if use_cache else None
+                if cached:
+                    return self.rank(job_posting, [cached])
+
+            async with self._ageneration_run(callbacks) as run_callbacks:
+                if self.draft_count > 1:
+                    drafts = await self._agenerate_drafts(job_posting,
+                                                          run_callbacks)
+                elif self.mode == "prefetch":
+                    drafts = [await self._agenerate_prefetched(
+                        job_posting, run_callbacks)]
+                else:
+                    drafts = [await self._agenerate_with_agent(
+                        job_posting, run_callbacks)]
+            ranked = self.rank(job_posting, drafts)
+            if cache_key is not None and ranked[0]["text"]:
+                await asyncio.to_thread(self.response_cache.put, cache_key,
+                                        ranked[0]["text"])
+            return ranked
+        except Exception as e:
+            if raise_errors:
+                raise
+            return [{"text": self.parse_error(error_message=str(e))}]
+        finally:
+            answer_limit.reset(limit_token)
+            current_posting.reset(posting_token)
+
+    def revise_cover_letter(self, draft, instruction="", entries=None,
+                            raise_errors=False, callbacks=None) -> str:
+        """
+        Edit an existing letter in one completion call instead of generating
+        a new one.
+
+        Only the draft, the instruction and the changed applicant entries are
+        sent; the job posting and the rest of the applicant data are not. A
+        revision over the word limit is trimmed locally, not sent back.
+
+        Args:
+            draft (str): The current cover letter.
+            instruction (str): What to change, e.g. "emphasise the Python
+                               project".
+            entries (dict[str, dict], optional): Changed applicant entries
+                                                 keyed by data file name.
+            raise_errors (bool): Raise exceptions instead of returning an
+                                 error message.
+            callbacks (list, optional): LangChain callback handlers for the
+                                        run.
+
+        Returns:
+            str: The revised cover letter, the draft unchanged if there is
+                 nothing to revise, or an error message if an exception
+                 occurs.
+        """
+        if not instruction.strip() and not entries:
+            return draft
+        limit = self.letter_limit(revision=True)
+        limit_token = answer_limit.set(limit)
+        try:
+            response = self.llm.invoke(
+                self._revision_prompt(draft, instruction, entries),
+                config={"callbacks": self._traced(callbacks)})
+            return trim_to_limit(response.content, limit.limit,
+                                 limit.stopped)
         except Exception as e:
-            self.parse_error(error_message=str(e))
+            if raise_errors:
+                raise
+            return self.parse_error(error_message=str(e))
+        finally:
+            answer_limit.reset(limit_token)
+
+    async def arevise_cover_letter(self, draft, instruction="", entries=None,
+                                   raise_errors=False, callbacks=None) -> str:
+        """
+        Async counterpart of revise_cover_letter.
+
+        Args:
+            draft (str): The current cover letter.
+            instruction (str): What to change.
+            entries (dict[str, dict], optional): Changed applicant entries
+                                                 keyed by data file name.
+            raise_errors (bool): Raise exceptions instead of returning an
+                                 error message.
+            callbacks (list, optional): LangChain callback handlers for the
+                                        run.
+
+        Returns:
+            str: The revised cover letter, the draft unchanged if there is
+                 nothing to revise, or an error message if an exception
+                 occurs.
+        """
+        if not instruction.strip() and not entries:
+            return draft
+        limit = self.letter_limit(revision=True)
+        limit_token = answer_limit.set(limit)
+        try:
+            response = await self.llm.ainvoke(
+                self._revision_prompt(draft, instruction, entries),
+                config={"callbacks": self._traced(callbacks)})
+            return trim_to_limit(response.content, limit.limit,
+                                 limit.stopped)
+        except Exception as e:
+            if raise_errors:
+                raise
+            return self.parse_error(error_message=str(e))
+        finally:
+            answer_limit.reset(limit_token)
+
+    def rank(self, job_posting, drafts) -> list[dict]:
+        """
+        Rank candidate letters against a posting and the system prompt's
+        word limit. Letters over the limit, or stopped by the stream guard,
+        are first trimmed to their last full paragraph or sentence within
+        it.
+
+        Args:
+            job_posting (str): The job posting description.
+            drafts (list[str]): The candidate letters.
+
+        Returns:
+            list[dict]: The drafts best first, see rank_drafts.
+        """
+        limit = word_limit(self.system_prompt)
+        stopped = (current := answer_limit.get()) is not None and \
+            current.stopped
+        return rank_drafts([trim_to_limit(d, limit, stopped) for d in drafts],
+                           job_posting, limit)
+
+    def letter_limit(self, revision=False) -> AnswerLimit:
+        """
+        Describe the word limit of the letters written in this agent's mode,
+        for the stream guard of the chat model.
+
+        Args:
+            revision (bool): Describe a revision, which is a plain completion
+                             in every mode.
+
+        Returns:
+            AnswerLimit: The system prompt's word limit and the text that
+            starts the letter in the model's output.
+        """
+        return AnswerLimit(word_limit(self.system_prompt),
+                           self._answer_prefix(revision))
+
+    def _answer_prefix(self, revision=False) -> str | None:
+        """
+        Return the text that starts the letter in the model's output.
+
+        Args:
+            revision (bool): Whether the output is a revision.
+
+        Returns:
+            str | None: "Final Answer:" for the ReAct agent, None if the
+            whole output is the letter.
+        """
+        react = self.mode == "agent" and self.agent_type != TOOL_CALLING \
+            and not revision
+        return "Final Answer:" if react else None
+
+    def stream_handler(self, on_token, revision=False
+                       ) -> FinalAnswerStreamHandler:
+        """
+        Create a callback handler that streams the final cover letter of a
+        generation in this agent's mode.
+
+        Tokens only arrive if "streaming" is enabled in api_config.json.
+
+        Args:
+            on_token (Callable[[str], None]): Called with each token of the
+                                              letter as it is generated.
+            revision (bool): Stream a revision, which is a plain completion
+                             in every mode.
+
+        Returns:
+            FinalAnswerStreamHandler: Handler to pass in callbacks.
+        """
+        return FinalAnswerStreamHandler(
+            on_token, answer_prefix=self._answer_prefix(revision))
+
+    def preprocess(self, job_posting, callbacks=None) -> str:
+        """
+        Strip boilerplate from a posting and fit it to the token budget, as
+        set under "preprocessing" in api_config.json. The tokens saved are
+        logged and recorded in the generation's trace.
+
+        Args:
+            job_posting (str): The job posting as pasted by the user.
+            callbacks (list, optional): The generation's callback handlers.
+
+        Returns:
+            str: The posting to build the prompt from.
+        """
+        settings = self.api_config.get("preprocessing")
+        if not settings or not settings.get("enabled"):
+            return job_posting
+
+        cleaned, report = preprocess_posting(
+            job_posting, settings.get("max_tokens"),
+            settings.get("encoding", DEFAULT_ENCODING))
+        _logger.info("Posting preprocessed: %d -> %d tokens (%d saved)",
+                     report["original_tokens"], report["tokens"],
+                     report["tokens_saved"])
+        for handler in callbacks or []:
+            if isinstance(handler, TracingCallbackHandler):
+                handler.record("preprocess", **report)
+        return cleaned
+
+    def _traced(self, callbacks) -> list | None:
+        """
+        Add a tracing handler for one generation to its callbacks if tracing
+        is enabled in api_config.json.
+
+        Args:
+            callbacks (list | None): The caller's callback handlers.
+
+        Returns:
+            list | None: The callback handlers to run the generation with.
+        """
+        if self.trace_logger is None:
+            return callbacks
+        return [*(callbacks or []), TracingCallbackHandler(self.trace_logger)]
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _generation_run(callbacks):
+        """
+        Group the model and tool runs of a traced generation under one root
+        run, so it gets a single generation span even when its drafts come
+        from parallel requests.
+
+        Args:
+            callbacks (list | None): The generation's callback handlers.
+
+        Yields:
+            list | CallbackManager | None: The callbacks to run the
+            generation with, unchanged if it is not traced.
+        """
+        if not any(isinstance(handler, TracingCallbackHandler)
+                   for handler in callbacks or []):
+            yield callbacks
+            return
+        run = CallbackManager.configure(callbacks).on_chain_start(
+            {"name": "generation"}, {})
+        try:
+            yield run.get_child()
+        except Exception as e:
+            run.on_chain_error(e)
+            raise
+        run.on_chain_end({})
+
+    @staticmethod
+    @contextlib.asynccontextmanager
+    async def _ageneration_run(callbacks):
+        """
+        Async counterpart of _generation_run.
+
+        Args:
+            callbacks (list | None): The generation's callback handlers.
+
+        Yields:
+            list | AsyncCallbackManager | None: The callbacks to run the
+            generation with, unchanged if it is not traced.
+        """
+        if not any(isinstance(handler, TracingCallbackHandler)
+                   for handler in callbacks or []):
+            yield callbacks
+            return
+        run = await AsyncCallbackManager.configure(callbacks).on_chain_start(
+            {"name": "generation"}, {})
+        try:
+            yield run.get_child()
+        except Exception as e:
+            await run.on_chain_error(e)
+            raise
+        await run.on_chain_end({})
+
+    def cache_key(self, job_posting) -> str:
+        """
+        Build the response cache key of a posting under the current
+        profile's applicant data, system prompt and model settings.
+
+        Args:
+            job_posting (str): The job posting description.
+
+        Returns:
+            str: The cache key.
+        """
+        settings = {
+            "model": self.api_config["model"],
+            "temperature": self.api_config.get("temperature", 0.7),
+            "max_tokens": self.api_config.get("max_tokens", 500),
+            "mode": self.mode,
+            "agent_type": self.agent_type,
+            "drafts": self.draft_count,
+            "retrieval": self.api_config.get("retrieval"),
+            "observations": self.api_config.get("observations"),
+            "preprocessing": self.api_config.get("preprocessing")
+        }
+        data_hash = current_profile.get().cache.content_hash()
+        return make_key(job_posting, data_hash, self.system_prompt, settings)
+
+    def _generate_with_agent(self, job_posting, callbacks=None) -> str:
+        """
+        Run the ReAct agent, which fetches applicant data through the tools.
+
+        Args:
+            job_posting (str): The job posting description.
+            callbacks (list, optional): LangChain callback handlers.
+
+        Returns:
+            str: The agent's final answer.
+
+        Raises:
+            RuntimeError: If the agent stopped before giving a final answer.
+        """
+        result = self.agent.invoke({"input": self._agent_prompt(job_posting)},
+                                   config={"callbacks": callbacks})
+        return self._final_answer(result)
+
+    async def _agenerate_with_agent(self, job_posting, callbacks=None) -> str:
+        """
+        Async counterpart of _generate_with_agent.
+
+        Args:
+            job_posting (str): The job posting description.
+            callbacks (list, optional): LangChain callback handlers.
+
+        Returns:
+            str: The agent's final answer.
+
+        Raises:
+            RuntimeError: If the agent stopped before giving a final answer.
+        """
+        result = await self.agent.ainvoke(
+            {"input": self._agent_prompt(job_posting)},
+            config={"callbacks": callbacks})
+        return self._final_answer(result)
+
+    @staticmethod
+    def _final_answer(result) -> str:
+        """
+        Take the letter from the agent's result, treating the message the
+        agent executor returns when it hits its iteration or time limit as
+        an error, so it is never shown, ranked or cached as a letter.
+
+        Args:
+            result (dict): The agent executor's output.
+
+        Returns:
+            str: The agent's final answer.
+
+        Raises:
+            RuntimeError: If the agent stopped before giving a final answer.
+        """
+        output = result["output"]
+        if output.startswith(AGENT_STOPPED):
+            raise RuntimeError(output)
+        return output
+
+    def _tool_calling_agent(self) -> AgentExecutor:
+        """
+        Build an agent on the model's native tool calling. The model may
+        request several tools in one turn, which are run concurrently and
+        their results returned in the next request.
+
+        Returns:
+            AgentExecutor: The tool calling agent.
+        """
+        prompt = ChatPromptTemplate.from_messages([
+            SystemMessage(
+                content=f"{self.system_prompt}\n{TOOL_CALLING_INSTRUCTION}"),
+            ("human", "Job Posting: {input}"),
+            MessagesPlaceholder("agent_scratchpad")
+        ])
+        agent = create_tool_calling_agent(self.llm, self.tools, prompt)
+        return ConcurrentToolExecutor(agent=agent, tools=self.tools,
+                                      verbose=True)
+
+    def _agent_prompt(self, job_posting) -> str:
+        """
+        Build the agent's input for a posting.
+
+        Args:
+            job_posting (str): The job posting description.
+
+        Returns:
+            str: The system prompt followed by the posting, or only the
+            posting for the tool calling agent, whose prompt holds the
+            system prompt.
+        """
+        if self.agent_type == TOOL_CALLING:
+            return job_posting
+        return f"{self.system_prompt}\nJob Posting: {job_posting}"
+
+    def _generate_prefetched(self, job_posting, callbacks=None) -> str:
+        """
+        Inline all applicant data into the prompt and make exactly one
+        completion call.
+
+        Args:
+            job_posting (str): The job posting description.
+            callbacks (list, optional): LangChain callback handlers.
+
+        Returns:
+            str: The model's completion.
+        """
+        response = self.llm.invoke(self._prefetch_messages(job_posting),
+                                   config={"callbacks": callbacks})
+        return response.content
+
+    async def _agenerate_prefetched(self, job_posting, callbacks=None) -> str:
+        """
+        Async counterpart of _generate_prefetched.
+
+        Args:
+            job_posting (str): The job posting description.
+            callbacks (list, optional): LangChain callback handlers.
+
+        Returns:
+            str: The model's completion.
+        """
+        response = await self.llm.ainvoke(
+            self._prefetch_messages(job_posting),
+            config={"callbacks": callbacks})
+        return response.content
+
+    def _generate_drafts(self, job_posting, callbacks=None) -> list[str]:
+        """
+        Write several candidate letters from one gathering of the applicant
+        data.
+
+        The data is read once, as in the prefetch mode, and shared by every
+        draft. The drafts come from a single request with the API's n
+        parameter, or from parallel requests if the "drafts" strategy is
+        "parallel". Drafts are not streamed.
+
+        Args:
+            job_posting (str): The job posting description.
+            callbacks (list, optional): LangChain callback handlers.
+
+        Returns:
+            list[str]: The candidate letters.
+        """
+        messages = self._prefetch_messages(job_posting)
+        if self.draft_strategy == "parallel":
+            responses = self.llm.batch(
+                [messages] * self.draft_count,
+                config={"callbacks": callbacks,
+                        "max_concurrency": self.draft_count},
+                stream=False)
+            return [response.content for response in responses]
+        result = self.llm.generate([messages], callbacks=callbacks,
+                                   n=self.draft_count, stream=False)
+        return [generation.text for generation in result.generations[0]]
+
+    async def _agenerate_drafts(self, job_posting, callbacks=None
+                                ) -> list[str]:
+        """
+        Async counterpart of _generate_drafts.
+
+        Args:
+            job_posting (str): The job posting description.
+            callbacks (list, optional): LangChain callback handlers.
+
+        Returns:
+            list[str]: The candidate letters.
+        """
+        messages = self._prefetch_messages(job_posting)
+        if self.draft_strategy == "parallel":
+            responses = await self.llm.abatch(
+                [messages] * self.draft_count,
+                config={"callbacks": callbacks}, stream=False)
+            return [response.content for response in responses]
+        result = await self.llm.agenerate([messages], callbacks=callbacks,
+                                          n=self.draft_count, stream=False)
+        return [generation.text for generation in result.generations[0]]
+
+    def _prefetch_messages(self, job_posting) -> list:
+        """
+        Build the single request of the prefetch mode, with the applicant
+        data inlined.
+
+        Everything that is the same for every posting comes first, so
+        providers with prompt caching can reuse it: the system prompt, the
+        instruction, the tool descriptions and the applicant data returned
+        whole. The entries of ranked data files, selected for the posting,
+        and the posting itself come last.
+
+        Args:
+            job_posting (str): The job posting description.
+
+        Returns:
+            list[BaseMessage]: The system and human messages.
+        """
+        retrieval = self.api_config.get("retrieval")
+        observations = self.api_config.get("observations")
+        whole = get_applicant_context(retrieval, False, observations)
+        relevant = get_applicant_context(retrieval, True, observations)
+        return layout(
+            [self.system_prompt, PREFETCH_INSTRUCTION,
+             f"Tool Descriptions:\n{tool_descriptions()}",
+             whole and f"Applicant Data:\n{whole}"],
+            [relevant and f"Applicant Data Relevant to the Posting:\n"
+                          f"{relevant}",
+             f"Job Posting: {job_posting}"])
+
+    def _revision_prompt(self, draft, instruction, entries) -> str:
+        """
+        Build the prompt of a revision.
+
+        Args:
+            draft (str): The current cover letter.
+            instruction (str): What to change.
+            entries (dict[str, dict] | None): Changed applicant entries keyed
+                                              by data file name.
+
+        Returns:
+            str: The complete prompt.
+        """
+        limit = word_limit(self.system_prompt)
+        sections = [REVISION_INSTRUCTION.format(limit=limit)]
+        if instruction.strip():
+            sections.append(f"Instruction: {instruction.strip()}")
+        if entries:
+            sections.append("Updated Applicant Data:\n" + json.dumps(
+                entries, ensure_ascii=False))
+        sections.append(f"Cover Letter:\n{draft.strip()}")
+        return "\n\n".join(sections)
+
+    def compare_modes(self, job_posting) -> dict[str, dict]:
+        """
+        Generate a cover letter for the same posting in every generation mode
+        and measure the cost of each.
+
+        Args:
+            job_posting (str): The job posting description.
+
+        Returns:
+            dict[str, dict]: For each mode, the number of LLM round trips,
+            prompt, completion and total tokens, wall time in seconds and the
+            generated cover letter.
+        """
+        results = {}
+        for mode in GENERATION_MODES:
+            usage = UsageCallbackHandler()
+            generate = self._generate_prefetched if mode == "prefetch" \
+                else self._generate_with_agent
+
+            posting_token = current_posting.set(job_posting)
+            start = time.perf_counter()
+            try:
+                letter = generate(job_posting, callbacks=[usage])
+            finally:
+                current_posting.reset(posting_token)
+            results[mode] = {
+                **usage.summary(),
+                "seconds": round(time.perf_counter() - start, 3),
+                "cover_letter": letter.strip()
+            }
+        return results
 
     def parse_error(self, error_message) -> str:
         """
@@ -1,8 +1,12 @@
+import asyncio
 import json
+import queue
 import threading
 from tkinter import filedialog
 import customtkinter as ctk
-from agent_methods import CoverLetterAgent
+from runner import BackgroundLoop, GenerationQueue
+from applicant_data import data_cache
+from persistence import data_writer
 
 
 with open("config/config.json", "r", encoding="utf-8") as config_file:
@@ -15,23 +19,31 @@ cfg_entry = config["EntryList"]
 cfg_box = config["ToggleBox"]
 cfg_edit = config["ToggleBoxButton"]
 cfg_clr = config["Colours"]
+cfg_queue = config["Queue"]
 
-data_files = [
-    "Education & Awards",
-    "Hobbies",
-    "Projects",
-    "Skills",
-    "Work History"
-]
-packed_data = []
-for f in data_files:
-    with open(f"applicant data/{f}.json", "r", encoding="utf-8") as file:
-        packed_data.append(json.load(file))
+generation_loop = BackgroundLoop()
 
-education_data, hobby_data, \
-    project_data, skill_data, work_data = packed_data  # pylint: disable=W0632
+_agent = None
+_agent_lock = threading.Lock()
 
-agent = CoverLetterAgent()
+
+def get_agent():
+    """
+    Return the shared CoverLetterAgent, building it on first use.
+
+    The agent and its LangChain and OpenAI dependencies are imported here
+    rather than at module level so the window appears without waiting for
+    them; the window warms the agent in the background once it is shown.
+
+    Returns:
+        CoverLetterAgent: The shared agent.
+    """
+    global _agent  # pylint: disable=W0603
+    with _agent_lock:
+        if _agent is None:
+            from agent_methods import CoverLetterAgent  # pylint: disable=C0415
+            _agent = CoverLetterAgent()
+    return _agent
 
 
 class CoverGenWindow(ctk.CTk):
@@ -49,9 +61,15 @@ class CoverGenWindow(ctk.CTk):
         super().__init__()
 
         (
-            self.win_result, self.window_text, self.save_button,
-            self.copy_button, self.dot_animation
-        ) = (None,) * 5
+            self.win_result, self.result_view, self.save_button,
+            self.copy_button, self.draft_button, self.close_button,
+            self.revise_entry, self.revise_button, self.win_queue,
+            self.queue_frame, self.last_posting, self.stream_poll,
+            self.queue_poll
+        ) = (None,) * 13
+        self.results, self.queue_rows = {}, {}
+        self.generations = GenerationQueue(generation_loop,
+                                           cfg_queue["max_concurrent"])
 
         self.title(cfg_main["title"])
         self.geometry(f"{cfg_main["size_x"]}x{cfg_main["size_y"]}")
@@ -89,115 +107,536 @@ class CoverGenWindow(ctk.CTk):
         self.tab_view.place(x=cfg_tab["pos_x"], y=cfg_tab["pos_y"])
         self.input_box.place(x=cfg_tab["pos_x"], y=cfg_tab["pos_x"])
 
+        self.after(100, threading.Thread(target=get_agent, daemon=True).start)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_close(self):
+        """
+        Write any applicant data edits still waiting to be saved, then close
+        the application.
+        """
+        data_writer.flush()
+        self.destroy()
+
     def generate_response(self):
         """
-        Generate a cover letter response based on user input.
+        Queue a cover letter for the job posting in the input box.
 
-        Retrieves the job posting from the input box, initiates a loading
-        animation, disables the button, and starts a thread to generate a
-        response.
+        Several postings can be queued one after another; they are generated
+        on the background loop, a few at a time, and tracked in the queue
+        window. Each letter opens in its own tab of the result window,
+        streaming in as it is written. Queueing the same posting twice in a
+        row skips the response cache so a fresh draft is written.
         """
         job_posting = self.input_box.get("1.0", "end").strip()
+        if not job_posting:
+            return
+        use_cache = job_posting != self.last_posting
+        self.last_posting = job_posting
+
+        token_queue = queue.Queue()
+        title = next(iter(job_posting.splitlines()), "")[:40]
+        job = self.generations.submit(
+            lambda: self._generate(job_posting, use_cache, token_queue),
+            title, tokens=token_queue, tab=None, changed={})
+        job["future"].add_done_callback(
+            lambda future: self.after(0, self.display_response, job))
+        self.open_queue_window()
+        self.flush_tokens()
+
+    async def _generate(self, job_posting, use_cache, token_queue):
+        """
+        Generate the configured number of drafts on the background loop,
+        streaming the tokens of a single draft onto a queue.
 
-        self.animate_dots(0)
-        self.gen_button.configure(state="disabled")
+        Waits for the agent in a worker thread if it is still being built.
 
-        threading.Thread(target=self._generate_response_thread,
-                         args=(job_posting,)).start()
+        Args:
+            job_posting (str): The job posting description.
+            use_cache (bool): Whether a cached letter may be returned.
+            token_queue (queue.Queue): Queue the letter's tokens are put on.
 
-    def _generate_response_thread(self, job_posting):
+        Returns:
+            list[dict]: The ranked drafts, best first, or an error message
+            as the only draft.
         """
-        Run the cover letter generation in a separate thread.
+        agent = await asyncio.to_thread(get_agent)
+        handler = agent.stream_handler(token_queue.put)
+        return await agent.agenerate_drafts(
+            job_posting, callbacks=[handler], use_cache=use_cache)
 
-        Args:
-            job_posting (str): The job posting description to use for
-                               generating the cover letter.
+    def revise_response(self):
         """
-        response = agent.generate_cover_letter(job_posting)
-        self.after(0, self.display_response, response)
+        Queue a revision of the letter in the selected result tab, with the
+        instruction typed below it and the applicant entries edited since
+        the tab's letter was written or last revised, in one model call.
 
-    def animate_dots(self, step):
+        Does nothing while the tab's letter is still being written or
+        revised, or if there is nothing to revise.
         """
-        Animate a rotating line on the generate button while waiting for a
-        response.
+        tab = self.current_result()
+        if tab is None or tab.busy:
+            return
+        instruction = self.revise_entry.get().strip()
+        changed = {k: set(v) for k, v in tab.changed.items()}
+        entries = {}
+        for file_name, names in changed.items():
+            data = data_cache.get(file_name)
+            entries[file_name] = {n: data[n] for n in names if n in data}
+        entries = {k: v for k, v in entries.items() if v}
+        if not instruction and not entries:
+            return
+
+        draft = tab.text.get("1.0", "end").strip()
+        token_queue = queue.Queue()
+        tab.busy = True
+        job = self.generations.submit(
+            lambda: self._revise(draft, instruction, entries, token_queue),
+            f"Revise {tab.name}", tokens=token_queue, tab=tab)
+        job["future"].add_done_callback(
+            lambda future: self.after(
+                0, self.display_revision, job, draft, changed))
+        self.revise_entry.delete(0, "end")
+        self.open_queue_window()
+        self.flush_tokens()
+
+    async def _revise(self, draft, instruction, entries, token_queue):
+        """
+        Revise a letter on the background loop, streaming its tokens onto a
+        queue.
 
         Args:
-            step (int): The current frame of the animation (0-3).
+            draft (str): The current cover letter.
+            instruction (str): What to change.
+            entries (dict[str, dict]): Changed applicant entries keyed by
+                                       data file name.
+            token_queue (queue.Queue): Queue the letter's tokens are put on.
+
+        Returns:
+            str: The revised cover letter or an error message.
         """
-        line_frames = ["|", "/", "—", "\\"]
-        self.gen_button.configure(
-            text=f" {line_frames[step]} Generating {line_frames[step]}")
+        agent = await asyncio.to_thread(get_agent)
+        handler = agent.stream_handler(token_queue.put, revision=True)
+        return await agent.arevise_cover_letter(
+            draft, instruction, entries, callbacks=[handler])
+
+    def entry_changed(self, file_name, entry_name):
+        """
+        Remember an applicant entry edited in the tabs for every open letter
+        and every letter still being generated, so the next revision of each
+        takes it into account.
 
-        next_step = (step + 1) % 4
-        self.dot_animation = self.after(100, self.animate_dots, next_step)
+        Args:
+            file_name (str): Name of the data file without extension.
+            entry_name (str): Name of the edited entry.
+        """
+        if not entry_name:
+            return
+        changed = [tab.changed for tab in self.results.values()]
+        changed += [job["changed"] for job in self.generations.jobs
+                    if "changed" in job and not job["future"].done()]
+        for entries in changed:
+            entries.setdefault(file_name, set()).add(entry_name)
+
+    def flush_tokens(self):
+        """
+        Insert all tokens streamed since the last call into the result tabs
+        of their jobs in one batch per tab, opening a job's tab on its first
+        token. If the tab was closed while its letter streams in, a new one
+        is opened with the text streamed so far.
 
-    def display_response(self, response):
+        Reschedules itself while any job is queued or running.
         """
-        Display the generated cover letter in a new window.
+        if self.stream_poll is not None:
+            self.after_cancel(self.stream_poll)
+            self.stream_poll = None
+
+        for job in self.generations.jobs:
+            tokens = []
+            while not job["tokens"].empty():
+                tokens.append(job["tokens"].get_nowait())
+            if not tokens:
+                continue
+            self.open_result_window()
+            tab = job["tab"] if self.result_open(job["tab"]) else None
+            if tab is None or not job.get("streaming"):
+                job["streaming"] = True
+                job["tab"] = tab = tab or self.add_result(job)
+                tab.text.delete("1.0", "end")
+                tab.text.insert("end", job.get("streamed", ""))
+            text = "".join(tokens)
+            job["streamed"] = job.get("streamed", "") + text
+            tab.text.insert("end", text)
+            tab.text.see("end")
+
+        if self.generations.pending():
+            self.stream_poll = self.after(50, self.flush_tokens)
+
+    def display_response(self, job):
+        """
+        Show the drafts of a finished generation in its result tab.
 
-        Cancels the loading animation, resets the button, and opens a window
-        displaying the response with options to save or copy.
+        The best draft is shown, replacing any streamed text; with several
+        drafts, the draft button switches to the next one.
 
         Args:
-            response (str): The generated cover letter or an error message.
+            job (dict): The finished, failed or cancelled generation job.
         """
-        self.after_cancel(self.dot_animation)
-        self.gen_button.configure(text="Generate Response", state="normal")
+        future = job["future"]
+        if future.cancelled():
+            if not job.get("streaming"):
+                return
+            drafts = [{"text": "Generation cancelled."}]
+        elif future.exception() is not None:
+            drafts = [{"text": str(future.exception())}]
+        else:
+            drafts = future.result()
 
-        if self.win_result is None or not self.win_result.winfo_exists():
-            self.win_result = ctk.CTkToplevel(self)
-
-            self.win_result.geometry(
-                f"{cfg_main["size_x"]}x{cfg_main["size_y"]}")
-            self.win_result.title("Cover Letter Response")
-            self.win_result.attributes('-topmost', True)
-            self.win_result.resizable(False, False)
-
-            self.window_text = ctk.CTkTextbox(
-                master=self.win_result,
-                width=cfg_result["size_x"],
-                height=cfg_result["size_y"],
-                wrap="word"
-            )
-            self.save_button = ctk.CTkButton(
-                master=self.win_result,
-                width=cfg_entry["size_x"] * 0.5,
-                height=cfg_entry["size_y"],
-                command=self.save_to_file,
-                text="Save text file"
-            )
-            self.copy_button = ctk.CTkButton(
-                master=self.win_result,
-                width=cfg_entry["size_x"] * 0.5,
-                height=cfg_entry["size_y"],
-                command=self.copy_to_clipboard,
-                text="Copy to Clipboard"
-            )
+        self.open_result_window()
+        if not self.result_open(job["tab"]):
+            job["tab"] = self.add_result(job)
+        tab = job["tab"]
+        tab.drafts = drafts
+        self.show_draft(tab, 0)
 
-            self.window_text.insert("1.0", str(response))
+    def display_revision(self, job, draft, changed):
+        """
+        Replace the draft shown in a result tab with its revision.
 
-            self.save_button.place(x=cfg_result["pos_x"],
-                                   y=cfg_result["pos_y"])
-            self.window_text.place(x=cfg_result["pos_x"],
-                                   y=cfg_result["pos_x"])
-            self.copy_button.place(
-                x=cfg_result["pos_x"]+cfg_result["size_x"] -
-                cfg_entry["size_x"]*0.5,
-                y=cfg_result["pos_y"]
-            )
+        Args:
+            job (dict): The finished, failed or cancelled revision job.
+            draft (str): The letter before the revision, restored if the
+                         revision was cancelled or failed.
+            changed (dict[str, set[str]]): The tab's edited entries sent
+                                           with the revision, no longer
+                                           pending once it succeeded.
+        """
+        tab = job["tab"]
+        tab.busy = False
+        future = job["future"]
+        failed = future.cancelled() or future.exception() is not None
+        if not self.result_open(tab):
+            return
+        text = draft if failed else future.result()
+        if tab.drafts:
+            tab.drafts[tab.draft_index]["text"] = text
+            self.show_draft(tab, tab.draft_index)
         else:
-            self.text_box.delete("1.0", "end")
-            self.window_text.insert("1.0", str(response))
+            tab.text.delete("1.0", "end")
+            tab.text.insert("1.0", text)
+        if not failed:
+            for file_name, names in changed.items():
+                tab.changed.get(file_name, set()).difference_update(names)
+
+    def show_draft(self, tab, index):
+        """
+        Show one of the drafts of a result tab.
+
+        Args:
+            tab (ResultTab): The tab.
+            index (int): Position of the draft in the ranking.
+        """
+        tab.draft_index = index
+        draft = tab.drafts[index]
+        tab.text.delete("1.0", "end")
+        tab.text.insert("1.0", str(draft["text"]))
+        self.update_draft_button()
+
+    def update_draft_button(self, *_):
+        """
+        Label the draft button for the selected tab, hiding it if the tab
+        has a single draft.
+        """
+        tab = self.current_result()
+        if tab is None or len(tab.drafts) < 2:
+            self.draft_button.place_forget()
+            return
+        draft = tab.drafts[tab.draft_index]
+        self.draft_button.configure(
+            text=f"Draft {tab.draft_index + 1}/{len(tab.drafts)}: "
+                 f"{draft['words']} words, {draft['coverage']:.0%} match")
+        self.draft_button.place(
+            x=cfg_result["pos_x"] + cfg_entry["size_x"] * 0.5 +
+            cfg_result["pos_x"],
+            y=cfg_result["pos_y"]
+        )
+
+    def next_draft(self):
+        """
+        Switch the selected tab to its next draft, keeping any edits made
+        to the one shown.
+        """
+        tab = self.current_result()
+        if tab is None or len(tab.drafts) < 2:
+            return
+        tab.drafts[tab.draft_index]["text"] = \
+            tab.text.get("1.0", "end").strip()
+        self.show_draft(tab, (tab.draft_index + 1) % len(tab.drafts))
+
+    def add_result(self, job) -> "ResultTab":
+        """
+        Add a tab for a job's letter to the result window and select it.
+
+        Args:
+            job (dict): The generation job.
+
+        Returns:
+            ResultTab: The new tab.
+        """
+        self.open_result_window()
+        name = f"#{job['id']} {job['title'][:12]}".strip()
+        self.result_view.add(name)
+        text = ctk.CTkTextbox(
+            master=self.result_view.tab(name),
+            width=cfg_result["size_x"] - 2 * cfg_result["pos_x"],
+            height=cfg_result["size_y"] - 5 * cfg_entry["size_y"],
+            wrap="word"
+        )
+        text.place(x=0, y=0)
+        changed = {k: set(v) for k, v in job.get("changed", {}).items()}
+        self.results[name] = ResultTab(name, text, changed)
+        self.result_view.set(name)
+        self.update_draft_button()
+        return self.results[name]
+
+    def result_open(self, tab) -> bool:
+        """
+        Tell whether a result tab is still shown, not closed by the user
+        with its tab or the whole result window.
+
+        Args:
+            tab (ResultTab | None): The tab.
+
+        Returns:
+            bool: True if the tab is open.
+        """
+        return tab is not None and self.win_result is not None \
+            and self.win_result.winfo_exists() \
+            and self.results.get(tab.name) is tab
+
+    def current_result(self) -> "ResultTab | None":
+        """
+        Return the selected result tab.
+
+        Returns:
+            ResultTab | None: The tab, or None if the window has no tabs.
+        """
+        if self.win_result is None or not self.win_result.winfo_exists():
+            return None
+        return self.results.get(self.result_view.get())
+
+    def close_result(self):
+        """
+        Close the selected result tab.
+        """
+        tab = self.current_result()
+        if tab is None:
+            return
+        self.result_view.delete(tab.name)
+        del self.results[tab.name]
+        self.update_draft_button()
+
+    def open_result_window(self):
+        """
+        Open the result window, or raise it if it already exists.
+        """
+        if self.win_result is not None and self.win_result.winfo_exists():
             self.win_result.lift()
-            self.win_result.focus_force()
+            return
+
+        self.win_result = ctk.CTkToplevel(self)
+        self.results = {}
+
+        self.win_result.geometry(
+            f"{cfg_main["size_x"]}x{cfg_main["size_y"]}")
+        self.win_result.title("Cover Letter Response")
+        self.win_result.attributes('-topmost', True)
+        self.win_result.resizable(False, False)
+
+        self.result_view = ctk.CTkTabview(
+            master=self.win_result,
+            width=cfg_result["size_x"],
+            height=cfg_result["size_y"] - 2 * cfg_entry["size_y"],
+            command=self.update_draft_button
+        )
+        self.revise_entry = ctk.CTkEntry(
+            master=self.win_result,
+            width=cfg_result["size_x"] - cfg_entry["size_x"] * 0.5 -
+            cfg_result["pos_x"],
+            height=cfg_entry["size_y"],
+            placeholder_text="Revision, e.g. emphasise the Python project"
+        )
+        self.revise_button = ctk.CTkButton(
+            master=self.win_result,
+            width=cfg_entry["size_x"] * 0.5,
+            height=cfg_entry["size_y"],
+            command=self.revise_response,
+            text="Revise",
+            fg_color=cfg_clr["blue"],
+            border_color=cfg_clr["dark_blue"],
+            border_width=2,
+            border_spacing=1
+        )
+        self.save_button = ctk.CTkButton(
+            master=self.win_result,
+            width=cfg_entry["size_x"] * 0.5,
+            height=cfg_entry["size_y"],
+            command=self.save_to_file,
+            text="Save text file"
+        )
+        self.copy_button = ctk.CTkButton(
+            master=self.win_result,
+            width=cfg_entry["size_x"] * 0.5,
+            height=cfg_entry["size_y"],
+            command=self.copy_to_clipboard,
+            text="Copy to Clipboard"
+        )
+        self.draft_button = ctk.CTkButton(
+            master=self.win_result,
+            width=cfg_result["size_x"] - cfg_entry["size_x"] -
+            2 * cfg_result["pos_x"],
+            height=cfg_entry["size_y"],
+            command=self.next_draft,
+            text="Next draft"
+        )
+        self.close_button = ctk.CTkButton(
+            master=self.win_result,
+            width=cfg_edit["size_x"],
+            height=cfg_entry["size_y"],
+            command=self.close_result,
+            text="Close",
+            fg_color=cfg_clr["red"],
+            border_color=cfg_clr["dark_red"],
+            border_width=2,
+            border_spacing=1
+        )
+
+        self.save_button.place(x=cfg_result["pos_x"],
+                               y=cfg_result["pos_y"])
+        self.result_view.place(x=cfg_result["pos_x"],
+                               y=0)
+        self.copy_button.place(
+            x=cfg_result["pos_x"]+cfg_result["size_x"] -
+            cfg_entry["size_x"]*0.5,
+            y=cfg_result["pos_y"]
+        )
+        self.revise_entry.place(
+            x=cfg_result["pos_x"],
+            y=cfg_result["pos_y"] - 1.5 * cfg_entry["size_y"]
+        )
+        self.revise_button.place(
+            x=cfg_result["pos_x"]+cfg_result["size_x"] -
+            cfg_entry["size_x"]*0.5,
+            y=cfg_result["pos_y"] - 1.5 * cfg_entry["size_y"]
+        )
+        self.close_button.place(
+            x=cfg_result["pos_x"]+cfg_result["size_x"] -
+            cfg_edit["size_x"],
+            y=0
+        )
+
+    def open_queue_window(self):
+        """
+        Open the queue window listing every job with its state and elapsed
+        time, or raise it if it already exists, and keep it up to date.
+        """
+        if self.win_queue is not None and self.win_queue.winfo_exists():
+            self.win_queue.lift()
+            return
+
+        self.win_queue = ctk.CTkToplevel(self)
+        self.win_queue.geometry(f"{cfg_queue["size_x"]}x{cfg_queue["size_y"]}")
+        self.win_queue.title("Generation Queue")
+        self.win_queue.resizable(False, False)
+        self.queue_rows = {}
+
+        self.queue_frame = ctk.CTkScrollableFrame(
+            master=self.win_queue,
+            width=cfg_queue["size_x"] - 2 * cfg_queue["pos_x"] - 20,
+            height=cfg_queue["size_y"] - 3 * cfg_entry["size_y"]
+        )
+        clear_button = ctk.CTkButton(
+            master=self.win_queue,
+            width=cfg_entry["size_x"] * 0.5,
+            height=cfg_entry["size_y"],
+            command=self.clear_finished,
+            text="Clear finished"
+        )
+        self.queue_frame.place(x=cfg_queue["pos_x"], y=cfg_queue["pos_x"])
+        clear_button.place(
+            x=cfg_queue["pos_x"],
+            y=cfg_queue["size_y"] - 1.5 * cfg_entry["size_y"]
+        )
+        self.refresh_queue()
+
+    def refresh_queue(self):
+        """
+        Update the queue window's rows and the generate button's label.
+
+        Reschedules itself while the queue window is open or jobs are
+        unfinished.
+        """
+        if self.queue_poll is not None:
+            self.after_cancel(self.queue_poll)
+            self.queue_poll = None
+
+        pending = self.generations.pending()
+        self.gen_button.configure(
+            text=f"Generate Response ({pending} in progress)" if pending
+            else "Generate Response")
+        if self.win_queue is None or not self.win_queue.winfo_exists():
+            if pending:
+                self.queue_poll = self.after(250, self.refresh_queue)
+            return
+
+        for job in self.generations.jobs:
+            if job["id"] not in self.queue_rows:
+                label = ctk.CTkLabel(master=self.queue_frame, anchor="w",
+                                     width=cfg_queue["size_x"] - 150)
+                cancel = ctk.CTkButton(
+                    master=self.queue_frame,
+                    width=cfg_edit["size_x"] + 10,
+                    height=cfg_entry["size_y"] - 5,
+                    command=job["future"].cancel,
+                    text="Cancel",
+                    fg_color=cfg_clr["red"],
+                    border_color=cfg_clr["dark_red"],
+                    border_width=2
+                )
+                row = len(self.queue_rows)
+                label.grid(row=row, column=0, sticky="w")
+                cancel.grid(row=row, column=1, pady=2)
+                self.queue_rows[job["id"]] = (label, cancel)
+            label, cancel = self.queue_rows[job["id"]]
+            label.configure(
+                text=f"#{job['id']} {job['title'][:28]}  {job['state']}  "
+                     f"{self.generations.elapsed(job):.1f}s")
+            if job["state"] not in ("queued", "running"):
+                cancel.configure(state="disabled")
+
+        self.queue_poll = self.after(250, self.refresh_queue)
+
+    def clear_finished(self):
+        """
+        Remove finished jobs from the queue and the queue window.
+        """
+        self.generations.clear_finished()
+        remaining = {job["id"] for job in self.generations.jobs}
+        for job_id in list(self.queue_rows):
+            if job_id not in remaining:
+                for widget in self.queue_rows.pop(job_id):
+                    widget.destroy()
 
     def save_to_file(self):
         """
-        Save the generated cover letter to a file.
+        Save the letter of the selected result tab to a file.
 
         Opens a file dialog to select a save location and writes the text
         from the response window to a .txt file.
         """
+        tab = self.current_result()
+        if tab is None:
+            return
         file_path = filedialog.asksaveasfilename(
             parent=self.win_result,
             defaultextension=".txt",
@@ -206,24 +645,51 @@ class CoverGenWindow(ctk.CTk):
         )
         if file_path:
             with open(file_path, "w", encoding="utf-8") as save_file:
-                save_file.write(self.window_text.get("1.0", "end").strip())
+                save_file.write(tab.text.get("1.0", "end").strip())
 
     def copy_to_clipboard(self):
         """
-        Copy the generated cover letter to the system clipboard.
+        Copy the letter of the selected result tab to the system clipboard.
 
         Changes button text to indicate success and restores the original
         button text after a delay.
         """
+        tab = self.current_result()
+        if tab is None:
+            return
         self.copy_button.configure(text="Copied")
         self.copy_button.after(
             2500, lambda: self.copy_button.configure(text="Copy to Clipboard")
         )
         self.clipboard_clear()
-        self.clipboard_append(self.window_text.get("1.0", "end").strip())
+        self.clipboard_append(tab.text.get("1.0", "end").strip())
         self.update()
 
 
+class ResultTab:
+    """
+    One letter in the result window: its text box, ranked drafts and the
+    applicant entries edited since it was written or last revised.
+    """
+    def __init__(self, name, text, changed=None):
+        """
+        Initialize the tab with no drafts yet.
+
+        Args:
+            name (str): Name of the tab.
+            text (ctk.CTkTextbox): Text box showing the letter.
+            changed (dict[str, set[str]], optional): Names of the entries
+                                                     edited so far, by data
+                                                     file name.
+        """
+        self.name = name
+        self.text = text
+        self.changed = changed or {}
+        self.drafts = []
+        self.draft_index = 0
+        self.busy = False
+
+
 class TabView(ctk.CTkTabview):
     """
     Tab view that organizes and manages multiple tabs for input data.
@@ -247,26 +713,26 @@ class TabView(ctk.CTkTabview):
 
         self.skill_tab = Tab(
             master=self.tab("Skills"),
-            dict_ref=skill_data
+            dict_ref=data_cache.load("Skills")
         )
         self.job_tab = Tab(
             master=self.tab("Education & Awards"),
-            dict_ref=education_data,
+            dict_ref=data_cache.load("Education & Awards"),
             box_num=2
         )
         self.skill_tab = Tab(
             master=self.tab("Work History"),
-            dict_ref=work_data,
+            dict_ref=data_cache.load("Work History"),
             box_num=3
         )
         self.job_tab = Tab(
             master=self.tab("Projects"),
-            dict_ref=project_data,
+            dict_ref=data_cache.load("Projects"),
             box_num=3
         )
         self.skill_tab = Tab(
             master=self.tab("Hobbies"),
-            dict_ref=hobby_data
+            dict_ref=data_cache.load("Hobbies")
         )
 
     def bind(self, *args, **kwargs):
@@ -394,12 +860,12 @@ class Tab:
 
     def save_new_entries(self):
         """
-        Save updated data entries to the corresponding JSON file.
+        Queue updated data entries to be saved to the corresponding JSON
+        file in the background.
         """
-        tab_name = self.master_ref.master.get()
-        with open(f"applicant data/{tab_name}.json", "w",
-                  encoding="utf-8") as save_file:
-            json.dump(self.data, save_file, ensure_ascii=False, indent=4)
+        data_writer.schedule(self.master_ref.master.get(), self.data)
+        self.master_ref.winfo_toplevel().entry_changed(
+            self.master_ref.master.get(), self.entry_list.get())
 
 
 class ToggleEditBox:
@@ -477,7 +943,7 @@ class ToggleEditBox:
         Delete the selected entry after user confirmation.
 
         Prompts the user with a confirmation dialog and removes the selected
-        entry from the data dictionary if confirmed.
+        entry from the data dictionary if confirmed, then saves the change.
         """
         confirmation = ctk.CTkInputDialog(
             text="Type 'Yes' to confirm deletion",
@@ -489,6 +955,7 @@ class ToggleEditBox:
             self.combo_box_ref.configure(values=list(self.dict_ref.keys())[1:])
             self.combo_box_ref.set(value="")
             self.update_box(text="Select or create a new entry.")
+            self.save_edit()
 
     def toggle_edit(self):
         """
@@ -549,9 +1016,9 @@ class ToggleEditBox:
 
     def save_edit(self):
         """
-        Save edits to the corresponding JSON file after changes are made.
+        Queue edits to be saved to the corresponding JSON file in the
+        background after changes are made.
         """
-        tab_name = self.master_ref.master.get()
-        with open(f"applicant data/{tab_name}.json", "w",
-                  encoding="utf-8") as save_loc:
-            json.dump(self.dict_ref, save_loc, ensure_ascii=False, indent=4)
+        data_writer.schedule(self.master_ref.master.get(), self.dict_ref)
+        self.master_ref.winfo_toplevel().entry_changed(
+            self.master_ref.master.get(), self.combo_box_ref.get())
@@ -0,0 +1,204 @@
+"""
+Process-wide cache of the applicant data files.
+
+The GUI and the agent tools share one parsed copy of each file. The GUI edits
+the full dicts (including the "__Formatting" entry) in place and tells the
+cache when it has edited and saved them; the tools read pre-stripped copies
+without the formatting entry. Files changed by another process are picked up
+through their modification time.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+DATA_DIR = "applicant data"
+
+DATA_FILES = [
+    "Education & Awards",
+    "Hobbies",
+    "Projects",
+    "Skills",
+    "Work History"
+]
+
+FORMATTING_KEY = "__Formatting"
+
+
+class ApplicantDataCache:
+    """
+    Thread-safe cache of parsed applicant data, invalidated by file mtime or
+    explicitly after a save.
+    """
+    def __init__(self, data_dir=DATA_DIR, check_interval=1.0):
+        """
+        Initialize an empty cache.
+
+        Args:
+            data_dir (str): Directory holding the applicant data files.
+            check_interval (float): Minimum seconds between mtime checks of
+                                    the same file, so repeated reads stay in
+                                    memory.
+        """
+        self.data_dir = data_dir
+        self.check_interval = check_interval
+        self._raw = {}
+        self._stripped = {}
+        self._mtimes = {}
+        self._checked = {}
+        self._dirty = set()
+        self._lock = threading.RLock()
+
+    def path(self, name) -> str:
+        """
+        Return the path of an applicant data file.
+
+        Args:
+            name (str): Name of the data file without extension.
+
+        Returns:
+            str: Path to the JSON file.
+        """
+        return os.path.join(self.data_dir, f"{name}.json")
+
+    def load(self, name) -> dict:
+        """
+        Return the full data dict of a file, including the formatting entry.
+
+        The same dict object is returned on every call and is meant to be
+        edited in place; call edited() after changing it and saved() after
+        writing it back to disk.
+
+        Args:
+            name (str): Name of the data file without extension.
+
+        Returns:
+            dict: The shared data dict.
+        """
+        with self._lock:
+            self._refresh(name)
+            return self._raw[name]
+
+    def get(self, name) -> dict:
+        """
+        Return the data of a file with the formatting entry removed.
+
+        Args:
+            name (str): Name of the data file without extension.
+
+        Returns:
+            dict: A cached copy of the entries. Treat it as read only.
+        """
+        with self._lock:
+            self._refresh(name)
+            return self._stripped[name]
+
+    def edited(self, name):
+        """
+        Record that the shared dict of a file was edited in memory. The
+        stripped copy is rebuilt, and the file is not reloaded from disk
+        until saved() is called, so unsaved edits are not overwritten.
+
+        Args:
+            name (str): Name of the data file without extension.
+        """
+        with self._lock:
+            if name not in self._raw:
+                return
+            self._dirty.add(name)
+            self._strip(name)
+
+    def saved(self, name):
+        """
+        Record that the shared dict of a file was edited and written to disk
+        by this process, so the stripped copy is rebuilt without re-reading
+        the file.
+
+        Args:
+            name (str): Name of the data file without extension.
+        """
+        with self._lock:
+            if name not in self._raw:
+                return
+            self._dirty.discard(name)
+            self._mtimes[name] = os.stat(self.path(name)).st_mtime_ns
+            self._checked[name] = time.monotonic()
+            self._strip(name)
+
+    def content_hash(self) -> str:
+        """
+        Hash the current contents of every applicant data file.
+
+        Returns:
+            str: Hex digest that changes whenever any entry changes.
+        """
+        with self._lock:
+            data = {name: self.get(name) for name in DATA_FILES}
+        payload = json.dumps(data, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def invalidate(self, name=None):
+        """
+        Force a file, or every file, to be re-read on next access.
+
+        Args:
+            name (str, optional): Name of the data file without extension.
+        """
+        with self._lock:
+            names = [name] if name is not None else list(self._mtimes)
+            for n in names:
+                self._mtimes.pop(n, None)
+                self._checked.pop(n, None)
+
+    def _refresh(self, name):
+        """
+        Load a file if it is not cached or has changed on disk.
+
+        Reloads update the shared dict in place so references held by the
+        GUI stay valid.
+
+        Args:
+            name (str): Name of the data file without extension.
+        """
+        now = time.monotonic()
+        if name in self._dirty or name in self._raw and \
+                now - self._checked.get(name, 0) < self.check_interval:
+            return
+        self._checked[name] = now
+
+        path = self.path(name)
+        mtime = os.stat(path).st_mtime_ns
+        if name in self._raw and self._mtimes.get(name) == mtime:
+            return
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        if name in self._raw:
+            self._raw[name].clear()
+            self._raw[name].update(data)
+        else:
+            self._raw[name] = data
+        self._mtimes[name] = mtime
+        self._strip(name)
+
+    def _strip(self, name):
+        """
+        Rebuild the stripped copy of a file's data.
+
+        Nested entry dicts are copied so in-progress GUI edits do not leak
+        into tool results before they are saved.
+
+        Args:
+            name (str): Name of the data file without extension.
+        """
+        self._stripped[name] = {
+            key: dict(value) if isinstance(value, dict) else value
+            for key, value in self._raw[name].items()
+            if key != FORMATTING_KEY
+        }
+
+
+data_cache = ApplicantDataCache()
@@ -0,0 +1,356 @@
+"""
+Headless batch generation of cover letters.
+
+Reads job postings from a JSONL file (one JSON object per line with an ID and
+the posting text), generates a cover letter for each through a bounded pool
+of async workers, and appends every result to an output JSONL file as soon
+as it finishes. Postings whose ID already has a successful result in the output
+file are skipped, so an interrupted run can simply be restarted.
+
+Reposts of a posting already done or in progress in the same run are
+detected with MinHash near-duplicate matching. Their letter is reused if only
+the order of lines or boilerplate changed, and otherwise adapted to the
+changed lines in one cheap revision call, instead of being generated again.
+
+Usage:
+    python batch.py postings.jsonl letters.jsonl --workers 4
+    python batch.py postings.jsonl letters.jsonl --dedup-threshold 0.9
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import re
+import time
+from agent_methods import CoverLetterAgent
+from callbacks import UsageCallbackHandler
+from dedup import DEFAULT_THRESHOLD, NearDuplicateIndex
+from preprocessing import preprocess_posting
+
+
+ID_KEYS = ("request_id", "id")
+POSTING_KEYS = ("body", "job_posting", "posting")
+PROFILE_KEYS = ("profile", "profile_id")
+
+
+def read_postings(input_path):
+    """
+    Read job postings from a JSONL file.
+
+    Each line must hold an ID under "request_id" or "id" and the posting
+    text under "body", "job_posting" or "posting". An optional "title" is
+    prepended to the posting text, and an optional "profile" or
+    "profile_id" selects the applicant profile.
+
+    Args:
+        input_path (str): Path to the JSONL file of postings.
+
+    Yields:
+        tuple[str, str, str | None]: The posting ID, the full posting text
+        and the applicant profile ID.
+    """
+    with open(input_path, "r", encoding="utf-8") as in_file:
+        for line_num, line in enumerate(in_file, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            posting_id = next(
+                (record[k] for k in ID_KEYS if record.get(k)), None)
+            body = next(
+                (record[k] for k in POSTING_KEYS if record.get(k)), None)
+            if posting_id is None or body is None:
+                raise ValueError(
+                    f"{input_path}:{line_num}: expected an ID and a posting")
+            title = record.get("title")
+            profile = next(
+                (record[k] for k in PROFILE_KEYS if record.get(k)), None)
+            yield str(posting_id), f"{title}\n{body}" if title else body, \
+                profile
+
+
+def read_completed_ids(output_path):
+    """
+    Collect the IDs that already have a successful result.
+
+    A partially written last line, left behind if the process died mid
+    write, is ignored.
+
+    Args:
+        output_path (str): Path to the output JSONL file.
+
+    Returns:
+        set[str]: IDs whose status is "ok".
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as out_file:
+        for line in out_file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "ok":
+                done.add(record["request_id"])
+    return done
+
+
+def ends_mid_line(output_path) -> bool:
+    """
+    Tell whether the output file ends in a partially written line, which
+    the next appended result must not be glued to.
+
+    Args:
+        output_path (str): Path to the output JSONL file.
+
+    Returns:
+        bool: True if the file is not empty and lacks a final newline.
+    """
+    if not os.path.exists(output_path) or not os.path.getsize(output_path):
+        return False
+    with open(output_path, "rb") as out_file:
+        out_file.seek(-1, os.SEEK_END)
+        return out_file.read(1) != b"\n"
+
+
+def posting_changes(original, job_posting) -> str | None:
+    """
+    Describe how a near-duplicate posting differs from the one a letter was
+    written for, as a revision instruction. Line order, boilerplate and
+    "posted N days ago" style noise are ignored.
+
+    Args:
+        original (str): The posting the letter was written for.
+        job_posting (str): The near-duplicate posting.
+
+    Returns:
+        str | None: The instruction, listing added and removed lines, or
+        None if no line changed.
+    """
+    def lines(text):
+        text, _ = preprocess_posting(text)
+        return {" ".join(re.findall(r"\w+", line.lower())): line.strip()
+                for line in text.splitlines() if line.strip()}
+
+    before, after = lines(original), lines(job_posting)
+    added = [line for key, line in after.items() if key not in before]
+    removed = [line for key, line in before.items() if key not in after]
+    if not added and not removed:
+        return None
+    instruction = ["The letter was written for an earlier version of the "
+                   "job posting. Adapt it to the new version."]
+    if added:
+        instruction.append("New or changed lines:\n" +
+                           "\n".join(f"- {line}" for line in added))
+    if removed:
+        instruction.append("Removed lines:\n" +
+                           "\n".join(f"- {line}" for line in removed))
+    return "\n".join(instruction)
+
+
+class BatchRunner:
+    """
+    Runs cover letter generation for many postings on a bounded pool of
+    async workers sharing one agent, and streams the results to a JSONL
+    file.
+    """
+    def __init__(self, output_path, workers=4, use_cache=True,
+                 dedup_threshold=DEFAULT_THRESHOLD):
+        """
+        Initialize the runner.
+
+        Args:
+            output_path (str): Path of the JSONL file results are appended to.
+            workers (int): Maximum number of concurrent generations.
+            use_cache (bool): Reuse letters from the response cache.
+            dedup_threshold (float): Minimum similarity for a posting to
+                                     share the letter of an earlier one;
+                                     0 turns near-duplicate detection off.
+        """
+        self.output_path = output_path
+        self.workers = workers
+        self.use_cache = use_cache
+        self.dedup = NearDuplicateIndex(dedup_threshold) \
+            if dedup_threshold else None
+        self.savings = collections.Counter()
+        self.agent = None
+        self._originals = {}
+
+    async def _process(self, posting_id, job_posting, profile=None) -> dict:
+        """
+        Generate a cover letter for one posting.
+
+        Args:
+            posting_id (str): ID of the posting.
+            job_posting (str): The posting text.
+            profile (str, optional): ID of the applicant profile.
+
+        Returns:
+            dict: The result record to write.
+        """
+        start = time.perf_counter()
+        try:
+            record = {"request_id": posting_id, "status": "ok",
+                      **await self._letter(posting_id, job_posting, profile)}
+        except Exception as e:  # pylint: disable=W0718
+            record = {"request_id": posting_id, "status": "error",
+                      "error": self.agent.parse_error(str(e))}
+        record["elapsed"] = round(time.perf_counter() - start, 3)
+        return record
+
+    async def _letter(self, posting_id, job_posting, profile) -> dict:
+        """
+        Write the letter of a posting, reusing the letter of a near-duplicate
+        posting done or in progress in this run if there is one.
+
+        Args:
+            posting_id (str): ID of the posting.
+            job_posting (str): The posting text.
+            profile (str | None): ID of the applicant profile.
+
+        Returns:
+            dict: The letter under "cover_letter", plus "duplicate_of",
+            "similarity" and "revised" if it came from an earlier posting.
+        """
+        if self.dedup is None:
+            return {"cover_letter":
+                    (await self._generate(job_posting, profile))[0]}
+
+        signature = self.dedup.signature(job_posting)
+        match, similarity = self.dedup.query(job_posting, profile, signature)
+        if match is None:
+            done = asyncio.get_running_loop().create_future()
+            self._originals[posting_id] = (job_posting, done)
+            self.dedup.add(posting_id, job_posting, profile, signature)
+            outcome = None
+            try:
+                outcome = await self._generate(job_posting, profile)
+            finally:
+                done.set_result(outcome)
+            return {"cover_letter": outcome[0]}
+
+        original, done = self._originals[match]
+        outcome = await asyncio.shield(done)
+        if outcome is None:
+            # The original failed; this posting gets its own generation.
+            return {"cover_letter":
+                    (await self._generate(job_posting, profile))[0]}
+        letter, llm_calls = outcome
+        duplicate = {"duplicate_of": match, "similarity": round(similarity, 3)}
+        changes = await asyncio.to_thread(posting_changes, original,
+                                          job_posting)
+        if changes is None:
+            self.savings["reused"] += 1
+            self.savings["llm_calls_saved"] += llm_calls
+            return {"cover_letter": letter, **duplicate, "revised": False}
+        letter = await self.agent.arevise_cover_letter(
+            letter, changes, raise_errors=True)
+        self.savings["revised"] += 1
+        self.savings["llm_calls_saved"] += max(llm_calls - 1, 0)
+        return {"cover_letter": letter, **duplicate, "revised": True}
+
+    async def _generate(self, job_posting, profile) -> tuple[str, int]:
+        """
+        Generate a letter and count the LLM calls it took.
+
+        Args:
+            job_posting (str): The posting text.
+            profile (str | None): ID of the applicant profile.
+
+        Returns:
+            tuple[str, int]: The letter and its number of LLM calls, 0 if
+            it came from the response cache.
+        """
+        usage = UsageCallbackHandler()
+        letter = await self.agent.agenerate_cover_letter(
+            job_posting, raise_errors=True, callbacks=[usage],
+            use_cache=self.use_cache, profile=profile)
+        return letter, usage.summary()["llm_calls"]
+
+    async def _worker(self, jobs, out_file):
+        """
+        Take postings off the queue and append their results until a None
+        sentinel is received.
+
+        Args:
+            jobs (asyncio.Queue): Queue of (posting ID, posting text,
+                                  profile ID) tuples.
+            out_file: Open output file handle.
+        """
+        while (job := await jobs.get()) is not None:
+            record = await self._process(*job)
+            out_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out_file.flush()
+            print(f"[{record['status']}] {record['request_id']} "
+                  f"({record['elapsed']}s)")
+
+    async def run(self, postings):
+        """
+        Generate cover letters for every posting not already completed.
+
+        Args:
+            postings (Iterable[tuple[str, str, str | None]]): Posting IDs,
+                texts and applicant profile IDs.
+
+        Returns:
+            tuple[int, int]: Number of postings submitted and skipped.
+        """
+        if self.agent is None:
+            self.agent = CoverLetterAgent()
+        done = read_completed_ids(self.output_path)
+        submitted = skipped = 0
+        jobs = asyncio.Queue(maxsize=self.workers * 2)
+        partial = ends_mid_line(self.output_path)
+
+        with open(self.output_path, "a", encoding="utf-8") as out_file:
+            if partial:
+                out_file.write("\n")
+            workers = [asyncio.create_task(self._worker(jobs, out_file))
+                       for _ in range(self.workers)]
+            for posting_id, job_posting, profile in postings:
+                if posting_id in done:
+                    skipped += 1
+                    continue
+                done.add(posting_id)
+                await jobs.put((posting_id, job_posting, profile))
+                submitted += 1
+            for _ in workers:
+                await jobs.put(None)
+            await asyncio.gather(*workers)
+
+        return submitted, skipped
+
+
+def main():
+    """
+    Parse command line arguments and run the batch.
+    """
+    parser = argparse.ArgumentParser(
+        description="Generate cover letters for a JSONL file of postings.")
+    parser.add_argument("input", help="JSONL file of job postings")
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="maximum concurrent generations (default: 4)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="generate fresh letters even if cached")
+    parser.add_argument("--dedup-threshold", type=float,
+                        default=DEFAULT_THRESHOLD,
+                        help="similarity above which a posting shares the "
+                             "letter of an earlier one, 0 to turn off "
+                             f"(default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+
+    runner = BatchRunner(args.output, workers=args.workers,
+                         use_cache=not args.no_cache,
+                         dedup_threshold=args.dedup_threshold)
+    submitted, skipped = asyncio.run(runner.run(read_postings(args.input)))
+    print(f"Finished: {submitted} generated, {skipped} already done")
+    if runner.dedup is not None:
+        print(f"Near-duplicates: {runner.savings['reused']} reused, "
+              f"{runner.savings['revised']} revised, "
+              f"{runner.savings['llm_calls_saved']} LLM calls saved")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Compare the cost of the ReAct agent and the single-pass prefetch mode on one
+job posting.
+
+Usage (from the repository root):
+    python -m benchmarks.compare_modes posting.txt
+"""
+import argparse
+from agent_methods import CoverLetterAgent
+
+
+def main():
+    """
+    Run both generation modes on a posting and print a comparison table.
+    """
+    parser = argparse.ArgumentParser(
+        description="Compare LLM round trips, tokens and wall time of the "
+                    "agent and prefetch generation modes.")
+    parser.add_argument("posting", help="text file holding a job posting")
+    args = parser.parse_args()
+
+    with open(args.posting, "r", encoding="utf-8") as posting_file:
+        job_posting = posting_file.read()
+
+    results = CoverLetterAgent().compare_modes(job_posting)
+
+    columns = ["llm_calls", "prompt_tokens", "completion_tokens",
+               "total_tokens", "seconds"]
+    print(f"{'mode':<10}" + "".join(f"{c:>19}" for c in columns))
+    for mode, result in results.items():
+        print(f"{mode:<10}" + "".join(f"{result[c]:>19}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Measure the tokens saved by compact tool observations.
+
+For every data file of each applicant profile, the tool result is counted
+as the agents send it without compaction (Python's repr in the ReAct
+scratchpad, JSON in a tool message) and in the compact format with the
+configured truncation. Per letter, the ReAct agent is assumed to call every
+data tool once, each observation then being re-sent with every later step,
+and the tool calling agent to send every observation once. Whole files are
+counted, as without a posting to rank entries against.
+
+Profiles are read from the given directories, by default "applicant data"
+and every profile under the "profiles" directory. Empty profiles are
+skipped; with --synthetic the offline benchmark's generated profiles are
+measured too.
+
+Usage (from the repository root):
+    python -m benchmarks.observations
+    python -m benchmarks.observations profiles/alice --synthetic
+"""
+import argparse
+import json
+import os
+import tempfile
+from applicant_data import DATA_DIR, DATA_FILES, ApplicantDataCache
+from agent_methods import load_api_config
+from observations import DEFAULT_OBSERVATIONS, compact
+from preprocessing import count_tokens
+from profiles import DEFAULT_PROFILES
+from benchmarks.offline import PROFILE_SIZES, make_profile
+
+
+def measure(directory, max_chars) -> dict | None:
+    """
+    Count the observation tokens of one profile in every format.
+
+    Args:
+        directory (str): The profile's data directory.
+        max_chars (dict[str, int]): Maximum length of each field's values.
+
+    Returns:
+        dict | None: Tokens per data file in each format, and the tokens
+        saved per letter by each agent, or None if the profile is empty.
+    """
+    cache = ApplicantDataCache(directory)
+    files = {}
+    for name in DATA_FILES:
+        data = cache.get(name)
+        if not data:
+            continue
+        files[name] = {
+            "repr": count_tokens(str(data)),
+            "json": count_tokens(json.dumps(data, ensure_ascii=False)),
+            "compact": count_tokens(compact(data, max_chars))
+        }
+    if not files:
+        return None
+
+    steps = len(files)
+    react = sum((f["repr"] - f["compact"]) * (steps - i)
+                for i, f in enumerate(files.values()))
+    tool_calling = sum(f["json"] - f["compact"] for f in files.values())
+    return {"files": files, "react": react, "tool_calling": tool_calling}
+
+
+def default_profiles() -> list[str]:
+    """
+    List the profile directories measured by default.
+
+    Returns:
+        list[str]: "applicant data" and every directory under the profiles
+        directory of the API config.
+    """
+    root = (load_api_config().get("profiles") or {}).get(
+        "directory", DEFAULT_PROFILES["directory"])
+    profiles = [DATA_DIR]
+    if os.path.isdir(root):
+        profiles += sorted(os.path.join(root, d) for d in os.listdir(root)
+                           if os.path.isdir(os.path.join(root, d)))
+    return profiles
+
+
+def main():
+    """
+    Print the observation tokens of every profile and the savings per
+    letter.
+    """
+    parser = argparse.ArgumentParser(
+        description="Measure the tokens saved by compact observations.")
+    parser.add_argument("profiles", nargs="*",
+                        help="profile directories (default: applicant data "
+                             "and every profile)")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="also measure the offline benchmark's "
+                             "generated profiles")
+    args = parser.parse_args()
+
+    settings = {**DEFAULT_OBSERVATIONS,
+                **(load_api_config().get("observations") or {})}
+    profiles = [(p, p) for p in args.profiles or default_profiles()]
+
+    with tempfile.TemporaryDirectory() as root:
+        if args.synthetic:
+            for size, entries in PROFILE_SIZES.items():
+                directory = os.path.join(root, size)
+                os.makedirs(directory)
+                make_profile(directory, entries)
+                profiles.append((f"synthetic {size}", directory))
+
+        print(f"{'profile':<24}{'file':<20}{'repr':>8}{'json':>8}"
+              f"{'compact':>9}{'saved':>8}")
+        for label, directory in profiles:
+            result = measure(directory, settings["max_chars"])
+            if result is None:
+                print(f"{label:<24}(empty)")
+                continue
+            for name, tokens in result["files"].items():
+                saved = 1 - tokens["compact"] / tokens["repr"]
+                print(f"{label:<24}{name:<20}{tokens['repr']:>8}"
+                      f"{tokens['json']:>8}{tokens['compact']:>9}"
+                      f"{saved:>8.0%}")
+            print(f"{label:<24}tokens saved per letter: ReAct "
+                  f"{result['react']}, tool calling "
+                  f"{result['tool_calling']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Offline end-to-end benchmark of cover letter generation.
+
+Starts the local stub API server, points the agent at it and generates
+letters for a corpus of synthetic job postings against applicant profiles of
+different sizes. Nothing is sent over the network and the real applicant data
+is left untouched: each profile is written to a temporary directory.
+
+For each profile size the benchmark reports throughput, p50/p95 latency per
+letter, agent steps (LLM calls) and tokens per letter, the prompt tokens per
+letter the stub's emulated prompt cache served, the peak and retained
+Python memory allocated while generating, and the share of HTTP requests
+that reused an open connection.
+
+Usage (from the repository root):
+    python -m benchmarks.offline --letters 20 --latency 0.05
+    python -m benchmarks.offline --output baseline.json
+    python -m benchmarks.offline --baseline baseline.json --tolerance 0.2
+
+With --baseline the run fails if p95 latency, steps or tokens per letter grew
+by more than the tolerance, so it can be used to catch regressions.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from applicant_data import DATA_FILES, FORMATTING_KEY, data_cache
+from agent_methods import CoverLetterAgent, load_api_config
+from callbacks import UsageCallbackHandler
+from http_client import connection_metrics
+from tracing import percentile
+from benchmarks.stub_server import DEFAULT_ACTIONS, start_stub_server
+
+
+PROFILE_SIZES = {
+    "small": 3,
+    "medium": 15,
+    "large": 60
+}
+
+FORMATTING = {
+    "Education & Awards": {"Establishment": None, "Grade": None},
+    "Hobbies": None,
+    "Projects": {"Description": None, "Technologies Used": None,
+                 "Challenges Faced": None},
+    "Skills": None,
+    "Work History": {"Company": None, "Description": None, "Duration": None}
+}
+
+VOCABULARY = (
+    "python data pipeline api service cloud aws docker kubernetes sql "
+    "postgres testing automation analytics dashboard machine learning model "
+    "deployment monitoring security frontend react backend distributed "
+    "systems performance optimisation collaboration mentoring agile design "
+    "architecture reliability scaling customers product research streaming "
+    "batch reporting migration integration documentation leadership"
+).split()
+
+REGRESSION_METRICS = ("latency_p95", "steps", "tokens")
+
+
+def words(rng, count) -> str:
+    """
+    Draw a random phrase from the benchmark vocabulary.
+
+    Args:
+        rng (random.Random): Seeded random generator.
+        count (int): Number of words.
+
+    Returns:
+        str: The phrase.
+    """
+    return " ".join(rng.choices(VOCABULARY, k=count))
+
+
+def make_profile(directory, entries, seed=0):
+    """
+    Write a synthetic applicant profile in the app's data file format.
+
+    Args:
+        directory (str): Directory to write the data files to.
+        entries (int): Number of entries per data file.
+        seed (int): Seed of the random content.
+    """
+    rng = random.Random(seed)
+    for name in DATA_FILES:
+        data = {FORMATTING_KEY: FORMATTING[name]}
+        for i in range(entries):
+            fields = FORMATTING[name]
+            data[f"{words(rng, 3).title()} {i}"] = None if fields is None \
+                else {field: words(rng, 12) for field in fields}
+        with open(os.path.join(directory, f"{name}.json"), "w",
+                  encoding="utf-8") as data_file:
+            json.dump(data, data_file, indent=4)
+
+
+def make_postings(count, seed=0) -> list[str]:
+    """
+    Generate job postings of short, medium and long length in turn.
+
+    Args:
+        count (int): Number of postings.
+        seed (int): Seed of the random content.
+
+    Returns:
+        list[str]: The postings.
+    """
+    rng = random.Random(seed)
+    postings = []
+    for i in range(count):
+        sections = (2, 5, 12)[i % 3]
+        lines = [f"Senior {words(rng, 2).title()} Engineer"]
+        for _ in range(sections):
+            lines.append(f"- {words(rng, rng.randint(8, 20))}")
+        postings.append("\n".join(lines))
+    return postings
+
+
+def generate(agent, job_posting) -> dict:
+    """
+    Generate one letter and measure it.
+
+    Args:
+        agent (CoverLetterAgent): The agent under test.
+        job_posting (str): The job posting.
+
+    Returns:
+        dict: Seconds, LLM calls and tokens of the generation.
+    """
+    usage = UsageCallbackHandler()
+    start = time.perf_counter()
+    agent.generate_cover_letter(job_posting, raise_errors=True,
+                                callbacks=[usage], use_cache=False)
+    return {"seconds": time.perf_counter() - start, **usage.summary()}
+
+
+def run_profile(agent, postings, workers) -> dict:
+    """
+    Generate a letter for every posting against the current profile.
+
+    Args:
+        agent (CoverLetterAgent): The agent under test.
+        postings (list[str]): The job postings.
+        workers (int): Number of letters generated concurrently.
+
+    Returns:
+        dict: Throughput, latency, step, token and memory statistics.
+    """
+    generate(agent, postings[0])
+    connections = connection_metrics.stats()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda p: generate(agent, p), postings))
+    wall = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    requests = connection_metrics.stats()["requests"] - connections["requests"]
+    opened = connection_metrics.stats()["connections"] - \
+        connections["connections"]
+
+    latencies = [r["seconds"] for r in results]
+    return {
+        "letters": len(results),
+        "throughput": round(len(results) / wall, 3),
+        "latency_p50": round(percentile(latencies, 50), 4),
+        "latency_p95": round(percentile(latencies, 95), 4),
+        "steps": round(statistics.mean(r["llm_calls"] for r in results), 1),
+        "tokens": round(statistics.mean(r["total_tokens"] for r in results)),
+        "cached": round(statistics.mean(r["cached_tokens"] for r in results)),
+        "peak_kib": round(peak / 1024, 1),
+        "retained_kib": round(retained / 1024, 1),
+        "conn_reuse": round(1 - opened / requests, 3) if requests else 0.0
+    }
+
+
+def configure(api_base):
+    """
+    Point the shared API config at the stub server and turn off everything
+    that would skew or outlive the benchmark.
+
+    Args:
+        api_base (str): The stub's API base URL.
+    """
+    api_config = load_api_config()
+    api_config["api_base"] = api_base
+    api_config.pop("endpoints", None)
+    api_config["rate_limits"] = {
+        "default": {"requests_per_minute": 1_000_000, "burst": 1000}
+    }
+    api_config["response_cache"] = {"enabled": False}
+    api_config["tracing"] = {"enabled": False}
+    # The stub ignores the key; this keeps the real one from being sent.
+    os.environ["TOGETHER_API_KEY"] = "stub"
+
+
+def check_regressions(results, baseline, tolerance) -> list[str]:
+    """
+    Compare a run against a saved baseline.
+
+    Args:
+        results (dict): Statistics per profile size of this run.
+        baseline (dict): Statistics per profile size of the baseline.
+        tolerance (float): Allowed relative growth, e.g. 0.2 for 20%.
+
+    Returns:
+        list[str]: One message per regressed metric.
+    """
+    regressions = []
+    for size, stats in results.items():
+        for metric in REGRESSION_METRICS:
+            before = baseline.get(size, {}).get(metric)
+            if before and stats[metric] > before * (1 + tolerance):
+                regressions.append(f"{size} {metric}: {before} -> "
+                                   f"{stats[metric]}")
+    return regressions
+
+
+def main():
+    """
+    Run the benchmark and print one row per profile size.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark letter generation against a local stub API.")
+    parser.add_argument("--letters", type=int, default=12,
+                        help="letters per profile size (default: 12)")
+    parser.add_argument("--profiles", default=",".join(PROFILE_SIZES),
+                        help="comma separated profile sizes "
+                             f"(default: {','.join(PROFILE_SIZES)})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="letters generated concurrently (default: 1)")
+    parser.add_argument("--mode", choices=["agent", "prefetch"],
+                        help="generation mode (default: from config)")
+    parser.add_argument("--agent-type",
+                        help="agent backend, e.g. tool-calling (default: "
+                             "from config)")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="stub seconds per response (default: 0.05)")
+    parser.add_argument("--token-latency", type=float, default=0.0,
+                        help="stub seconds between streamed chunks")
+    parser.add_argument("--prefill-latency", type=float, default=0.0,
+                        help="stub seconds per uncached prompt token")
+    parser.add_argument("--actions", default=",".join(DEFAULT_ACTIONS),
+                        help="tools the stub agent calls before answering")
+    parser.add_argument("--output", help="save the results to a JSON file")
+    parser.add_argument("--baseline",
+                        help="JSON results to check for regressions against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="allowed relative regression (default: 0.1)")
+    args = parser.parse_args()
+
+    server = start_stub_server(latency=args.latency,
+                               token_latency=args.token_latency,
+                               actions=[a for a in args.actions.split(",")
+                                        if a],
+                               prefill_latency=args.prefill_latency)
+    configure(f"http://127.0.0.1:{server.server_address[1]}/v1")
+    if args.agent_type:
+        load_api_config()["agent_type"] = args.agent_type
+
+    agent = CoverLetterAgent(mode=args.mode)
+    agent.agent.verbose = False
+    postings = make_postings(args.letters)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        data_cache.data_dir = directory
+        for size in args.profiles.split(","):
+            make_profile(directory, PROFILE_SIZES[size])
+            data_cache.invalidate()
+            results[size] = run_profile(agent, postings, args.workers)
+    server.shutdown()
+
+    columns = list(next(iter(results.values())))
+    print(f"{'profile':<10}" + "".join(f"{c:>14}" for c in columns))
+    for size, stats in results.items():
+        print(f"{size:<10}" + "".join(f"{stats[c]:>14}" for c in columns))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+            regressions = check_regressions(results, json.load(baseline_file),
+                                            args.tolerance)
+        if regressions:
+            sys.exit("Regressions:\n" + "\n".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Offline load test of the HTTP service mode.
+
+Starts the local stub API server and the letter service in-process, submits
+a burst of postings over HTTP, polls every accepted job until it finishes,
+and reports how many submissions were rejected by backpressure, throughput,
+end-to-end latency percentiles and the service's /metrics page.
+
+Usage (from the repository root):
+    python -m benchmarks.service --jobs 40 --workers 4 --queue-size 8
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from server import LetterService, ServiceServer
+from agent_methods import CoverLetterAgent
+from tracing import percentile
+from benchmarks.offline import configure, make_postings
+from benchmarks.stub_server import start_stub_server
+
+
+def request(url, body=None) -> tuple[int, dict | str]:
+    """
+    Send a request to the service.
+
+    Args:
+        url (str): Full URL.
+        body (dict, optional): JSON body; sent as POST if given.
+
+    Returns:
+        tuple[int, dict | str]: Status code and the decoded JSON body, or
+        the raw text for non-JSON responses.
+    """
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data,
+                                 headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req) as response:
+            status, payload = response.status, response.read()
+            content_type = response.headers.get("Content-Type", "")
+    except urllib.error.HTTPError as e:
+        status, payload = e.code, e.read()
+        content_type = e.headers.get("Content-Type", "")
+    text = payload.decode()
+    return status, json.loads(text) if "json" in content_type else text
+
+
+def submit_and_wait(base, job_posting, poll=0.02) -> dict:
+    """
+    Submit a posting and poll until its letter is ready.
+
+    Args:
+        base (str): Base URL of the service.
+        job_posting (str): The posting.
+        poll (float): Seconds between polls.
+
+    Returns:
+        dict: "rejected" True if the queue was full, otherwise the job's
+        final status and the end-to-end seconds.
+    """
+    start = time.perf_counter()
+    status, job = request(f"{base}/letters",
+                          {"job_posting": job_posting, "use_cache": False})
+    if status == 503:
+        return {"rejected": True}
+    while True:
+        status, result = request(f"{base}/letters/{job['id']}/result")
+        if status == 200:
+            return {"rejected": False, "status": result["status"],
+                    "seconds": time.perf_counter() - start}
+        time.sleep(poll)
+
+
+def main():
+    """
+    Run the load test and print its results.
+    """
+    parser = argparse.ArgumentParser(
+        description="Load test the HTTP service against a local stub API.")
+    parser.add_argument("--jobs", type=int, default=40,
+                        help="postings submitted at once (default: 40)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="service generation workers (default: 4)")
+    parser.add_argument("--queue-size", type=int, default=8,
+                        help="service queue size (default: 8)")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="stub seconds per response (default: 0.05)")
+    args = parser.parse_args()
+
+    stub = start_stub_server(latency=args.latency)
+    configure(f"http://127.0.0.1:{stub.server_address[1]}/v1")
+    agent = CoverLetterAgent()
+    agent.agent.verbose = False
+    service = LetterService(agent, workers=args.workers,
+                            queue_size=args.queue_size)
+    service.start()
+    server = ServiceServer(("127.0.0.1", 0), service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(pool.map(lambda p: submit_and_wait(base, p),
+                                make_postings(args.jobs)))
+    wall = time.perf_counter() - start
+
+    accepted = [r for r in results if not r["rejected"]]
+    latencies = [r["seconds"] for r in accepted]
+    print(f"submitted   {len(results)}")
+    print(f"rejected    {len(results) - len(accepted)}")
+    print(f"failed      {sum(r['status'] != 'done' for r in accepted)}")
+    print(f"throughput  {len(accepted) / wall:.2f} letters/s")
+    if latencies:
+        print(f"latency_p50 {percentile(latencies, 50):.3f}s")
+        print(f"latency_p95 {percentile(latencies, 95):.3f}s")
+    print()
+    print(request(f"{base}/metrics")[1])
+
+    server.shutdown()
+    service.stop()
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
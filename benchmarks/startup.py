@@ -0,0 +1,110 @@
+"""
+Startup benchmark for the desktop app.
+
+Each run starts a fresh Python process that imports app.py, builds the main
+window and draws it once, then optionally generates a letter and records when
+the first token arrives. All times are measured from the start of the child
+process, so import costs are included.
+
+Usage (from the repository root):
+    python -m benchmarks.startup --runs 5 --posting posting.txt
+    python -m benchmarks.startup --max-window-seconds 1.5
+
+A display is needed to create the window. The run fails if the median
+time-to-first-window exceeds --max-window-seconds, so it can be used to
+catch startup regressions.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+CHILD_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app
+timings = {"import_app": time.perf_counter() - start}
+
+window = app.CoverGenWindow()
+window.update()
+timings["first_window"] = time.perf_counter() - start
+
+posting, api_base = sys.argv[1], sys.argv[2]
+if posting:
+    first_token = []
+    if api_base:
+        import agent_methods
+        agent_methods.load_api_config()["api_base"] = api_base
+    agent = app.get_agent()
+    timings["agent_ready"] = time.perf_counter() - start
+    handler = agent.stream_handler(
+        lambda token: first_token or first_token.append(time.perf_counter()))
+    app.generation_loop.submit(agent.agenerate_cover_letter(
+        posting, callbacks=[handler], use_cache=False)).result()
+    done = time.perf_counter()
+    timings["first_token"] = (first_token[0] if first_token else done) - start
+    timings["letter_done"] = done - start
+
+window.destroy()
+print(json.dumps(timings))
+"""
+
+
+def run_once(posting, api_base) -> dict:
+    """
+    Measure one cold start in a child process.
+
+    Args:
+        posting (str): Job posting to generate a letter for, or "" to only
+                       measure the window.
+        api_base (str): API base URL overriding api_config.json, or "".
+
+    Returns:
+        dict: Seconds from process start to each milestone.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, posting, api_base],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    """
+    Run the benchmark and print the median of each milestone.
+    """
+    parser = argparse.ArgumentParser(
+        description="Measure time-to-first-window and time-to-first-token.")
+    parser.add_argument("--runs", type=int, default=5,
+                        help="number of cold starts to measure (default: 5)")
+    parser.add_argument("--posting",
+                        help="text file with a job posting; also measures "
+                             "time-to-first-token")
+    parser.add_argument("--api-base", default="",
+                        help="override the API base, e.g. a local stub")
+    parser.add_argument("--max-window-seconds", type=float,
+                        help="fail if the median time-to-first-window is "
+                             "above this")
+    args = parser.parse_args()
+
+    posting = ""
+    if args.posting:
+        with open(args.posting, "r", encoding="utf-8") as posting_file:
+            posting = posting_file.read()
+
+    runs = [run_once(posting, args.api_base) for _ in range(args.runs)]
+    medians = {name: statistics.median(run[name] for run in runs)
+               for name in runs[0]}
+    for name, seconds in medians.items():
+        print(f"{name:<14}{seconds:>8.3f}s")
+
+    limit = args.max_window_seconds
+    if limit is not None and medians["first_window"] > limit:
+        sys.exit(f"time-to-first-window {medians['first_window']:.3f}s "
+                 f"exceeds {limit:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Local OpenAI-compatible stub of the chat completions API.
+
+The stub answers ReAct agent prompts with a fixed script: it calls a list of
+tools one per turn and then gives a canned cover letter as the final answer.
+Requests offering native tools get all the tool calls in one turn and then
+the letter. Prompts without ReAct instructions or tools (the prefetch mode)
+get the letter right away, once per requested choice (the n parameter).
+Responses are delayed by a configurable latency, and streamed responses send
+one word per chunk, so benchmarks can run without network access or API
+quota.
+
+Like providers with prompt caching, the stub reports the part of each prompt
+shared with a recent prompt as cached tokens (only for prompts of 1024
+tokens or more, in steps of 128 tokens), and a prefill latency per uncached
+prompt token can be set to see the effect on the time to the first token.
+
+Usage (from the repository root):
+    python -m benchmarks.stub_server --port 8099 --latency 0.5
+
+then point "api_base" in config/api_config.json (or --api-base of the other
+benchmarks) at http://127.0.0.1:8099/v1.
+"""
+import argparse
+import collections
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+DEFAULT_ACTIONS = ("get_skills", "get_work_history", "get_projects")
+
+CANNED_LETTER = (
+    "Dear Hiring Manager,\n\n"
+    "I am excited to apply for this position. Over the past five years I "
+    "have designed, built and operated data-heavy services in Python, and I "
+    "enjoy turning loosely defined requirements into reliable software that "
+    "people depend on every day.\n\n"
+    "In my most recent role I led the migration of a reporting pipeline to "
+    "an event-driven architecture, cutting processing time from hours to "
+    "minutes while keeping the team's on-call load low. I wrote the test "
+    "suites, the deployment tooling and the documentation that let new "
+    "engineers contribute within their first week. Before that I built "
+    "internal tools for analysts, working closely with them to understand "
+    "what they needed rather than what they first asked for.\n\n"
+    "My personal projects reflect the same interests. I maintain a small "
+    "open source library for scheduling background work, and I have built "
+    "several applications that combine language models with structured "
+    "data. These taught me to measure before optimising and to keep systems "
+    "simple enough to reason about.\n\n"
+    "Your posting emphasises ownership, collaboration and a steady focus on "
+    "users, which is exactly the environment where I do my best work. I "
+    "would welcome the chance to discuss how my experience can help your "
+    "team deliver its goals.\n\n"
+    "Kind regards,\nAlex Applicant"
+)
+
+REACT_MARKER = "Action Input:"
+
+CACHE_MIN_TOKENS = 1024
+
+CACHE_BLOCK_TOKENS = 128
+
+CACHED_PROMPTS = 64
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Serves POST /v1/chat/completions with canned responses.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):  # pylint: disable=C0103
+        """
+        Answer a chat completion request.
+        """
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        server = self.server
+        messages = request.get("messages", [])
+        prompt = "\n".join(str(m.get("content") or "") for m in messages)
+        cached = min(server.cached_tokens(
+            json.dumps(request.get("tools") or []) + prompt), len(prompt) // 4)
+        time.sleep(server.latency + server.prefill_latency *
+                   max(len(prompt) // 4 - cached, 0))
+        if random.random() < server.error_rate:
+            self._send_json(429, {"error": {"message": "Rate limited"}},
+                            {"retry-after-ms": "50"})
+            return
+
+        tool_calls = next_tool_calls(request, server.actions)
+        content = "" if tool_calls else next_turn(prompt, server.actions)
+        completion = len(content.split()) + 10 * len(tool_calls)
+        usage = {
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": completion,
+            "total_tokens": len(prompt) // 4 + completion,
+            "prompt_tokens_details": {"cached_tokens": cached}
+        }
+        model = request.get("model", "stub")
+        if request.get("stream"):
+            self._stream(model, content, tool_calls, usage,
+                         (request.get("stream_options") or {})
+                         .get("include_usage", False))
+        else:
+            message = {"role": "assistant", "content": content or None}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            self._send_json(200, {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": index,
+                    "message": message,
+                    "finish_reason": "tool_calls" if tool_calls else "stop"
+                } for index in range(request.get("n") or 1)],
+                "usage": usage
+            })
+
+    def _send_json(self, status, body, headers=None):
+        """
+        Send a complete JSON response.
+
+        Args:
+            status (int): HTTP status code.
+            body (dict): Response body.
+            headers (dict, optional): Extra response headers.
+        """
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, model, content, tool_calls, usage, include_usage):
+        """
+        Send a response as server-sent events, one word or tool call per
+        chunk.
+
+        Args:
+            model (str): Model name echoed back.
+            content (str): The full response text.
+            tool_calls (list[dict]): Tool calls of the response.
+            usage (dict): Token usage, sent in a final chunk if requested.
+            include_usage (bool): Whether the client asked for usage.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def chunk(choices, **extra):
+            return {"id": "chatcmpl-stub", "object": "chat.completion.chunk",
+                    "created": int(time.time()), "model": model,
+                    "choices": choices, **extra}
+
+        for word in re.findall(r"\S+\s*|\s+", content):
+            self._send_event(chunk([{"index": 0, "finish_reason": None,
+                                     "delta": {"role": "assistant",
+                                               "content": word}}]))
+            time.sleep(self.server.token_latency)
+        for index, call in enumerate(tool_calls):
+            self._send_event(chunk([{"index": 0, "finish_reason": None,
+                                     "delta": {"role": "assistant",
+                                               "tool_calls": [{
+                                                   "index": index, **call
+                                               }]}}]))
+        self._send_event(chunk([{
+            "index": 0, "delta": {},
+            "finish_reason": "tool_calls" if tool_calls else "stop"
+        }]))
+        if include_usage:
+            self._send_event(chunk([], usage=usage))
+        self._send_event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_event(self, data):
+        """
+        Send one server-sent event as an HTTP chunk.
+
+        Args:
+            data (dict | str): Event payload; dicts are sent as JSON.
+        """
+        if not isinstance(data, str):
+            data = json.dumps(data)
+        payload = f"data: {data}\n\n".encode()
+        self.wfile.write(f"{len(payload):x}\r\n".encode() + payload + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        """
+        Silence the per-request access log.
+        """
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server that ignores clients dropping their connections and
+    keeps the recent prompts for its emulated prompt cache.
+    """
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._prompts = collections.deque(maxlen=CACHED_PROMPTS)
+        self._prompts_lock = threading.Lock()
+
+    def cached_tokens(self, prompt) -> int:
+        """
+        Work out how much of a prompt a provider's prompt cache would serve,
+        from the longest prefix it shares with a recent prompt, and remember
+        the prompt.
+
+        Args:
+            prompt (str): The full prompt, tools first.
+
+        Returns:
+            int: Cached prompt tokens, estimated at four characters each.
+        """
+        with self._prompts_lock:
+            shared = max((len(os.path.commonprefix([prompt, p]))
+                          for p in self._prompts), default=0)
+            self._prompts.append(prompt)
+        if len(prompt) // 4 < CACHE_MIN_TOKENS:
+            return 0
+        return shared // 4 // CACHE_BLOCK_TOKENS * CACHE_BLOCK_TOKENS
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def next_tool_calls(request, actions=DEFAULT_ACTIONS) -> list[dict]:
+    """
+    Pick the scripted tool calls for a native tool calling request: every
+    offered tool of the script in the first turn, none once tool results
+    have been sent back.
+
+    Args:
+        request (dict): The chat completion request.
+        actions (Sequence[str]): Tools to call before answering.
+
+    Returns:
+        list[dict]: The tool calls, empty for the final answer.
+    """
+    offered = {tool.get("function", {}).get("name")
+               for tool in request.get("tools") or []}
+    if not offered or any(m.get("role") == "tool"
+                          for m in request.get("messages", [])):
+        return []
+    return [{"id": f"call_{i}", "type": "function",
+             "function": {"name": name, "arguments": "{}"}}
+            for i, name in enumerate(a for a in actions if a in offered)]
+
+
+def next_turn(prompt, actions=DEFAULT_ACTIONS) -> str:
+    """
+    Pick the scripted response to a prompt.
+
+    The number of tool calls already made is read from the agent's
+    scratchpad, which follows the question at the end of the ReAct prompt.
+
+    Args:
+        prompt (str): All message contents of the request.
+        actions (Sequence[str]): Tools to call before answering.
+
+    Returns:
+        str: A ReAct action, the ReAct final answer, or the bare letter for
+        prompts without ReAct instructions.
+    """
+    if REACT_MARKER not in prompt:
+        return CANNED_LETTER
+
+    scratchpad = prompt.rsplit("\nQuestion:", 1)[-1]
+    step = scratchpad.count(f"\n{REACT_MARKER}")
+    if step < len(actions):
+        return (f"Thought: I should look up the applicant's data.\n"
+                f"Action: {actions[step]}\nAction Input: none")
+    return f"Thought: I now know the final answer.\nFinal Answer: " \
+           f"{CANNED_LETTER}"
+
+
+def start_stub_server(host="127.0.0.1", port=0, latency=0.0,
+                      token_latency=0.0, actions=DEFAULT_ACTIONS,
+                      error_rate=0.0, prefill_latency=0.0) -> StubServer:
+    """
+    Start the stub server on a daemon thread.
+
+    Args:
+        host (str): Interface to listen on.
+        port (int): Port to listen on, 0 for any free port.
+        latency (float): Seconds to wait before answering each request.
+        token_latency (float): Seconds between streamed chunks.
+        actions (Sequence[str]): Tools the scripted agent calls.
+        error_rate (float): Fraction of requests answered with a 429.
+        prefill_latency (float): Extra seconds before answering per prompt
+                                 token not served from the emulated cache.
+
+    Returns:
+        StubServer: The running server. Its API base is
+        http://<host>:<server.server_address[1]>/v1; call shutdown() to stop
+        it.
+    """
+    server = StubServer((host, port), StubHandler)
+    server.latency = latency
+    server.token_latency = token_latency
+    server.actions = tuple(actions)
+    server.error_rate = error_rate
+    server.prefill_latency = prefill_latency
+    threading.Thread(target=server.serve_forever, name="stub-server",
+                     daemon=True).start()
+    return server
+
+
+def main():
+    """
+    Run the stub server until interrupted.
+    """
+    parser = argparse.ArgumentParser(
+        description="Serve canned chat completions for offline benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds before each response (default: 0)")
+    parser.add_argument("--token-latency", type=float, default=0.0,
+                        help="seconds between streamed chunks (default: 0)")
+    parser.add_argument("--actions", default=",".join(DEFAULT_ACTIONS),
+                        help="comma separated tools the agent calls before "
+                             "answering")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of requests rejected with a 429")
+    parser.add_argument("--prefill-latency", type=float, default=0.0,
+                        help="seconds per uncached prompt token (default: 0)")
+    args = parser.parse_args()
+
+    server = start_stub_server(args.host, args.port, args.latency,
+                               args.token_latency,
+                               [a for a in args.actions.split(",") if a],
+                               args.error_rate, args.prefill_latency)
+    print(f"Stub API base: http://{args.host}:{server.server_address[1]}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+LangChain callback handlers used to observe agent runs.
+"""
+import threading
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+def token_usage(response) -> tuple[int, int]:
+    """
+    Read the prompt and completion token counts of an LLM call.
+
+    Token counts are read from the message usage metadata when present,
+    falling back to the provider's token_usage in llm_output.
+
+    Args:
+        response (LLMResult): The result of the LLM call.
+
+    Returns:
+        tuple[int, int]: Prompt tokens and completion tokens.
+    """
+    message = getattr(response.generations[0][0], "message", None) \
+        if response.generations and response.generations[0] else None
+    usage_metadata = getattr(message, "usage_metadata", None)
+    if usage_metadata:
+        return (usage_metadata.get("input_tokens", 0),
+                usage_metadata.get("output_tokens", 0))
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+def cached_tokens(response) -> int:
+    """
+    Read how many prompt tokens of an LLM call the provider served from its
+    prompt cache.
+
+    Read from the message usage metadata when present, falling back to the
+    provider's prompt_tokens_details in llm_output. Providers without prompt
+    caching report none.
+
+    Args:
+        response (LLMResult): The result of the LLM call.
+
+    Returns:
+        int: Cached prompt tokens.
+    """
+    message = getattr(response.generations[0][0], "message", None) \
+        if response.generations and response.generations[0] else None
+    usage_metadata = getattr(message, "usage_metadata", None)
+    if usage_metadata:
+        details = usage_metadata.get("input_token_details") or {}
+        return details.get("cache_read") or 0
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    details = usage.get("prompt_tokens_details") or {}
+    return details.get("cached_tokens") or 0
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """
+    Counts LLM round trips and token usage across a generation, including
+    the prompt tokens the provider served from its prompt cache.
+    """
+    run_inline = True
+
+    def __init__(self):
+        """
+        Initialize all counters at zero.
+        """
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total_tokens(self) -> int:
+        """
+        int: Prompt and completion tokens combined.
+        """
+        return self.prompt_tokens + self.completion_tokens
+
+    def on_llm_end(self, response, **kwargs):
+        """
+        Record one finished LLM call and its token usage.
+
+        Args:
+            response (LLMResult): The result of the LLM call.
+            **kwargs: Unused callback arguments.
+        """
+        prompt, completion = token_usage(response)
+        cached = cached_tokens(response)
+        with self._lock:
+            self.llm_calls += 1
+            self.prompt_tokens += prompt
+            self.completion_tokens += completion
+            self.cached_tokens += cached
+
+    def summary(self) -> dict:
+        """
+        Return the counters as a dict.
+
+        Returns:
+            dict: LLM calls, prompt, completion and total tokens, and the
+            prompt tokens served from the provider's cache.
+        """
+        return {
+            "llm_calls": self.llm_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "cached_tokens": self.cached_tokens
+        }
+
+
+class FinalAnswerStreamHandler(BaseCallbackHandler):
+    """
+    Forwards the tokens of the final answer to a function as they stream in.
+
+    The ReAct agent's reasoning steps are skipped: tokens of an LLM call are
+    only forwarded once its output contains the answer prefix.
+    """
+    run_inline = True
+
+    def __init__(self, on_token, answer_prefix="Final Answer:"):
+        """
+        Initialize the handler.
+
+        Args:
+            on_token (Callable[[str], None]): Called with each answer token,
+                                              from the thread running the LLM.
+            answer_prefix (str | None): Text that starts the final answer,
+                                        or None to forward every token.
+        """
+        self.on_token = on_token
+        self.answer_prefix = answer_prefix
+        self._runs = {}
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        """
+        Buffer a token until the answer starts, then forward it.
+
+        Args:
+            token (str): The new token.
+            run_id (UUID): ID of the LLM call the token belongs to.
+            **kwargs: Unused callback arguments.
+        """
+        state = self._runs.setdefault(
+            run_id, {"text": "", "answering": self.answer_prefix is None,
+                     "started": False})
+        if not state["answering"]:
+            state["text"] += token
+            index = state["text"].find(self.answer_prefix)
+            if index < 0:
+                return
+            state["answering"] = True
+            token = state["text"][index + len(self.answer_prefix):]
+
+        if not state["started"]:
+            token = token.lstrip()
+            if not token:
+                return
+            state["started"] = True
+        self.on_token(token)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        """
+        Drop the buffered state of a finished LLM call.
+
+        Args:
+            response (LLMResult): The result of the LLM call.
+            run_id (UUID): ID of the LLM call.
+            **kwargs: Unused callback arguments.
+        """
+        self._runs.pop(run_id, None)
@@ -0,0 +1,160 @@
+"""
+Near-duplicate detection of job postings with MinHash and LSH.
+
+Recruiter feeds repost the same role with small edits such as another city,
+a new date or reordered bullets. Each posting is reduced to the set of
+three-word runs of its lines, so reordering lines changes nothing, and the
+set is summarised by a MinHash signature whose positions agree with
+probability equal to the Jaccard similarity of two sets. Signatures are
+split into bands and hashed into buckets (locality-sensitive hashing), so a
+new posting is only compared with the earlier postings it shares a bucket
+with.
+"""
+import re
+import threading
+import zlib
+import numpy as np
+
+
+DEFAULT_THRESHOLD = 0.8
+
+NUM_PERM = 128
+
+BANDS = 32
+
+SHINGLE_SIZE = 3
+
+PRIME = (1 << 31) - 1
+
+
+def shingles(text, size=SHINGLE_SIZE) -> set[str]:
+    """
+    Collect the runs of consecutive words within each line of a text.
+
+    Lines shorter than the run size count as one run.
+
+    Args:
+        text (str): The text.
+        size (int): Number of words per run.
+
+    Returns:
+        set[str]: The distinct runs, lower-cased and space separated.
+    """
+    runs = set()
+    for line in text.splitlines():
+        words = re.findall(r"\w+", line.lower())
+        if 0 < len(words) < size:
+            runs.add(" ".join(words))
+        for i in range(len(words) - size + 1):
+            runs.add(" ".join(words[i:i + size]))
+    return runs
+
+
+class NearDuplicateIndex:
+    """
+    Thread-safe LSH index of MinHash signatures, partitioned by namespace
+    so postings for different applicants never match.
+    """
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=NUM_PERM,
+                 bands=BANDS, seed=1):
+        """
+        Initialize an empty index.
+
+        Args:
+            threshold (float): Minimum estimated Jaccard similarity for two
+                               postings to count as near-duplicates.
+            num_perm (int): Signature length; more is more accurate.
+            bands (int): LSH bands; must divide num_perm. More bands find
+                         less similar candidates at the cost of more
+                         comparisons.
+            seed (int): Seed of the hash permutations.
+        """
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, PRIME, num_perm, dtype=np.uint64)
+        self._signatures = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def signature(self, text) -> np.ndarray:
+        """
+        Compute the MinHash signature of a text.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            np.ndarray: num_perm minimum hash values.
+        """
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles(text)),
+            dtype=np.uint64)
+        if not hashes.size:
+            return np.full(self._a.size, PRIME, dtype=np.uint64)
+        hashes %= PRIME
+        return ((np.outer(hashes, self._a) + self._b) % PRIME).min(axis=0)
+
+    def _bands(self, signature, namespace):
+        """
+        Yield the bucket keys of a signature.
+
+        Args:
+            signature (np.ndarray): The signature.
+            namespace (str | None): Partition of the index.
+
+        Yields:
+            tuple: One key per band.
+        """
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            yield namespace, band, rows.tobytes()
+
+    def add(self, key, text, namespace=None, signature=None):
+        """
+        Index a text.
+
+        Args:
+            key (Hashable): Identifier returned by query() on a match.
+            text (str): The text.
+            namespace (str, optional): Partition of the index.
+            signature (np.ndarray, optional): Precomputed signature.
+        """
+        if signature is None:
+            signature = self.signature(text)
+        with self._lock:
+            self._signatures[key] = signature
+            for bucket in self._bands(signature, namespace):
+                self._buckets.setdefault(bucket, []).append(key)
+
+    def query(self, text, namespace=None, signature=None
+              ) -> tuple[object, float]:
+        """
+        Find the most similar indexed text above the threshold.
+
+        Args:
+            text (str): The text.
+            namespace (str, optional): Partition of the index.
+            signature (np.ndarray, optional): Precomputed signature.
+
+        Returns:
+            tuple[Hashable | None, float]: The key of the best match and its
+            estimated Jaccard similarity, or (None, 0.0).
+        """
+        if signature is None:
+            signature = self.signature(text)
+        with self._lock:
+            candidates = {key for bucket in self._bands(signature, namespace)
+                          for key in self._buckets.get(bucket, ())}
+            best, similarity = None, 0.0
+            for key in candidates:
+                estimate = float(np.mean(self._signatures[key] == signature))
+                if estimate > similarity:
+                    best, similarity = key, estimate
+        if similarity < self.threshold:
+            return None, 0.0
+        return best, similarity
@@ -0,0 +1,272 @@
+"""
+Process-wide HTTP connection pool shared by every LLM client.
+
+All endpoint clients send their requests through one httpx client (and one
+async client) with keep-alive connections, so consecutive agent steps reuse
+an open TLS connection instead of paying for a new handshake. Pool size,
+timeouts and HTTP/2 are set under "http" in the API config, and every
+request is counted so connection reuse can be measured.
+"""
+import importlib.util
+import json
+import logging
+import threading
+import time
+import httpx
+
+
+DEFAULT_HTTP = {
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 60.0,
+    "connect_timeout": 10.0,
+    "read_timeout": 120.0,
+    "write_timeout": 30.0,
+    "pool_timeout": 30.0,
+    "http2": False
+}
+
+DONE_EVENT = b"data: [DONE]"
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+_logger = logging.getLogger(__name__)
+
+
+class ConnectionMetrics:
+    """
+    Thread-safe counts of requests and newly opened connections, collected
+    through httpcore's trace extension.
+    """
+    def __init__(self):
+        """
+        Initialize empty counters.
+        """
+        self.requests = 0
+        self.connections = 0
+        self.connect_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def on_request(self, request):
+        """
+        httpx request hook that counts the request and traces its connection
+        setup.
+
+        Args:
+            request (httpx.Request): The outgoing request.
+        """
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._tracer()
+
+    async def aon_request(self, request):
+        """
+        Async counterpart of on_request for the async client.
+
+        Args:
+            request (httpx.Request): The outgoing request.
+        """
+        with self._lock:
+            self.requests += 1
+        trace = self._tracer()
+
+        async def atrace(event, info):
+            trace(event, info)
+        request.extensions["trace"] = atrace
+
+    def _tracer(self):
+        """
+        Build a trace callback for one request that records the time spent
+        opening a new connection, including the TLS handshake.
+
+        Returns:
+            Callable[[str, dict], None]: The trace callback.
+        """
+        started = {}
+
+        def trace(event, _info):
+            step, _, state = event.rpartition(".")
+            if step not in ("connection.connect_tcp", "connection.start_tls"):
+                return
+            if state == "started":
+                started[step] = time.perf_counter()
+            elif state == "complete" and step in started:
+                with self._lock:
+                    self.connections += step == "connection.connect_tcp"
+                    self.connect_seconds += \
+                        time.perf_counter() - started.pop(step)
+        return trace
+
+    def stats(self) -> dict:
+        """
+        Summarise connection reuse.
+
+        Returns:
+            dict: Requests sent, connections opened, requests that reused an
+            open connection, the reuse ratio and total connection setup
+            seconds.
+        """
+        with self._lock:
+            reused = max(self.requests - self.connections, 0)
+            return {
+                "requests": self.requests,
+                "connections": self.connections,
+                "reused": reused,
+                "reuse_ratio": round(reused / self.requests, 3)
+                if self.requests else 0.0,
+                "connect_seconds": round(self.connect_seconds, 4)
+            }
+
+
+connection_metrics = ConnectionMetrics()
+
+
+class _DrainingStream(httpx.SyncByteStream):
+    """
+    Response body that reads the rest of a finished event stream when it is
+    closed, so its connection goes back to the pool.
+
+    The OpenAI client closes a streamed response as soon as it sees the
+    [DONE] event, before the end of the HTTP body is read, which makes
+    httpcore drop the connection. A stream closed before [DONE] (e.g. a
+    cancelled generation) is closed straight away.
+    """
+    def __init__(self, stream):
+        self._stream = stream
+        self._chunks = None
+        self._done = False
+
+    def __iter__(self):
+        self._chunks = iter(self._stream)
+        for chunk in self._chunks:
+            self._done = DONE_EVENT in chunk
+            yield chunk
+
+    def close(self):
+        if self._done and self._chunks is not None:
+            try:
+                for _ in self._chunks:
+                    pass
+            except httpx.HTTPError:
+                pass
+        self._stream.close()
+
+
+class _AsyncDrainingStream(httpx.AsyncByteStream):
+    """
+    Async counterpart of _DrainingStream.
+    """
+    def __init__(self, stream):
+        self._stream = stream
+        self._chunks = None
+        self._done = False
+
+    async def __aiter__(self):
+        self._chunks = aiter(self._stream)
+        async for chunk in self._chunks:
+            self._done = DONE_EVENT in chunk
+            yield chunk
+
+    async def aclose(self):
+        if self._done and self._chunks is not None:
+            try:
+                async for _ in self._chunks:
+                    pass
+            except httpx.HTTPError:
+                pass
+        await self._stream.aclose()
+
+
+class KeepAliveTransport(httpx.HTTPTransport):
+    """
+    HTTP transport that keeps connections of finished event streams alive.
+    """
+    def handle_request(self, request):
+        response = super().handle_request(request)
+        response.stream = _DrainingStream(response.stream)
+        return response
+
+
+class AsyncKeepAliveTransport(httpx.AsyncHTTPTransport):
+    """
+    Async counterpart of KeepAliveTransport.
+    """
+    async def handle_async_request(self, request):
+        response = await super().handle_async_request(request)
+        response.stream = _AsyncDrainingStream(response.stream)
+        return response
+
+
+def http_settings(api_config) -> dict:
+    """
+    Read the "http" section of the API config over the defaults. HTTP/2 is
+    turned off with a warning if the h2 package is not installed.
+
+    Args:
+        api_config (dict): The loaded api_config.json.
+
+    Returns:
+        dict: The complete HTTP settings.
+    """
+    settings = {**DEFAULT_HTTP, **api_config.get("http", {})}
+    if settings["http2"] and importlib.util.find_spec("h2") is None:
+        _logger.warning("HTTP/2 needs the h2 package (pip install "
+                        "'httpx[http2]'); using HTTP/1.1")
+        settings["http2"] = False
+    return settings
+
+
+def request_timeout(api_config) -> httpx.Timeout:
+    """
+    Build the request timeout from the "http" section of the API config.
+
+    Args:
+        api_config (dict): The loaded api_config.json.
+
+    Returns:
+        httpx.Timeout: The timeout.
+    """
+    settings = http_settings(api_config)
+    return httpx.Timeout(connect=settings["connect_timeout"],
+                         read=settings["read_timeout"],
+                         write=settings["write_timeout"],
+                         pool=settings["pool_timeout"])
+
+
+def get_http_clients(api_config) -> tuple[httpx.Client, httpx.AsyncClient]:
+    """
+    Return the process-wide sync and async HTTP clients for the API
+    config's pool settings, creating them on first use.
+
+    Args:
+        api_config (dict): The loaded api_config.json.
+
+    Returns:
+        tuple[httpx.Client, httpx.AsyncClient]: The shared clients.
+    """
+    settings = http_settings(api_config)
+    key = json.dumps(settings, sort_keys=True)
+    with _clients_lock:
+        if key not in _clients:
+            pool = {
+                "limits": httpx.Limits(
+                    max_connections=settings["max_connections"],
+                    max_keepalive_connections=settings[
+                        "max_keepalive_connections"],
+                    keepalive_expiry=settings["keepalive_expiry"]),
+                "http2": settings["http2"]
+            }
+            options = {"timeout": request_timeout(api_config),
+                       "follow_redirects": True}
+            _clients[key] = (
+                httpx.Client(
+                    transport=KeepAliveTransport(**pool),
+                    event_hooks={"request": [connection_metrics.on_request]},
+                    **options),
+                httpx.AsyncClient(
+                    transport=AsyncKeepAliveTransport(**pool),
+                    event_hooks={"request": [connection_metrics.aon_request]},
+                    **options)
+            )
+        return _clients[key]
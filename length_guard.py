@@ -0,0 +1,224 @@
+"""
+Enforcement of the letter's word limit.
+
+The system prompt asks for a letter of at most a number of words, but only
+max_tokens bounds what the model writes. While a letter streams in, its
+words are counted and the stream is closed as soon as the letter runs past
+the limit, so no tokens are paid for text that would be cut anyway. Letters
+over the limit are then trimmed locally to the last full paragraph or
+sentence within it, keeping their sign-off, so an overrun never costs a
+second call. A stopped letter never got its sign-off; it is cut short
+enough to leave room for one.
+
+The limit of a generation is held in a context variable, set by the agent
+for the duration of a generation and read by the chat model's stream.
+"""
+import re
+from contextvars import ContextVar
+
+
+CLOSING_WORDS = 8
+
+SENTENCE_END = re.compile(r"[.!?][\"'”’)\]]*(?=\s|$)")
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+answer_limit = ContextVar("answer_limit", default=None)
+
+
+class AnswerLimit:
+    """
+    The word limit of the letter written by the current generation, and
+    whether the stream guard stopped the letter.
+    """
+    def __init__(self, limit, answer_prefix=None):
+        """
+        Initialize the limit.
+
+        Args:
+            limit (int): Maximum number of words of the letter.
+            answer_prefix (str | None): Text that starts the letter in the
+                                        model's output, such as the ReAct
+                                        "Final Answer:", or None if the
+                                        whole output is the letter.
+        """
+        self.limit = limit
+        self.answer_prefix = answer_prefix
+        self.stopped = False
+
+
+class WordCounter:
+    """
+    Counts the words of a letter as its text arrives in pieces, ignoring the
+    text before the answer prefix.
+    """
+    def __init__(self, answer_prefix=None):
+        """
+        Initialize the counter at zero words.
+
+        Args:
+            answer_prefix (str | None): Text that starts the letter, or None
+                                        to count every word.
+        """
+        self.answer_prefix = answer_prefix
+        self.words = 0
+        self._answering = answer_prefix is None
+        self._buffer = ""
+        self._in_word = False
+
+    def feed(self, text) -> int:
+        """
+        Count the words of the next piece of text.
+
+        A word split across pieces is counted once, so the count always
+        equals len(letter.split()) for the text received so far.
+
+        Args:
+            text (str): The next piece of the model's output.
+
+        Returns:
+            int: Words of the letter so far.
+        """
+        if not self._answering:
+            self._buffer += text
+            index = self._buffer.find(self.answer_prefix)
+            if index < 0:
+                return 0
+            self._answering = True
+            text = self._buffer[index + len(self.answer_prefix):]
+            self._buffer = ""
+        for char in text:
+            if char.isspace():
+                self._in_word = False
+            elif not self._in_word:
+                self._in_word = True
+                self.words += 1
+        return self.words
+
+
+def limit_words(chunks, limit):
+    """
+    Pass on the chunks of a streamed response until the letter in it runs
+    past the word limit, then close the stream and mark the limit stopped.
+
+    Args:
+        chunks (Iterator[ChatGenerationChunk]): The response's chunks.
+        limit (AnswerLimit | None): The limit, or None to pass on every
+                                    chunk.
+
+    Yields:
+        ChatGenerationChunk: The chunks up to and including the one that
+        started the first word over the limit.
+    """
+    counter = WordCounter(limit.answer_prefix) if limit else None
+    try:
+        for chunk in chunks:
+            yield chunk
+            if counter and counter.feed(chunk.text) > limit.limit:
+                limit.stopped = True
+                return
+    finally:
+        chunks.close()
+
+
+async def alimit_words(chunks, limit):
+    """
+    Async counterpart of limit_words.
+
+    Args:
+        chunks (AsyncIterator[ChatGenerationChunk]): The response's chunks.
+        limit (AnswerLimit | None): The limit, or None to pass on every
+                                    chunk.
+
+    Yields:
+        ChatGenerationChunk: The chunks up to and including the one that
+        started the first word over the limit.
+    """
+    counter = WordCounter(limit.answer_prefix) if limit else None
+    try:
+        async for chunk in chunks:
+            yield chunk
+            if counter and counter.feed(chunk.text) > limit.limit:
+                limit.stopped = True
+                return
+    finally:
+        await chunks.aclose()
+
+
+def split_closing(text) -> tuple[str, str, str]:
+    """
+    Split the sign-off off a letter: its last few lines, at most
+    CLOSING_WORDS words, starting with a line that ends in a comma, such as
+    "Kind regards,\nAlex".
+
+    Args:
+        text (str): The letter.
+
+    Returns:
+        tuple[str, str, str]: The body, the line breaks before the sign-off
+        and the sign-off, which is empty if the letter has none.
+    """
+    lines = text.splitlines()
+    start = None
+    for index in range(len(lines) - 1, 0, -1):
+        if len(" ".join(lines[index:]).split()) > CLOSING_WORDS:
+            break
+        if lines[index].rstrip().endswith(","):
+            start = index
+    if start is None:
+        return text, "", ""
+    body = "\n".join(lines[:start]).rstrip()
+    if not body:
+        return text, "", ""
+    breaks = "\n" * (len(lines[:start]) - len(body.splitlines()) + 1)
+    return body, breaks, "\n".join(lines[start:]).strip()
+
+
+def trim_to_limit(text, limit, stopped=False) -> str:
+    """
+    Cut a letter over the word limit back to its last full paragraph or
+    sentence within the limit, keeping its sign-off.
+
+    A letter the stream guard stopped ends mid-sentence and has no
+    sign-off; its unfinished sentence is dropped and CLOSING_WORDS words of
+    the limit are left free for a sign-off.
+
+    Args:
+        text (str): The letter.
+        limit (int): Maximum number of words.
+        stopped (bool): Whether the stream guard stopped the letter.
+
+    Returns:
+        str: The letter, unchanged if it is within the limit and was not
+        stopped.
+    """
+    text = text.strip()
+    words = len(text.split())
+    if words <= limit and not stopped:
+        return text
+
+    if stopped:
+        body, breaks, closing = text, "", ""
+        budget = limit - CLOSING_WORDS
+        if not any(m.end() == len(text) for m in SENTENCE_END.finditer(text)):
+            budget = min(budget, words - 1)
+    else:
+        body, breaks, closing = split_closing(text)
+        budget = limit - len(closing.split())
+
+    kept, words = [], 0
+    for paragraph in PARAGRAPH_BREAK.split(body):
+        size = len(paragraph.split())
+        if words + size <= budget:
+            kept.append(paragraph)
+            words += size
+            continue
+        ends = [m.end() for m in SENTENCE_END.finditer(paragraph)
+                if words + len(paragraph[:m.end()].split()) <= budget]
+        if ends:
+            kept.append(paragraph[:ends[-1]])
+        break
+
+    if not kept:
+        kept = [" ".join(body.split()[:budget])]
+    return "\n\n".join(kept) + breaks + closing
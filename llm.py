@@ -0,0 +1,225 @@
+"""
+Construction of the chat model used by CoverLetterAgent.
+"""
+import functools
+from types import SimpleNamespace
+from typing import Any
+from pydantic import Field
+from langchain_openai import ChatOpenAI
+from length_guard import alimit_words, answer_limit, limit_words
+from provider_pool import get_pool
+from http_client import get_http_clients, request_timeout
+
+
+class PooledChatOpenAI(ChatOpenAI):
+    """
+    ChatOpenAI that sends every request through a shared ProviderPool, so
+    each call made by the agent is queued against an endpoint's quota, routed
+    to the fastest healthy endpoint and failed over on rate limit and server
+    errors instead of failing. Streamed responses are closed once the letter
+    in them runs past the word limit of the current generation, if one is
+    set.
+    """
+    pool: Any = Field(default=None, exclude=True)
+
+    # pylint: disable=W0212
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.streaming and kwargs.get("stream") is not False:
+            # ChatOpenAI delegates to _stream, which is already pooled.
+            return super()._generate(messages, stop=stop,
+                                     run_manager=run_manager, **kwargs)
+        return self.pool.call(
+            lambda endpoint: endpoint.llm._generate(
+                messages, stop=stop, run_manager=run_manager, **kwargs),
+            retry_callback=_retry_reporter(run_manager))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        chunks = self.pool.stream(
+            lambda endpoint: _open_stream(endpoint.llm, messages, stop,
+                                          run_manager, **kwargs),
+            retry_callback=_retry_reporter(run_manager))
+        yield from limit_words(chunks, answer_limit.get())
+
+    async def _agenerate(self, messages, stop=None, run_manager=None,
+                         **kwargs):
+        if self.streaming and kwargs.get("stream") is not False:
+            return await super()._agenerate(messages, stop=stop,
+                                            run_manager=run_manager, **kwargs)
+        return await self.pool.acall(
+            lambda endpoint: endpoint.llm._agenerate(
+                messages, stop=stop, run_manager=run_manager, **kwargs),
+            retry_callback=_retry_reporter(run_manager))
+
+    async def _astream(self, messages, stop=None, run_manager=None,
+                       **kwargs):
+        chunks = self.pool.astream(
+            lambda endpoint: _aopen_stream(endpoint.llm, messages, stop,
+                                           run_manager, **kwargs),
+            retry_callback=_retry_reporter(run_manager))
+        limited = alimit_words(chunks, answer_limit.get())
+        try:
+            async for chunk in limited:
+                yield chunk
+        finally:
+            await limited.aclose()
+    # pylint: enable=W0212
+
+
+def _open_stream(llm, messages, stop, run_manager, **kwargs):
+    """
+    Start a streaming request and wait for its first chunk, so errors raised
+    when the request is sent reach the pool and can be retried. Errors after
+    the first chunk are not retried.
+
+    Args:
+        llm (ChatOpenAI): Client of the endpoint to send the request to.
+        messages (list[BaseMessage]): The prompt.
+        stop (list[str] | None): Stop sequences.
+        run_manager (CallbackManagerForLLMRun | None): The run's manager.
+        **kwargs: Further request parameters.
+
+    Returns:
+        Iterator[ChatGenerationChunk]: All chunks of the response.
+    """
+    chunks = llm._stream(messages, stop=stop,  # pylint: disable=W0212
+                         run_manager=run_manager, **kwargs)
+    return _chain(next(chunks, None), chunks)
+
+
+async def _aopen_stream(llm, messages, stop, run_manager, **kwargs):
+    """
+    Async counterpart of _open_stream.
+
+    Returns:
+        AsyncIterator[ChatGenerationChunk]: All chunks of the response.
+    """
+    chunks = llm._astream(messages, stop=stop,  # pylint: disable=W0212
+                          run_manager=run_manager, **kwargs)
+    try:
+        first = await anext(chunks)
+    except StopAsyncIteration:
+        first = None
+    return _prepend(first, chunks)
+
+
+def _retry_reporter(run_manager):
+    """
+    Build a provider pool retry callback that reports retries to the LLM run's
+    callback handlers through on_retry.
+
+    Args:
+        run_manager (CallbackManagerForLLMRun | None): The run's manager.
+
+    Returns:
+        Callable[[int, Exception], Any] | None: The callback, or None if the
+        run has no manager.
+    """
+    if run_manager is None:
+        return None
+    return lambda attempt, error: run_manager.on_retry(
+        SimpleNamespace(attempt_number=attempt, error=error))
+
+
+def _chain(first, chunks):
+    """
+    Yield an already received chunk followed by the rest of a stream, closing
+    the stream (and its HTTP response) when iteration stops early.
+
+    Args:
+        first (ChatGenerationChunk | None): The first chunk, if any.
+        chunks (Iterator[ChatGenerationChunk]): The remaining chunks.
+
+    Yields:
+        ChatGenerationChunk: Every chunk of the response.
+    """
+    try:
+        if first is not None:
+            yield first
+            yield from chunks
+    finally:
+        chunks.close()
+
+
+async def _prepend(first, chunks):
+    """
+    Yield an already received chunk followed by the rest of a stream, closing
+    the stream (and its HTTP response) when iteration stops early.
+
+    Args:
+        first (ChatGenerationChunk | None): The first chunk, if any.
+        chunks (AsyncIterator[ChatGenerationChunk]): The remaining chunks.
+
+    Yields:
+        ChatGenerationChunk: Every chunk of the response.
+    """
+    try:
+        if first is not None:
+            yield first
+            async for chunk in chunks:
+                yield chunk
+    finally:
+        await chunks.aclose()
+
+
+def build_client(api_config, endpoint, api_key) -> ChatOpenAI:
+    """
+    Build the client of one endpoint of the provider pool.
+
+    Retries are disabled on the underlying OpenAI client because the pool
+    handles them. Every endpoint shares the process-wide HTTP connection
+    pool.
+
+    Args:
+        api_config (dict): The loaded api_config.json.
+        endpoint (dict): The endpoint's config.
+        api_key (str | None): The endpoint's API key.
+
+    Returns:
+        ChatOpenAI: The endpoint's client.
+    """
+    http_client, http_async_client = get_http_clients(api_config)
+    return ChatOpenAI(
+        model_name=endpoint["model"],
+        temperature=api_config.get("temperature", 0.7),
+        max_tokens=api_config.get("max_tokens", 500),
+        openai_api_base=endpoint["api_base"],
+        openai_api_key=api_key,
+        max_retries=0,
+        stream_usage=True,
+        request_timeout=request_timeout(api_config),
+        http_client=http_client,
+        http_async_client=http_async_client
+    )
+
+
+def build_llm(api_config) -> ChatOpenAI:
+    """
+    Build the chat model described by the API config.
+
+    Requests are routed across the endpoints of the config's provider pool.
+    With streaming enabled, tokens are reported to the on_llm_new_token
+    callbacks as they arrive.
+
+    Args:
+        api_config (dict): The loaded api_config.json.
+
+    Returns:
+        ChatOpenAI: The pooled chat model.
+    """
+    pool = get_pool(api_config, functools.partial(build_client, api_config))
+    primary = pool.endpoints[0].llm
+    # Requests go through the endpoints' clients; sharing their HTTP pool
+    # keeps this model from opening one of its own.
+    return PooledChatOpenAI(
+        model_name=api_config["model"],
+        temperature=api_config.get("temperature", 0.7),
+        max_tokens=api_config.get("max_tokens", 500),
+        openai_api_base=primary.openai_api_base,
+        openai_api_key=primary.openai_api_key,
+        max_retries=0,
+        streaming=api_config.get("streaming", False),
+        stream_usage=True,
+        http_client=primary.http_client,
+        http_async_client=primary.http_async_client,
+        pool=pool
+    )
@@ -0,0 +1,165 @@
+"""
+Compact serialisation of the applicant data returned by the tools.
+
+The ReAct agent writes every tool result into its scratchpad, which is sent
+again with each later step, so every token of an observation is paid once
+per remaining step. Python's repr of the data files spends many of them on
+quotes, braces and None values. The compact format drops null fields,
+writes the entries of a file as a table whose field names appear once in a
+header, flattens nested dicts into dotted field names and shortens long
+field values to a configurable length:
+
+    name | Company | Duration
+    Acme | Acme Ltd | 2019-2023
+    Initech | Initech Inc | 2017-2019
+
+Entries without any fields, such as skills and hobbies, become one comma
+separated line.
+"""
+
+
+DEFAULT_OBSERVATIONS = {
+    "compact": True,
+    "max_chars": {}
+}
+
+SEPARATOR = " | "
+
+ELLIPSIS = "…"
+
+
+def flatten(entry, prefix="") -> dict:
+    """
+    Flatten nested dicts into one level with dotted keys, dropping null and
+    empty fields.
+
+    Args:
+        entry (dict): The entry's fields.
+        prefix (str): Key prefix of the nesting level.
+
+    Returns:
+        dict: The non-empty fields by dotted name.
+    """
+    fields = {}
+    for key, value in entry.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            fields.update(flatten(value, f"{name}."))
+        elif isinstance(value, list):
+            if value:
+                fields[name] = ", ".join(str(v) for v in value)
+        elif value is not None and value != "":
+            fields[name] = value
+    return fields
+
+
+def clean(value, max_chars=None) -> str:
+    """
+    Put a value on one line without the table separator and shorten it.
+
+    Args:
+        value (Any): The value.
+        max_chars (int, optional): Maximum length; longer values are cut at
+                                   a word boundary and end in an ellipsis.
+
+    Returns:
+        str: The cleaned value.
+    """
+    text = " ".join(str(value).split()).replace("|", "/")
+    if max_chars and len(text) > max_chars:
+        cut = text[:max_chars].rsplit(" ", 1)[0] or text[:max_chars]
+        text = cut.rstrip(",;:") + ELLIPSIS
+    return text
+
+
+def compact(data, max_chars=None) -> str:
+    """
+    Serialise a data file, or a tool message, in the compact format.
+
+    Args:
+        data (dict | str): Entries by name, or a message such as "No
+                           information available".
+        max_chars (dict[str, int], optional): Maximum length of the values
+                                              of each field, by field name.
+
+    Returns:
+        str: The compact text.
+    """
+    if not isinstance(data, dict):
+        return str(data)
+    max_chars = max_chars or {}
+
+    names, values, records = [], [], {}
+    for name, entry in data.items():
+        if isinstance(entry, dict):
+            fields = flatten(entry)
+            if fields:
+                records[clean(name)] = fields
+            else:
+                names.append(clean(name))
+        elif entry is None or entry == "":
+            names.append(clean(name))
+        else:
+            values.append(f"{clean(name)}: "
+                          f"{clean(entry, max_chars.get(name))}")
+
+    lines = []
+    if records:
+        columns = list(dict.fromkeys(
+            key for fields in records.values() for key in fields))
+        lines.append(SEPARATOR.join(["name", *columns]))
+        for name, fields in records.items():
+            lines.append(SEPARATOR.join(
+                [name, *(clean(fields[c], max_chars.get(c))
+                         if c in fields else "" for c in columns)]))
+    lines.extend(values)
+    if names:
+        lines.append(", ".join(names))
+    return "\n".join(lines)
+
+
+def compact_groups(groups, max_chars=None) -> str:
+    """
+    Serialise entries grouped by data file, as returned by the search tool,
+    one headed compact section per file.
+
+    Args:
+        groups (dict[str, dict] | str): Entries by data file name, or a
+                                        message.
+        max_chars (dict[str, int], optional): Maximum length of the values
+                                              of each field, by field name.
+
+    Returns:
+        str: The compact text.
+    """
+    if not isinstance(groups, dict):
+        return str(groups)
+    return "\n\n".join(f"{name}:\n{compact(entries, max_chars)}"
+                       for name, entries in groups.items())
+
+
+def observation_format(settings=None):
+    """
+    Build the function that turns a data tool's result into its
+    observation, from the "observations" section of the API config.
+
+    Args:
+        settings (dict, optional): The "observations" settings.
+
+    Returns:
+        Callable[[dict | str, bool], dict | str]: Takes the result and
+        whether its entries are grouped by data file, and returns the
+        compact text, or the result unchanged if compact observations are
+        disabled.
+    """
+    settings = {**DEFAULT_OBSERVATIONS, **(settings or {})}
+    max_chars = settings["max_chars"]
+
+    def observe(data, grouped=False):
+        if not settings["compact"]:
+            return data
+        if grouped:
+            return compact_groups(data, max_chars)
+        return compact(data, max_chars)
+
+    return observe
@@ -0,0 +1,165 @@
+"""
+Background persistence of applicant data edits.
+
+The GUI hands every edited data dict to the writer instead of writing the
+file itself. Edits to the same file within a short delay are coalesced into
+one write, writes happen on a background thread so the UI never waits on
+disk, and each file is replaced atomically through a temporary file so a
+crash mid-write cannot leave it truncated.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from applicant_data import data_cache
+
+
+_logger = logging.getLogger(__name__)
+
+
+class DebouncedWriter:
+    """
+    Coalesces saves of applicant data files and writes them atomically on a
+    background thread.
+    """
+    def __init__(self, cache=data_cache, delay=0.5):
+        """
+        Initialize the writer. Its thread starts on the first save.
+
+        Args:
+            cache (ApplicantDataCache): Cache whose files are written and
+                                        which is told about every edit.
+            delay (float): Seconds to wait for further edits to a file
+                           before writing it.
+        """
+        self.cache = cache
+        self.delay = delay
+        self._pending = {}
+        self._seq = {}
+        self._written = {}
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = None
+
+    def schedule(self, name, data):
+        """
+        Queue a data file to be written with the given contents.
+
+        A snapshot of the data is taken immediately, so the caller may keep
+        editing the dict. The cache is told about the edit right away so the
+        tools see it before it reaches disk.
+
+        Args:
+            name (str): Name of the data file without extension.
+            data (dict): The file's full data dict.
+        """
+        snapshot = copy.deepcopy(data)
+        self.cache.edited(name)
+        with self._cond:
+            self._seq[name] = self._seq.get(name, 0) + 1
+            self._pending[name] = (snapshot, self._seq[name],
+                                   time.monotonic() + self.delay)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name="data-writer",
+                                                daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def flush(self):
+        """
+        Write every pending file now and wait for writes in progress, used
+        on shutdown. A failed write is logged and the other files are still
+        written.
+        """
+        with self._cond:
+            pending = list(self._pending.items())
+            self._pending.clear()
+        for name, (snapshot, seq, _) in pending:
+            self._write_logged(name, snapshot, seq)
+        with self._cond:
+            while self._in_flight:
+                self._cond.wait()
+
+    def _run(self):
+        """
+        Write files once their delay has passed, forever. A failed write is
+        logged and the thread carries on with the next one.
+        """
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                now = time.monotonic()
+                due = [n for n, p in self._pending.items() if p[2] <= now]
+                if not due:
+                    next_due = min(p[2] for p in self._pending.values())
+                    self._cond.wait(next_due - now)
+                    continue
+                writes = [(n, *self._pending.pop(n)[:2]) for n in due]
+                self._in_flight += len(writes)
+            for name, snapshot, seq in writes:
+                try:
+                    self._write_logged(name, snapshot, seq)
+                finally:
+                    with self._cond:
+                        self._in_flight -= 1
+                        self._cond.notify_all()
+
+    def _write_logged(self, name, snapshot, seq):
+        """
+        Write a snapshot like _write, logging any error instead of raising
+        it.
+
+        Args:
+            name (str): Name of the data file without extension.
+            snapshot (dict): The data to write.
+            seq (int): Sequence number of the snapshot.
+        """
+        try:
+            self._write(name, snapshot, seq)
+        except Exception:  # pylint: disable=W0718
+            _logger.exception("Error saving %s", name)
+
+    def _write(self, name, snapshot, seq):
+        """
+        Atomically replace a data file with a snapshot, unless a newer
+        snapshot of the same file was already written.
+
+        Args:
+            name (str): Name of the data file without extension.
+            snapshot (dict): The data to write.
+            seq (int): Sequence number of the snapshot.
+        """
+        with self._write_lock:
+            if self._written.get(name, 0) >= seq:
+                return
+
+            path = self.cache.path(name)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                            suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as tmp_file:
+                    json.dump(snapshot, tmp_file, ensure_ascii=False,
+                              indent=4)
+                    tmp_file.flush()
+                    os.fsync(tmp_file.fileno())
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self._written[name] = seq
+
+            with self._cond:
+                latest = self._seq.get(name) == seq
+            if latest:
+                self.cache.saved(name)
+
+
+data_writer = DebouncedWriter()
+atexit.register(data_writer.flush)
@@ -0,0 +1,223 @@
+"""
+Local clean-up of pasted job postings before they reach the prompt.
+
+Postings copied from job boards carry benefits blurbs, equal opportunity
+statements, navigation text and repeated headers. The preprocessor splits a
+posting into sections by their headings, drops boilerplate sections and
+lines and duplicate lines, and, if the posting is still over the token
+budget, drops the least relevant lines first so the requirements and
+responsibilities are kept.
+"""
+import functools
+import logging
+import re
+
+
+DEFAULT_ENCODING = "cl100k_base"
+
+KEY_SECTION = re.compile(
+    r"requirement|qualification|responsibilit|what you.ll (do|bring|need)|"
+    r"skills|experience|about the (role|job|position)|your role|the role|"
+    r"duties|must have|nice to have|you (will|have|are)|ideal candidate",
+    re.IGNORECASE)
+
+BOILERPLATE_SECTION = re.compile(
+    r"benefit|perks|what we offer|why (join|work)|compensation|salary|"
+    r"equal (employment )?opportunit|diversity|accommodation|how to apply|"
+    r"privacy|similar jobs|people also viewed|share this",
+    re.IGNORECASE)
+
+BOILERPLATE_LINE = re.compile(
+    r"equal opportunity|regardless of (race|age|gender|sex)|"
+    r"sexual orientation|gender identity|veteran status|protected "
+    r"(veteran|characteristic)|reasonable accommodation|401\s?\(?k\)?|"
+    r"paid time off|health,? dental|dental and vision|parental leave|"
+    r"^(apply( now)?|save( job)?|share|report (this )?job|sign in|"
+    r"show (more|less)|see more|easy apply)$|"
+    r"cookie|privacy policy|terms of (use|service)|all rights reserved",
+    re.IGNORECASE)
+
+NOISE = re.compile(
+    r"\s*[\u00b7|\u2022]?\s*\b((re)?posted \d+ "
+    r"(minute|hour|day|week|month)s? ago|over \d+ applicants|"
+    r"\d+\+? applicants|actively recruiting)\b",
+    re.IGNORECASE)
+
+HEADING = re.compile(r"^[\w&/,'()\- ]{2,60}:?$")
+
+KEEP, OTHER = 0, 1
+
+_logger = logging.getLogger(__name__)
+
+
+@functools.cache
+def get_encoding(name=DEFAULT_ENCODING):
+    """
+    Load a tiktoken encoding on first use.
+
+    Args:
+        name (str): Name of the tiktoken encoding.
+
+    Returns:
+        tiktoken.Encoding | None: The encoding, or None if tiktoken or its
+        data files are unavailable, in which case tokens are estimated.
+    """
+    try:
+        import tiktoken  # pylint: disable=C0415
+        return tiktoken.get_encoding(name)
+    except Exception as e:  # pylint: disable=W0718
+        _logger.warning("Tokenizer %s unavailable, estimating token counts: "
+                        "%s", name, e)
+        return None
+
+
+def tokenize(text, encoding=DEFAULT_ENCODING) -> list:
+    """
+    Split text into tokens with the given encoding, or into words and
+    punctuation if the encoding cannot be loaded.
+
+    Args:
+        text (str): Text to tokenize.
+        encoding (str): Name of the tiktoken encoding.
+
+    Returns:
+        list: Token IDs, or the fallback's word and punctuation strings.
+    """
+    if (enc := get_encoding(encoding)) is not None:
+        return enc.encode(text, disallowed_special=())
+    return re.findall(r"\w+|[^\w\s]", text)
+
+
+def count_tokens(text, encoding=DEFAULT_ENCODING) -> int:
+    """
+    Count the tokens of a text.
+
+    Args:
+        text (str): Text to count.
+        encoding (str): Name of the tiktoken encoding.
+
+    Returns:
+        int: Number of tokens.
+    """
+    return len(tokenize(text, encoding))
+
+
+def truncate_tokens(text, max_tokens, encoding=DEFAULT_ENCODING) -> str:
+    """
+    Cut a text down to at most max_tokens tokens.
+
+    Args:
+        text (str): Text to cut.
+        max_tokens (int): Number of tokens to keep.
+        encoding (str): Name of the tiktoken encoding.
+
+    Returns:
+        str: The start of the text.
+    """
+    if (enc := get_encoding(encoding)) is not None:
+        return enc.decode(enc.encode(text, disallowed_special=())[:max_tokens])
+    matches = list(re.finditer(r"\w+|[^\w\s]", text))
+    if len(matches) <= max_tokens:
+        return text
+    return text[:matches[max_tokens].start()].rstrip() if max_tokens else ""
+
+
+def is_heading(line) -> bool:
+    """
+    Guess whether a line is a section heading.
+
+    Args:
+        line (str): A stripped line of the posting.
+
+    Returns:
+        bool: True for short lines ending with a colon, in capitals, or
+        naming a known section.
+    """
+    if not HEADING.match(line) or len(line.split()) > 8:
+        return False
+    return line.endswith(":") or line.isupper() or \
+        bool(KEY_SECTION.search(line) or BOILERPLATE_SECTION.search(line))
+
+
+def _normalise(line) -> str:
+    """
+    Reduce a line to lowercase words for duplicate detection.
+
+    Args:
+        line (str): A line of the posting.
+
+    Returns:
+        str: The words of the line separated by single spaces.
+    """
+    return " ".join(re.findall(r"\w+", line.lower()))
+
+
+def preprocess_posting(job_posting, max_tokens=None,
+                       encoding=DEFAULT_ENCODING) -> tuple[str, dict]:
+    """
+    Strip boilerplate and duplicates from a posting and fit it to a token
+    budget.
+
+    Lines under requirement and responsibility headings, and the lines
+    before the first heading (usually the title and summary), are kept in
+    preference to other sections when the budget is enforced. The original
+    order of the remaining lines is preserved.
+
+    Args:
+        job_posting (str): The posting as pasted by the user.
+        max_tokens (int, optional): Token budget for the cleaned posting.
+        encoding (str): Name of the tiktoken encoding used to count tokens.
+
+    Returns:
+        tuple[str, dict]: The cleaned posting, and a report with the token
+        counts before and after, tokens saved, and the number of lines
+        removed as boilerplate, as duplicates and to fit the budget.
+    """
+    report = {"original_tokens": count_tokens(job_posting, encoding),
+              "boilerplate_lines": 0, "duplicate_lines": 0,
+              "budget_lines": 0}
+
+    lines, seen = [], set()
+    priority, skipping = KEEP, False
+    for raw in job_posting.splitlines():
+        line = " ".join(NOISE.sub("", raw).split()).strip(" \u00b7|\u2022")
+        if not line:
+            report["boilerplate_lines"] += bool(raw.strip())
+            continue
+        if is_heading(line):
+            skipping = bool(BOILERPLATE_SECTION.search(line)) and \
+                not KEY_SECTION.search(line)
+            priority = KEEP if KEY_SECTION.search(line) else OTHER
+        key = _normalise(line)
+        if skipping or BOILERPLATE_LINE.search(line):
+            report["boilerplate_lines"] += 1
+        elif key in seen:
+            report["duplicate_lines"] += 1
+        else:
+            seen.add(key)
+            lines.append([line, priority, count_tokens(line, encoding)])
+
+    # Joining lines adds one newline token each at most.
+    total = sum(tokens + 1 for _, _, tokens in lines)
+    if max_tokens:
+        for level in (OTHER, KEEP):
+            for entry in reversed(lines):
+                if total <= max_tokens:
+                    break
+                if entry[1] == level and entry[0]:
+                    total -= entry[2] + 1
+                    entry[0] = ""
+                    report["budget_lines"] += 1
+        lines = [entry for entry in lines if entry[0]]
+
+    text = "\n".join(line for line, _, _ in lines)
+    if max_tokens and count_tokens(text, encoding) > max_tokens:
+        text = truncate_tokens(text, max_tokens, encoding)
+    if not text:
+        # Never send an empty posting; fall back to the budgeted original.
+        text = truncate_tokens(job_posting.strip(), max_tokens, encoding) \
+            if max_tokens else job_posting.strip()
+
+    report["tokens"] = count_tokens(text, encoding)
+    report["tokens_saved"] = report["original_tokens"] - report["tokens"]
+    return text, report
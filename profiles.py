@@ -0,0 +1,175 @@
+"""
+Applicant profiles for serving many applicants from one process.
+
+A profile ID names a directory under the profiles directory holding that
+applicant's data files, in the same layout as "applicant data". Each
+profile gets its own data cache and relevance index, kept in a bounded
+least-recently-used store shared by every agent and worker in the process,
+so a warm process serves repeat applicants without re-reading their files.
+
+The profile a generation uses is held in a context variable, so the same
+agent and tools serve every profile and concurrent generations for
+different applicants do not interfere. Without a profile, the default
+"applicant data" directory edited by the GUI is used.
+"""
+import collections
+import contextlib
+import json
+import os
+import re
+import threading
+from contextvars import ContextVar
+from applicant_data import DATA_FILES, ApplicantDataCache, data_cache
+from retrieval import ApplicantIndex, applicant_index
+
+
+DEFAULT_PROFILES = {
+    "directory": "profiles",
+    "max_cached": 256
+}
+
+PROFILE_ID = re.compile(r"[\w-][\w.-]{0,63}")
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class Profile:
+    """
+    One applicant's data cache and relevance index.
+    """
+    def __init__(self, profile_id, cache, index):
+        """
+        Initialize the profile.
+
+        Args:
+            profile_id (str | None): The profile ID, None for the default
+                                     applicant data.
+            cache (ApplicantDataCache): Cache of the profile's data files.
+            index (ApplicantIndex): Relevance index over the cache.
+        """
+        self.profile_id = profile_id
+        self.cache = cache
+        self.index = index
+
+
+default_profile = Profile(None, data_cache, applicant_index)
+
+current_profile = ContextVar("current_profile", default=default_profile)
+
+
+class ProfileStore:
+    """
+    Thread-safe LRU of parsed profiles, evicting the least recently used
+    profile once more than max_cached are held.
+    """
+    def __init__(self, directory="profiles", max_cached=256):
+        """
+        Initialize an empty store.
+
+        Args:
+            directory (str): Directory holding one subdirectory per profile.
+            max_cached (int): Maximum number of profiles kept in memory.
+        """
+        self.directory = directory
+        self.max_cached = max_cached
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._profiles = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, profile_id) -> Profile:
+        """
+        Return a profile, loading it lazily on first use.
+
+        Args:
+            profile_id (str): The profile ID.
+
+        Returns:
+            Profile: The profile. Its files are read on first access.
+
+        Raises:
+            ValueError: If the ID is malformed, has no directory or the
+                        directory lacks one of the data files.
+        """
+        if not isinstance(profile_id, str) or \
+                not PROFILE_ID.fullmatch(profile_id):
+            raise ValueError(f"Unknown applicant profile: {profile_id}")
+        with self._lock:
+            if profile_id in self._profiles:
+                self.hits += 1
+                self._profiles.move_to_end(profile_id)
+                return self._profiles[profile_id]
+
+            path = os.path.join(self.directory, profile_id)
+            if not os.path.isdir(path):
+                raise ValueError(f"Unknown applicant profile: {profile_id}")
+            cache = ApplicantDataCache(path)
+            missing = [name for name in DATA_FILES
+                       if not os.path.isfile(cache.path(name))]
+            if missing:
+                raise ValueError(f"Applicant profile {profile_id} lacks "
+                                 f"{', '.join(missing)}")
+            self.misses += 1
+            profile = Profile(profile_id, cache, ApplicantIndex(cache))
+            self._profiles[profile_id] = profile
+            if len(self._profiles) > self.max_cached:
+                self._profiles.popitem(last=False)
+                self.evictions += 1
+            return profile
+
+    def stats(self) -> dict:
+        """
+        Summarise the store's use.
+
+        Returns:
+            dict: Profiles held, capacity, hits, misses and evictions.
+        """
+        with self._lock:
+            return {"cached": len(self._profiles),
+                    "max_cached": self.max_cached, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions}
+
+
+def get_profile_store(settings=None) -> ProfileStore:
+    """
+    Return the process-wide profile store for the "profiles" section of the
+    API config, creating it on first use.
+
+    Args:
+        settings (dict, optional): The "profiles" settings.
+
+    Returns:
+        ProfileStore: The shared store.
+    """
+    settings = {**DEFAULT_PROFILES, **(settings or {})}
+    key = json.dumps(settings, sort_keys=True)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = ProfileStore(settings["directory"],
+                                        settings["max_cached"])
+        return _stores[key]
+
+
+@contextlib.contextmanager
+def use_profile(profile):
+    """
+    Make a profile the current one for the code inside the block, including
+    tools run by agents and worker threads started with asyncio.to_thread.
+
+    Args:
+        profile (Profile | None): The profile, or None to keep the current
+                                  one.
+
+    Yields:
+        Profile: The current profile.
+    """
+    if profile is None:
+        yield current_profile.get()
+        return
+    token = current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        current_profile.reset(token)
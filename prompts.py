@@ -0,0 +1,63 @@
+"""
+Prefix-stable layout of single-call prompts.
+
+OpenAI-compatible providers with prompt caching reuse the work done for the
+longest prefix a request shares with recent requests, which cuts the time
+to the first token and the price of the cached tokens. Prompts are therefore
+built from two parts: a static part that is byte-identical for every
+posting, in a fixed order (the system prompt, the mode's instruction, the
+tool descriptions and the applicant data in a canonical serialisation), and
+the per-posting part, always last.
+"""
+import functools
+import json
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+
+TOOL_DESCRIPTIONS_PATH = "config/tool_descriptions.json"
+
+
+def canonical_json(data) -> str:
+    """
+    Serialise data the same way every time, so equal data gives equal
+    bytes. Keys keep their order, which the applicant data files use to
+    rank entries.
+
+    Args:
+        data (Any): JSON serialisable data.
+
+    Returns:
+        str: The JSON text.
+    """
+    return json.dumps(data, ensure_ascii=False, separators=(", ", ": "))
+
+
+@functools.cache
+def tool_descriptions() -> str:
+    """
+    Read the tool descriptions on first use, one "name: description" line
+    per tool in file order.
+
+    Returns:
+        str: The descriptions.
+    """
+    with open(TOOL_DESCRIPTIONS_PATH, "r", encoding="utf-8") as desc_file:
+        return "\n".join(f"{name}: {description}"
+                         for name, description in json.load(desc_file).items())
+
+
+def layout(static, dynamic) -> list[BaseMessage]:
+    """
+    Build a request with the static sections first, as the system message,
+    and the per-posting sections after them.
+
+    Args:
+        static (list[str]): Sections that are the same for every posting.
+        dynamic (list[str]): Sections that depend on the posting. Empty
+                             sections are left out of both lists.
+
+    Returns:
+        list[BaseMessage]: The system and human messages.
+    """
+    return [SystemMessage(content="\n\n".join(s for s in static if s)),
+            HumanMessage(content="\n\n".join(s for s in dynamic if s))]
@@ -0,0 +1,527 @@
+"""
+Routing of LLM requests across several endpoints and API keys.
+
+Each endpoint in the "endpoints" list of the API config has its own API base,
+key, quota and weight. Requests go to the endpoint with the best expected
+latency among those with quota left, where latency is tracked as an
+exponentially weighted moving average. An endpoint that fails several times
+in a row is taken out of rotation for a cooldown period (circuit breaking),
+and a request that fails with a rate limit, server or connection error is
+retried on the next best endpoint straight away.
+"""
+import asyncio
+import inspect
+import json
+import os
+import threading
+import time
+import openai
+from rate_limit import RETRY_STATUS_CODES, DEFAULT_RETRY, get_scheduler, \
+    parse_retry_after
+
+
+DEFAULT_FAILOVER = {
+    "failure_threshold": 3,
+    "cooldown": 30.0,
+    "ewma_alpha": 0.3
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class Endpoint:
+    """
+    One API base and key with its own quota, latency estimate and circuit
+    breaker state.
+    """
+    def __init__(self, name, llm, scheduler, weight=1.0, failure_threshold=3,
+                 cooldown=30.0, ewma_alpha=0.3):
+        """
+        Initialize a healthy endpoint with no latency history.
+
+        Args:
+            name (str): Name used in logs and metrics.
+            llm (ChatOpenAI): Client for this endpoint.
+            scheduler (RateLimitScheduler): Scheduler whose token bucket
+                                            holds the endpoint's quota.
+            weight (float): Relative share of traffic; higher weights make
+                            the endpoint look proportionally faster.
+            failure_threshold (int): Consecutive failures that open the
+                                     circuit.
+            cooldown (float): Seconds the circuit stays open.
+            ewma_alpha (float): Weight of the newest latency sample.
+        """
+        self.name = name
+        self.llm = llm
+        self.scheduler = scheduler
+        self.weight = weight
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.ewma_alpha = ewma_alpha
+        self.latency = None
+        self.in_flight = 0
+        self.failures = 0
+        self.open_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def score(self) -> float:
+        """
+        Expected cost of sending one more request here; lower is better.
+
+        Endpoints without latency history score 0 so each one is tried.
+
+        Returns:
+            float: The latency estimate scaled by load and weight.
+        """
+        return (self.latency or 0.0) * (self.in_flight + 1) / self.weight
+
+    def record_success(self, seconds):
+        """
+        Fold a successful request's latency into the average and close the
+        circuit.
+
+        Args:
+            seconds (float): Latency of the request.
+        """
+        self.latency = seconds if self.latency is None else \
+            self.ewma_alpha * seconds + (1 - self.ewma_alpha) * self.latency
+        self.failures = 0
+
+    def record_failure(self):
+        """
+        Count a failed request and open the circuit once the failure
+        threshold is reached.
+        """
+        self.failures += 1
+        self.errors += 1
+        if self.failures >= self.failure_threshold:
+            self.open_until = time.monotonic() + self.cooldown
+
+    def stats(self) -> dict:
+        """
+        Summarise the endpoint's health.
+
+        Returns:
+            dict: Request and error counts, latency average and whether the
+            circuit is open.
+        """
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency": round(self.latency, 4) if self.latency else None,
+            "circuit_open": self.open_until > time.monotonic()
+        }
+
+
+class ProviderPool:
+    """
+    Sends each request to the best available endpoint and fails over to the
+    others on retryable errors.
+    """
+    def __init__(self, endpoints, max_retries=5):
+        """
+        Initialize the pool. Backoff delays come from each endpoint's
+        scheduler.
+
+        Args:
+            endpoints (list[Endpoint]): The endpoints to route between.
+            max_retries (int): Retries across all endpoints before an error
+                               is raised.
+        """
+        self.endpoints = endpoints
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, exclude):
+        """
+        Take a quota token from the best healthy endpoint that has one.
+
+        Args:
+            exclude (set[Endpoint]): Endpoints that already failed this
+                                     request; used only if no other endpoint
+                                     is healthy.
+
+        Returns:
+            tuple[Endpoint | None, float]: The chosen endpoint, or None and
+            the number of seconds to wait before trying again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            healthy = [e for e in self.endpoints if e.open_until <= now]
+            healthy = [e for e in healthy if e not in exclude] or healthy
+            if not healthy:
+                return None, min(e.open_until for e in self.endpoints) - now
+
+            waits = []
+            for endpoint in sorted(healthy, key=Endpoint.score):
+                wait = endpoint.scheduler.bucket.try_acquire()
+                if wait == 0:
+                    endpoint.in_flight += 1
+                    endpoint.requests += 1
+                    return endpoint, 0.0
+                waits.append(wait)
+            return None, min(waits)
+
+    def acquire(self, exclude=frozenset()):
+        """
+        Block until a request may be sent and return the endpoint to use.
+
+        Args:
+            exclude (set[Endpoint]): Endpoints to avoid if possible.
+
+        Returns:
+            Endpoint: The endpoint, with one quota token taken.
+        """
+        while True:
+            endpoint, wait = self._try_acquire(exclude)
+            if endpoint is not None:
+                return endpoint
+            time.sleep(wait)
+
+    async def aacquire(self, exclude=frozenset()):
+        """
+        Async counterpart of acquire that does not block the event loop.
+
+        Args:
+            exclude (set[Endpoint]): Endpoints to avoid if possible.
+
+        Returns:
+            Endpoint: The endpoint, with one quota token taken.
+        """
+        while True:
+            endpoint, wait = self._try_acquire(exclude)
+            if endpoint is not None:
+                return endpoint
+            await asyncio.sleep(wait)
+
+    def _release(self, endpoint):
+        """
+        Stop counting a request against an endpoint's load, however it
+        ended, including by cancellation.
+
+        Args:
+            endpoint (Endpoint): The endpoint the request went to.
+        """
+        with self._lock:
+            endpoint.in_flight -= 1
+
+    def _finish(self, endpoint, start, error=None, attempt=0):
+        """
+        Record the outcome of a released request and decide whether to retry
+        it.
+
+        Args:
+            endpoint (Endpoint): The endpoint the request went to.
+            start (float): perf_counter value when the request was sent.
+            error (Exception, optional): The error the request failed with.
+            attempt (int): Zero-based number of the attempt.
+
+        Returns:
+            float | None: Seconds to back off before the retry if every
+            endpoint has failed, or None if the error should be raised.
+        """
+        with self._lock:
+            if error is None:
+                endpoint.record_success(time.perf_counter() - start)
+                return None
+            if not is_retryable(error):
+                return None
+            endpoint.record_failure()
+
+        retry_after = parse_retry_after(error)
+        delay = endpoint.scheduler.backoff(attempt, retry_after)
+        if getattr(error, "status_code", None) == 429:
+            # Only this endpoint's quota is exhausted.
+            endpoint.scheduler.bucket.block(delay)
+            return 0.0
+        return delay
+
+    def _retry_delay(self, endpoint, start, error, attempt, tried):
+        """
+        Record a failed attempt and decide whether to retry it.
+
+        Args:
+            endpoint (Endpoint): The endpoint the request went to.
+            start (float): perf_counter value when the request was sent.
+            error (Exception): The error the request failed with.
+            attempt (int): Zero-based number of the attempt.
+            tried (set[Endpoint]): Endpoints tried since the last back-off,
+                                   updated in place.
+
+        Returns:
+            float | None: Seconds to back off before the retry once every
+            endpoint has failed, or None to retry on another one straight
+            away.
+
+        Raises:
+            Exception: The error, if it is not to be retried.
+        """
+        delay = self._finish(endpoint, start, error, attempt)
+        if delay is None or attempt >= self.max_retries:
+            raise error
+        tried.add(endpoint)
+        if not tried.issuperset(self.endpoints):
+            return None
+        tried.clear()
+        return delay
+
+    def call(self, func, retry_callback=None):
+        """
+        Call func with the best endpoint, failing over to the others on
+        retryable errors.
+
+        Args:
+            func (Callable[[Endpoint], Any]): The request to make.
+            retry_callback (Callable[[int, Exception], Any], optional):
+                Called with the retry number and the error before each
+                retry.
+
+        Returns:
+            Any: The return value of func.
+        """
+        attempt, tried = 0, set()
+        while True:
+            endpoint = self.acquire(tried)
+            start, error = time.perf_counter(), None
+            try:
+                result = func(endpoint)
+            except Exception as e:  # pylint: disable=W0718
+                error = e
+            finally:
+                self._release(endpoint)
+            if error is None:
+                self._finish(endpoint, start)
+                return result
+            delay = self._retry_delay(endpoint, start, error, attempt, tried)
+            attempt += 1
+            if retry_callback is not None:
+                retry_callback(attempt, error)
+            if delay is not None:
+                time.sleep(delay)
+
+    async def acall(self, func, retry_callback=None):
+        """
+        Async counterpart of call for coroutine functions.
+
+        Args:
+            func (Callable[[Endpoint], Awaitable]): The request to make.
+            retry_callback (Callable[[int, Exception], Any], optional):
+                Called with the retry number and the error before each
+                retry. Awaited if it returns an awaitable.
+
+        Returns:
+            Any: The awaited return value of func.
+        """
+        attempt, tried = 0, set()
+        while True:
+            endpoint = await self.aacquire(tried)
+            start, error = time.perf_counter(), None
+            try:
+                result = await func(endpoint)
+            except Exception as e:  # pylint: disable=W0718
+                error = e
+            finally:
+                self._release(endpoint)
+            if error is None:
+                self._finish(endpoint, start)
+                return result
+            delay = self._retry_delay(endpoint, start, error, attempt, tried)
+            attempt += 1
+            if retry_callback is not None:
+                outcome = retry_callback(attempt, error)
+                if inspect.isawaitable(outcome):
+                    await outcome
+            if delay is not None:
+                await asyncio.sleep(delay)
+
+    def stream(self, func, retry_callback=None):
+        """
+        Open a streamed request with the best endpoint, failing over like
+        call until it is open, and pass on its chunks.
+
+        The endpoint counts as loaded until the stream is exhausted, fails
+        or is closed, and the stream's latency or failure is recorded then,
+        so errors after the first chunk reach the circuit breaker. They are
+        not retried.
+
+        Args:
+            func (Callable[[Endpoint], Iterator]): Opens the stream, raising
+                the errors that occur before its first chunk.
+            retry_callback (Callable[[int, Exception], Any], optional):
+                Called with the retry number and the error before each
+                retry.
+
+        Yields:
+            Any: The chunks of the stream.
+        """
+        attempt, tried = 0, set()
+        while True:
+            endpoint = self.acquire(tried)
+            start, chunks, error = time.perf_counter(), None, None
+            try:
+                chunks = func(endpoint)
+            except Exception as e:  # pylint: disable=W0718
+                error = e
+            finally:
+                if chunks is None:
+                    self._release(endpoint)
+            if error is None:
+                break
+            delay = self._retry_delay(endpoint, start, error, attempt, tried)
+            attempt += 1
+            if retry_callback is not None:
+                retry_callback(attempt, error)
+            if delay is not None:
+                time.sleep(delay)
+
+        try:
+            yield from chunks
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            try:
+                chunks.close()
+            finally:
+                self._release(endpoint)
+                self._finish(endpoint, start, error)
+
+    async def astream(self, func, retry_callback=None):
+        """
+        Async counterpart of stream for coroutine functions. A cancelled
+        stream is released without recording an outcome.
+
+        Args:
+            func (Callable[[Endpoint], Awaitable[AsyncIterator]]): Opens the
+                stream, raising the errors that occur before its first
+                chunk.
+            retry_callback (Callable[[int, Exception], Any], optional):
+                Called with the retry number and the error before each
+                retry. Awaited if it returns an awaitable.
+
+        Yields:
+            Any: The chunks of the stream.
+        """
+        attempt, tried = 0, set()
+        while True:
+            endpoint = await self.aacquire(tried)
+            start, chunks, error = time.perf_counter(), None, None
+            try:
+                chunks = await func(endpoint)
+            except Exception as e:  # pylint: disable=W0718
+                error = e
+            finally:
+                if chunks is None:
+                    self._release(endpoint)
+            if error is None:
+                break
+            delay = self._retry_delay(endpoint, start, error, attempt, tried)
+            attempt += 1
+            if retry_callback is not None:
+                outcome = retry_callback(attempt, error)
+                if inspect.isawaitable(outcome):
+                    await outcome
+            if delay is not None:
+                await asyncio.sleep(delay)
+
+        cancelled = False
+        try:
+            async for chunk in chunks:
+                yield chunk
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            try:
+                await chunks.aclose()
+            finally:
+                self._release(endpoint)
+                if not cancelled:
+                    self._finish(endpoint, start, error)
+
+    def stats(self) -> dict[str, dict]:
+        """
+        Summarise the health of every endpoint.
+
+        Returns:
+            dict[str, dict]: Endpoint stats keyed by endpoint name.
+        """
+        with self._lock:
+            return {e.name: e.stats() for e in self.endpoints}
+
+
+def is_retryable(error) -> bool:
+    """
+    Decide whether an error should be retried, on another endpoint if there
+    is one.
+
+    Args:
+        error (Exception): The error raised by the request.
+
+    Returns:
+        bool: True for rate limit, server and connection errors.
+    """
+    return getattr(error, "status_code", None) in RETRY_STATUS_CODES or \
+        isinstance(error, openai.APIConnectionError)
+
+
+def endpoint_configs(api_config) -> list[dict]:
+    """
+    Read the endpoint list of the API config, falling back to a single
+    endpoint built from "model", "api_base" and TOGETHER_API_KEY.
+
+    Args:
+        api_config (dict): The loaded api_config.json.
+
+    Returns:
+        list[dict]: One dict per endpoint with name, model, api_base,
+        api_key_env and weight, plus any quota overrides.
+    """
+    defaults = {"model": api_config["model"],
+                "api_key_env": "TOGETHER_API_KEY", "weight": 1.0}
+    endpoints = api_config.get("endpoints") or [{
+        "name": api_config["model"], "api_base": api_config["api_base"]
+    }]
+    return [{**defaults, "name": f"endpoint-{i}", **endpoint}
+            for i, endpoint in enumerate(endpoints)]
+
+
+def get_pool(api_config, build_client) -> ProviderPool:
+    """
+    Return the process-wide pool for the API config's endpoints, creating
+    it on first use so latency history and circuit state are shared by
+    every agent.
+
+    Args:
+        api_config (dict): The loaded api_config.json.
+        build_client (Callable[[dict, str], ChatOpenAI]): Builds the client
+            of an endpoint from its config and API key.
+
+    Returns:
+        ProviderPool: The shared pool.
+    """
+    configs = endpoint_configs(api_config)
+    key = json.dumps([configs, {k: api_config.get(k) for k in
+                                ("temperature", "max_tokens", "failover")}],
+                     sort_keys=True)
+    with _pools_lock:
+        if key not in _pools:
+            failover = {**DEFAULT_FAILOVER, **api_config.get("failover", {})}
+            endpoints = []
+            for config in configs:
+                limits = {k: config[k] for k in
+                          ("requests_per_minute", "burst") if k in config}
+                endpoints.append(Endpoint(
+                    config["name"],
+                    build_client(config, os.getenv(config["api_key_env"])),
+                    get_scheduler(config["name"], api_config, limits),
+                    config["weight"], **failover
+                ))
+            retry = {**DEFAULT_RETRY, **api_config.get("retry", {})}
+            _pools[key] = ProviderPool(endpoints, retry["max_retries"])
+        return _pools[key]
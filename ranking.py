@@ -0,0 +1,125 @@
+"""
+Local ranking of candidate cover letters.
+
+Drafts are scored on how many of the job posting's keywords they cover,
+whether they stay within the word limit of the system prompt and how much
+they repeat themselves. They are then ordered greedily, each pick penalised
+by its similarity to the drafts already picked, so the best draft comes
+first and the ones after it are real alternatives rather than near copies.
+"""
+import re
+from retrieval import tokenize
+
+
+DEFAULT_WORD_LIMIT = 325
+
+WORD_LIMIT_PATTERN = re.compile(r"(\d+)\s+words", re.IGNORECASE)
+
+REPETITION_WEIGHT = 0.5
+
+SIMILARITY_WEIGHT = 0.3
+
+
+def word_limit(system_prompt) -> int:
+    """
+    Read the word limit from the system prompt.
+
+    Args:
+        system_prompt (str): The system prompt.
+
+    Returns:
+        int: The first "<number> words" limit in the prompt, or 325.
+    """
+    match = WORD_LIMIT_PATTERN.search(system_prompt)
+    return int(match.group(1)) if match else DEFAULT_WORD_LIMIT
+
+
+def shingles(terms, size=3) -> set[tuple]:
+    """
+    Collect the overlapping runs of consecutive terms of a text.
+
+    Args:
+        terms (list[str]): The text's terms.
+        size (int): Number of terms per run.
+
+    Returns:
+        set[tuple]: The distinct runs.
+    """
+    return {tuple(terms[i:i + size]) for i in range(len(terms) - size + 1)}
+
+
+def jaccard(first, second) -> float:
+    """
+    Jaccard similarity of two sets.
+
+    Args:
+        first (set): A set.
+        second (set): Another set.
+
+    Returns:
+        float: Size of the intersection over size of the union, 0 if both
+        are empty.
+    """
+    union = first | second
+    return len(first & second) / len(union) if union else 0.0
+
+
+def score_draft(draft, keywords, limit) -> dict:
+    """
+    Score one draft on its own.
+
+    Args:
+        draft (str): The candidate letter.
+        keywords (set[str]): Distinct terms of the job posting.
+        limit (int): Maximum number of words.
+
+    Returns:
+        dict: The draft's text, word count, keyword coverage, share of
+        repeated three-term runs and quality score.
+    """
+    terms = tokenize(draft)
+    words = len(draft.split())
+    coverage = len(keywords & set(terms)) / len(keywords) if keywords else 0.0
+    runs = len(terms) - 2
+    repetition = 1 - len(shingles(terms)) / runs if runs > 0 else 0.0
+    over_limit = max(words - limit, 0) / limit
+    return {
+        "text": draft,
+        "words": words,
+        "coverage": round(coverage, 3),
+        "repetition": round(repetition, 3),
+        "score": coverage - over_limit - REPETITION_WEIGHT * repetition,
+        "_shingles": shingles(terms)
+    }
+
+
+def rank_drafts(drafts, job_posting, limit=DEFAULT_WORD_LIMIT) -> list[dict]:
+    """
+    Order candidate letters best first.
+
+    Args:
+        drafts (list[str]): The candidate letters.
+        job_posting (str): The job posting they were written for.
+        limit (int): Maximum number of words.
+
+    Returns:
+        list[dict]: One dict per draft, best first, with its text, word
+        count, keyword coverage, repetition, score and its similarity to the
+        better ranked drafts.
+    """
+    keywords = set(tokenize(job_posting))
+    remaining = [score_draft(d, keywords, limit) for d in drafts]
+    ranked = []
+    while remaining:
+        for draft in remaining:
+            draft["similarity"] = round(max(
+                (jaccard(draft["_shingles"], r["_shingles"]) for r in ranked),
+                default=0.0), 3)
+        best = max(remaining, key=lambda d: d["score"] -
+                   SIMILARITY_WEIGHT * d["similarity"])
+        remaining.remove(best)
+        ranked.append(best)
+    for draft in ranked:
+        del draft["_shingles"]
+        draft["score"] = round(draft["score"], 3)
+    return ranked
@@ -0,0 +1,189 @@
+"""
+Client-side rate limiting and retry scheduling for LLM calls.
+
+Every model or endpoint gets one shared scheduler per process. Callers take
+a token from the scheduler's bucket before each request and wait when none
+is available, so requests queue locally instead of being rejected by the
+provider. The scheduler also holds the backoff policy for rate limit (429)
+and transient server errors: jittered exponential backoff, honouring the
+provider's Retry-After header. The retries themselves are made by the
+provider pool.
+"""
+import email.utils
+import random
+import threading
+import time
+
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+DEFAULT_LIMITS = {
+    "requests_per_minute": 60,
+    "burst": 1
+}
+
+DEFAULT_RETRY = {
+    "max_retries": 5,
+    "base_delay": 2.0,
+    "max_delay": 60.0
+}
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that refills continuously up to its capacity.
+    """
+    def __init__(self, rate, capacity):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate (float): Tokens added per second.
+            capacity (int): Maximum number of stored tokens (burst size).
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available.
+
+        Returns:
+            float: 0 if a token was taken, otherwise the number of seconds to
+            wait before trying again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+
+            elapsed = now - max(self._updated, self._blocked_until)
+            self._tokens = min(self.capacity,
+                               self._tokens + max(elapsed, 0) * self.rate)
+            self._updated = now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def block(self, seconds):
+        """
+        Stop handing out tokens for a while and empty the bucket, used when
+        the provider reports that the quota is exhausted.
+
+        Args:
+            seconds (float): How long to block for.
+        """
+        with self._lock:
+            self._blocked_until = max(self._blocked_until,
+                                      time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class RateLimitScheduler:
+    """
+    The token bucket and backoff policy of one model or endpoint.
+    """
+    def __init__(self, requests_per_minute, burst=1, base_delay=2.0,
+                 max_delay=60.0):
+        """
+        Initialize the scheduler.
+
+        Args:
+            requests_per_minute (float): Sustained request quota.
+            burst (int): Number of requests allowed back to back.
+            base_delay (float): Backoff delay of the first retry in seconds.
+            max_delay (float): Upper bound of a single backoff delay.
+        """
+        self.bucket = TokenBucket(requests_per_minute / 60, burst)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt, retry_after=None) -> float:
+        """
+        Compute how long to wait before the next retry.
+
+        Uses full-jitter exponential backoff, or the provider's Retry-After
+        value plus a little jitter so queued callers do not retry in lockstep.
+
+        Args:
+            attempt (int): Zero-based number of the failed attempt.
+            retry_after (float, optional): Delay requested by the provider.
+
+        Returns:
+            float: Delay in seconds.
+        """
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.base_delay / 2)
+        return random.uniform(0, min(self.max_delay,
+                                     self.base_delay * 2 ** attempt))
+
+
+def parse_retry_after(error) -> float | None:
+    """
+    Read the Retry-After delay from an API error's response headers.
+
+    Args:
+        error (Exception): An error raised by the OpenAI client.
+
+    Returns:
+        float | None: The requested delay in seconds, if any.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    if retry_ms := headers.get("retry-after-ms"):
+        try:
+            return float(retry_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_date = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_date.timestamp() - time.time(), 0.0)
+
+
+def get_scheduler(model, api_config, limits=None) -> RateLimitScheduler:
+    """
+    Return the process-wide scheduler for a model, creating it from the
+    "rate_limits" and "retry" sections of the API config on first use.
+
+    Args:
+        model (str): Model or endpoint name the scheduler is shared by.
+        api_config (dict): The loaded api_config.json.
+        limits (dict, optional): Quota taking precedence over
+                                 "rate_limits", e.g. from an endpoint's
+                                 config.
+
+    Returns:
+        RateLimitScheduler: The shared scheduler.
+    """
+    with _schedulers_lock:
+        if model not in _schedulers:
+            rate_limits = api_config.get("rate_limits", {})
+            limits = {**DEFAULT_LIMITS, **rate_limits.get("default", {}),
+                      **rate_limits.get(model, {}), **(limits or {})}
+            retry = {**DEFAULT_RETRY, **api_config.get("retry", {})}
+            _schedulers[model] = RateLimitScheduler(
+                **limits, base_delay=retry["base_delay"],
+                max_delay=retry["max_delay"])
+        return _schedulers[model]
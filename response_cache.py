@@ -0,0 +1,156 @@
+"""
+Persistent cache of finished cover letters.
+
+Letters are stored in SQLite under a key combining the normalised job
+posting, a hash of the applicant data, the system prompt and the model
+settings, so any change to what the letter was generated from misses the
+cache. Entries expire after a maximum age and the least recently used ones
+are evicted once the cache is full.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+
+def normalise_posting(job_posting) -> str:
+    """
+    Normalise a job posting so trivially different copies share a key.
+
+    Args:
+        job_posting (str): The raw job posting text.
+
+    Returns:
+        str: The posting case folded with runs of whitespace collapsed.
+    """
+    return re.sub(r"\s+", " ", job_posting).strip().casefold()
+
+
+def make_key(job_posting, data_hash, prompt, settings) -> str:
+    """
+    Build the cache key of a generation.
+
+    Args:
+        job_posting (str): The job posting text.
+        data_hash (str): Content hash of the applicant data.
+        prompt (str): The system prompt.
+        settings (dict): Model settings the letter depends on.
+
+    Returns:
+        str: Hex digest identifying the generation.
+    """
+    payload = json.dumps([normalise_posting(job_posting), data_hash, prompt,
+                          settings], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed LRU cache of generated cover letters with an age limit.
+    """
+    def __init__(self, path, max_entries=1000, max_age_days=30):
+        """
+        Open the cache, creating the database file if needed.
+
+        Args:
+            path (str): Path to the SQLite database file.
+            max_entries (int): Maximum number of stored letters.
+            max_age_days (float): Age after which a letter expires.
+        """
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, letter TEXT NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed "
+            "ON responses (accessed)"
+        )
+        self._conn.commit()
+
+    @classmethod
+    def from_config(cls, api_config):
+        """
+        Create the cache described by the "response_cache" section of the
+        API config.
+
+        Args:
+            api_config (dict): The loaded api_config.json.
+
+        Returns:
+            ResponseCache | None: The cache, or None if it is disabled.
+        """
+        settings = api_config.get("response_cache", {})
+        if not settings.get("enabled"):
+            return None
+        return cls(settings.get("path", "cache/responses.sqlite3"),
+                   max_entries=settings.get("max_entries", 1000),
+                   max_age_days=settings.get("max_age_days", 30))
+
+    def get(self, key) -> str | None:
+        """
+        Look up a letter and mark it as recently used.
+
+        Args:
+            key (str): The generation's cache key.
+
+        Returns:
+            str | None: The cached letter, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT letter, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.max_age:
+                self._conn.execute("DELETE FROM responses WHERE key = ?",
+                                   (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key, letter):
+        """
+        Store a letter, then evict expired and least recently used entries.
+
+        Args:
+            key (str): The generation's cache key.
+            letter (str): The generated cover letter.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, letter, now, now)
+            )
+            self._conn.execute("DELETE FROM responses WHERE created < ?",
+                               (now - self.max_age,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM "
+                "responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def clear(self):
+        """
+        Remove every cached letter.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
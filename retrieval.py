@@ -0,0 +1,236 @@
+"""
+Lexical relevance ranking of applicant data entries.
+
+Every entry of every applicant data file is indexed as one document and
+scored against a job posting with BM25, so the tools can return only the
+entries that matter for the current posting instead of whole files. The
+index follows the shared applicant data cache and only re-tokenizes entries
+that changed since the last query.
+"""
+import re
+import threading
+import numpy as np
+from applicant_data import DATA_FILES, data_cache
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+
+STOP_WORDS = frozenset("""
+a about above after all also an and any are as at be been being but by can
+could did do does for from had has have having he her his how i if in into is
+it its itself just me more most my no nor not of off on once only or other
+our ours out over own same she should so some such than that the their them
+then there these they this those through to too under until up very was we
+were what when where which while who whom why will with would you your
+""".split())
+
+
+def tokenize(text) -> list[str]:
+    """
+    Split text into lower-case terms, dropping stop words.
+
+    Terms such as "c++", "c#" and "node.js" are kept whole.
+
+    Args:
+        text (str): Text to tokenize.
+
+    Returns:
+        list[str]: The terms in order of appearance.
+    """
+    return [t for t in TOKEN_PATTERN.findall(str(text).lower())
+            if t not in STOP_WORDS]
+
+
+def entry_text(name, value) -> str:
+    """
+    Flatten an applicant data entry into the text that is indexed.
+
+    Args:
+        name (str): The entry's key.
+        value (dict | str | None): The entry's fields.
+
+    Returns:
+        str: The name followed by all non-empty field values.
+    """
+    if isinstance(value, dict):
+        return " ".join([name, *(str(v) for v in value.values() if v)])
+    return f"{name} {value}" if value else name
+
+
+class ApplicantIndex:
+    """
+    BM25 index over the entries of all applicant data files, stored as a
+    dense term-frequency matrix with one row per entry.
+    """
+    def __init__(self, cache=data_cache, k1=1.5, b=0.75):
+        """
+        Initialize an empty index bound to an applicant data cache.
+
+        Args:
+            cache (ApplicantDataCache): Cache the entries are read from.
+            k1 (float): BM25 term frequency saturation.
+            b (float): BM25 document length normalisation.
+        """
+        self.cache = cache
+        self.k1 = k1
+        self.b = b
+        self._vocab = {}
+        self._tf = np.zeros((16, 64), dtype=np.float32)
+        self._lengths = np.zeros(16, dtype=np.float32)
+        self._active = np.zeros(16, dtype=bool)
+        self._rows = {}
+        self._texts = {}
+        self._keys = [None] * 16
+        self._free = list(range(15, -1, -1))
+        self._seen = {}
+        self._lock = threading.RLock()
+
+    def _term_ids(self, terms, add=False) -> list[int]:
+        """
+        Map terms to matrix columns, optionally growing the vocabulary.
+
+        Args:
+            terms (Iterable[str]): Terms to look up.
+            add (bool): Assign columns to unknown terms.
+
+        Returns:
+            list[int]: Column of each known term.
+        """
+        ids = []
+        for term in terms:
+            if term not in self._vocab:
+                if not add:
+                    continue
+                self._vocab[term] = len(self._vocab)
+                if len(self._vocab) > self._tf.shape[1]:
+                    self._tf = np.pad(self._tf,
+                                      ((0, 0), (0, self._tf.shape[1])))
+            ids.append(self._vocab[term])
+        return ids
+
+    def _take_row(self) -> int:
+        """
+        Return a free matrix row, doubling the matrix if none is left.
+
+        Returns:
+            int: Index of the free row.
+        """
+        if not self._free:
+            rows = self._tf.shape[0]
+            self._tf = np.pad(self._tf, ((0, rows), (0, 0)))
+            self._lengths = np.pad(self._lengths, (0, rows))
+            self._active = np.pad(self._active, (0, rows))
+            self._keys.extend([None] * rows)
+            self._free = list(range(2 * rows - 1, rows - 1, -1))
+        return self._free.pop()
+
+    def upsert(self, category, name, value):
+        """
+        Add an entry to the index or replace its indexed text.
+
+        Args:
+            category (str): Name of the data file the entry belongs to.
+            name (str): The entry's key.
+            value (dict | str | None): The entry's fields.
+        """
+        key = (category, name)
+        text = entry_text(name, value)
+        with self._lock:
+            if self._texts.get(key) == text:
+                return
+
+            row = self._rows.get(key)
+            if row is None:
+                row = self._take_row()
+                self._rows[key] = row
+                self._keys[row] = key
+            ids = self._term_ids(tokenize(text), add=True)
+
+            self._tf[row] = 0
+            np.add.at(self._tf[row], ids, 1)
+            self._lengths[row] = len(ids)
+            self._active[row] = True
+            self._texts[key] = text
+
+    def remove(self, category, name):
+        """
+        Remove an entry from the index.
+
+        Args:
+            category (str): Name of the data file the entry belongs to.
+            name (str): The entry's key.
+        """
+        with self._lock:
+            row = self._rows.pop((category, name), None)
+            if row is None:
+                return
+            self._texts.pop((category, name))
+            self._tf[row] = 0
+            self._lengths[row] = 0
+            self._active[row] = False
+            self._keys[row] = None
+            self._free.append(row)
+
+    def _sync(self):
+        """
+        Bring the index up to date with the cache.
+
+        The cache replaces a file's stripped dict whenever the file changes,
+        so unchanged files are skipped by identity and only the entries of
+        changed files are compared and re-indexed.
+        """
+        for category in DATA_FILES:
+            entries = self.cache.get(category)
+            if self._seen.get(category) is entries:
+                continue
+            for cat, name in [k for k in self._rows if k[0] == category]:
+                if name not in entries:
+                    self.remove(cat, name)
+            for name, value in entries.items():
+                self.upsert(category, name, value)
+            self._seen[category] = entries
+
+    def search(self, query, top_k=5, categories=None) -> list[tuple]:
+        """
+        Rank applicant data entries by BM25 relevance to a query.
+
+        Args:
+            query (str): Text to rank against, usually the job posting.
+            top_k (int): Maximum number of entries to return.
+            categories (Iterable[str], optional): Only rank entries from
+                                                  these data files.
+
+        Returns:
+            list[tuple]: (category, name, score) of the best entries, best
+            first.
+        """
+        with self._lock:
+            self._sync()
+
+            mask = self._active.copy()
+            if categories is not None:
+                categories = set(categories)
+                mask &= np.array([k is not None and k[0] in categories
+                                  for k in self._keys])
+            rows = np.flatnonzero(mask)
+            if rows.size == 0:
+                return []
+
+            term_ids = sorted(set(self._term_ids(tokenize(query))))
+            scores = np.zeros(rows.size, dtype=np.float32)
+            if term_ids:
+                tf = self._tf[np.ix_(rows, term_ids)]
+                lengths = self._lengths[rows]
+                doc_freq = (tf > 0).sum(axis=0)
+                idf = np.log1p((rows.size - doc_freq + 0.5) /
+                               (doc_freq + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * lengths /
+                                  max(lengths.mean(), 1.0))
+                scores = (idf * tf * (self.k1 + 1) /
+                          (tf + norm[:, None])).sum(axis=1)
+
+            order = np.lexsort((rows, -scores))[:top_k]
+            return [(*self._keys[rows[i]], float(scores[i])) for i in order]
+
+
+applicant_index = ApplicantIndex()
@@ -0,0 +1,169 @@
+"""
+Background event loop shared by the front ends that run generations, and a
+queue that runs a bounded number of generations on it at a time.
+"""
+import asyncio
+import itertools
+import threading
+import time
+
+
+class BackgroundLoop:
+    """
+    An asyncio event loop running forever in a daemon thread.
+
+    Front ends that are not async themselves, such as the Tk GUI, submit
+    coroutines from their own thread and get back a future that can be
+    polled or cancelled.
+    """
+    def __init__(self, name="generation-loop"):
+        """
+        Create the loop and start its thread.
+
+        Args:
+            name (str): Name of the loop's thread.
+        """
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever,
+                                        name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, coro):
+        """
+        Schedule a coroutine on the loop.
+
+        Args:
+            coro (Coroutine): The coroutine to run.
+
+        Returns:
+            concurrent.futures.Future: Future of the coroutine's result.
+            Cancelling it cancels the task running the coroutine.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self):
+        """
+        Stop the loop and wait for its thread to exit.
+        """
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+class GenerationQueue:
+    """
+    Runs submitted jobs on a BackgroundLoop, at most max_concurrent at a
+    time in submission order, and keeps their state and timings for display.
+
+    Each job is a dict with its "id", "title", "state" ("queued",
+    "running", "done", "failed" or "cancelled"), monotonic "submitted",
+    "started" and "finished" times and the "future" of its result. The
+    dicts are updated on the loop's thread and may be read from any thread.
+    """
+    def __init__(self, loop, max_concurrent=2):
+        """
+        Initialize an empty queue.
+
+        Args:
+            loop (BackgroundLoop): Loop the jobs run on.
+            max_concurrent (int): Number of jobs running at once. Each
+                                  model request still waits for the shared
+                                  rate limiter, so this bounds how many
+                                  requests compete for it.
+        """
+        self.loop = loop
+        self.jobs = []
+        self._ids = itertools.count(1)
+        self._slots = asyncio.Semaphore(max_concurrent)
+
+    def submit(self, make_coro, title, **extra) -> dict:
+        """
+        Queue a job.
+
+        Args:
+            make_coro (Callable[[], Coroutine]): Creates the job's coroutine
+                                                 once a slot is free.
+            title (str): Short description shown in the progress panel.
+            **extra: Further fields stored in the job dict.
+
+        Returns:
+            dict: The job. Cancelling its future cancels the job whether it
+            is queued or running.
+        """
+        job = {"id": next(self._ids), "title": title, "state": "queued",
+               "submitted": time.monotonic(), "started": None,
+               "finished": None, **extra}
+        self.jobs.append(job)
+        job["future"] = self.loop.submit(self._run(job, make_coro))
+        job["future"].add_done_callback(
+            lambda future: self._cancelled_before_start(job))
+        return job
+
+    @staticmethod
+    def _cancelled_before_start(job):
+        """
+        Mark a job cancelled before it started, whose coroutine never ran.
+
+        Args:
+            job (dict): The job.
+        """
+        if job["state"] == "queued" and job["future"].cancelled():
+            job["state"] = "cancelled"
+            job["finished"] = time.monotonic()
+
+    async def _run(self, job, make_coro):
+        """
+        Wait for a free slot, then run a job and record its outcome.
+
+        Args:
+            job (dict): The job.
+            make_coro (Callable[[], Coroutine]): Creates the job's coroutine.
+
+        Returns:
+            Any: The coroutine's result.
+        """
+        try:
+            async with self._slots:
+                job["state"] = "running"
+                job["started"] = time.monotonic()
+                result = await make_coro()
+            job["state"] = "done"
+            return result
+        except asyncio.CancelledError:
+            job["state"] = "cancelled"
+            raise
+        except Exception:
+            job["state"] = "failed"
+            raise
+        finally:
+            job["finished"] = time.monotonic()
+
+    @staticmethod
+    def elapsed(job) -> float:
+        """
+        Seconds a job has been running, or ran for.
+
+        Args:
+            job (dict): The job.
+
+        Returns:
+            float: Running time, 0 while queued.
+        """
+        if job["started"] is None:
+            return 0.0
+        return (job["finished"] or time.monotonic()) - job["started"]
+
+    def pending(self) -> int:
+        """
+        Count the jobs that are queued or running.
+
+        Returns:
+            int: Number of unfinished jobs.
+        """
+        return sum(job["state"] in ("queued", "running") for job in self.jobs)
+
+    def clear_finished(self):
+        """
+        Forget the jobs that have finished.
+        """
+        self.jobs = [job for job in self.jobs
+                     if job["state"] in ("queued", "running")]
@@ -0,0 +1,458 @@
+"""
+Local HTTP service for generating cover letters.
+
+Other tools submit job postings over HTTP and poll for the letters. Requests
+go into a bounded queue served by a pool of async generation workers sharing
+one agent; when the queue is full, new submissions are turned away with 503
+and a Retry-After header instead of piling up.
+
+Endpoints:
+    POST /letters              {"job_posting": "...", "use_cache": true,
+                                "profile": "<applicant profile ID>"}
+                               -> 202 {"id": ..., "status": "queued"}
+    GET  /letters/<id>         -> the job's status and timings
+    GET  /letters/<id>/result  -> the letter once the job is done
+    GET  /metrics              -> Prometheus text format metrics
+    GET  /health               -> 200 once the agent is ready
+
+Usage:
+    python server.py --port 8080 --workers 4 --queue-size 32
+
+With --api-base the service can be run fully offline against the stub API
+(python -m benchmarks.stub_server).
+"""
+import argparse
+import asyncio
+import collections
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from runner import BackgroundLoop
+from tracing import percentile
+
+
+JOB_PATH = re.compile(r"^/letters/([0-9a-f]{32})(/result)?$")
+
+MAX_BODY_BYTES = 1_000_000
+
+LATENCY_WINDOW = 1000
+
+QUANTILES = (50, 95, 99)
+
+
+class LetterService:
+    """
+    Bounded job queue and worker pool around a shared CoverLetterAgent.
+
+    Jobs are submitted from the HTTP server's threads and run on a
+    background event loop. Finished jobs are kept for polling until more
+    than max_jobs jobs are known, oldest first.
+    """
+    def __init__(self, agent=None, workers=4, queue_size=32, max_jobs=1000,
+                 retry_after=5):
+        """
+        Initialize the service. Workers start with start().
+
+        Args:
+            agent (CoverLetterAgent, optional): The agent; built on start()
+                                                if not given.
+            workers (int): Number of concurrent generations.
+            queue_size (int): Jobs that may wait for a worker before new
+                              submissions are rejected.
+            max_jobs (int): Jobs kept for polling, including finished ones.
+            retry_after (int): Seconds clients are told to wait when the
+                               queue is full.
+        """
+        self.agent = agent
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_jobs = max_jobs
+        self.retry_after = retry_after
+        self.jobs = collections.OrderedDict()
+        self.counts = collections.Counter()
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.latency_sum = 0.0
+        self.waiting = 0
+        self.busy = 0
+        self.loop = None
+        self._queue = None
+        self._tasks = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Build the agent if needed and start the workers on a background
+        loop.
+        """
+        if self.agent is None:
+            from agent_methods import CoverLetterAgent  # pylint: disable=C0415
+            self.agent = CoverLetterAgent()
+        self.loop = BackgroundLoop(name="letter-service")
+        self.loop.submit(self._start_workers()).result()
+
+    def stop(self):
+        """
+        Cancel the workers and stop their loop. Jobs still queued are
+        dropped.
+        """
+        if self.loop is not None:
+            self.loop.submit(self._stop_workers()).result()
+            self.loop.stop()
+
+    async def _start_workers(self):
+        """
+        Create the job queue and worker tasks on the background loop.
+        """
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker())
+                       for _ in range(self.workers)]
+
+    async def _stop_workers(self):
+        """
+        Cancel the worker tasks and wait for them to finish.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def submit(self, job_posting, use_cache=True, profile=None
+               ) -> dict | None:
+        """
+        Queue a posting for generation.
+
+        Args:
+            job_posting (str): The job posting.
+            use_cache (bool): Whether a cached letter may be returned.
+            profile (str, optional): ID of the applicant profile to use.
+
+        Returns:
+            dict | None: The queued job's status, or None if the queue is
+            full.
+
+        Raises:
+            ValueError: If the profile does not exist.
+        """
+        self.agent.profile(profile)
+        with self._lock:
+            if self.waiting >= self.queue_size:
+                self.counts["rejected"] += 1
+                return None
+            job = {"id": uuid.uuid4().hex, "status": "queued",
+                   "submitted": time.time(), "job_posting": job_posting,
+                   "use_cache": use_cache, "profile": profile}
+            self.jobs[job["id"]] = job
+            self.waiting += 1
+            self.counts["submitted"] += 1
+            self._evict()
+        self.loop.loop.call_soon_threadsafe(self._queue.put_nowait,
+                                            job["id"])
+        return self.status(job["id"])
+
+    def status(self, job_id) -> dict | None:
+        """
+        Describe a job without its letter.
+
+        Args:
+            job_id (str): ID returned by submit().
+
+        Returns:
+            dict | None: ID, status, timestamps and seconds spent queued and
+            generating, or None if the job is unknown.
+        """
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            status = {k: job[k] for k in
+                      ("id", "status", "profile", "submitted", "started",
+                       "finished", "queued_seconds", "elapsed") if k in job}
+            if job["status"] == "queued":
+                status["position"] = sum(
+                    j["status"] == "queued" for j in self.jobs.values()
+                    if j["submitted"] <= job["submitted"])
+            return status
+
+    def result(self, job_id) -> dict | None:
+        """
+        Return a job's status together with its letter or error.
+
+        Args:
+            job_id (str): ID returned by submit().
+
+        Returns:
+            dict | None: The job's status plus "cover_letter" or "error"
+            once it has finished, or None if the job is unknown.
+        """
+        status = self.status(job_id)
+        if status is not None:
+            with self._lock:
+                job = self.jobs[job_id]
+                status.update({k: job[k] for k in ("cover_letter", "error")
+                               if k in job})
+        return status
+
+    async def _worker(self):
+        """
+        Generate letters for queued jobs, forever.
+        """
+        while True:
+            job_id = await self._queue.get()
+            with self._lock:
+                job = self.jobs.get(job_id)
+                self.waiting -= 1
+                if job is None:
+                    continue
+                job["status"] = "running"
+                job["started"] = time.time()
+                job["queued_seconds"] = round(
+                    job["started"] - job["submitted"], 3)
+                self.busy += 1
+
+            start = time.perf_counter()
+            try:
+                letter = await self.agent.agenerate_cover_letter(
+                    job["job_posting"], raise_errors=True,
+                    use_cache=job["use_cache"], profile=job["profile"])
+                outcome = {"status": "done", "cover_letter": letter}
+            except Exception as e:  # pylint: disable=W0718
+                outcome = {"status": "error",
+                           "error": self.agent.parse_error(str(e))}
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self.busy -= 1
+                self.counts[outcome["status"]] += 1
+                self.latencies.append(elapsed)
+                self.latency_sum += elapsed
+                job.update(outcome, finished=time.time(),
+                           elapsed=round(elapsed, 3))
+                job.pop("job_posting", None)
+
+    def _evict(self):
+        """
+        Forget the oldest finished jobs beyond max_jobs. Must be called
+        with the lock held.
+        """
+        excess = len(self.jobs) - self.max_jobs
+        for job_id in [i for i, j in self.jobs.items()
+                       if j["status"] in ("done", "error")][:max(excess, 0)]:
+            del self.jobs[job_id]
+
+    def metrics(self) -> str:
+        """
+        Render the service's metrics in the Prometheus text format.
+
+        Returns:
+            str: The metrics page.
+        """
+        with self._lock:
+            latencies = list(self.latencies)
+            lines = [
+                "# HELP cover_letter_jobs_total Jobs by outcome.",
+                "# TYPE cover_letter_jobs_total counter",
+                *(f'cover_letter_jobs_total{{outcome="{outcome}"}} '
+                  f"{self.counts[outcome]}" for outcome in
+                  ("submitted", "rejected", "done", "error")),
+                "# HELP cover_letter_queue_depth Jobs waiting for a worker.",
+                "# TYPE cover_letter_queue_depth gauge",
+                f"cover_letter_queue_depth {self.waiting}",
+                "# HELP cover_letter_queue_capacity Maximum waiting jobs.",
+                "# TYPE cover_letter_queue_capacity gauge",
+                f"cover_letter_queue_capacity {self.queue_size}",
+                "# HELP cover_letter_workers_busy Jobs being generated.",
+                "# TYPE cover_letter_workers_busy gauge",
+                f"cover_letter_workers_busy {self.busy}",
+                "# HELP cover_letter_workers Size of the worker pool.",
+                "# TYPE cover_letter_workers gauge",
+                f"cover_letter_workers {self.workers}",
+                "# HELP cover_letter_generation_seconds Generation latency "
+                f"over the last {LATENCY_WINDOW} jobs.",
+                "# TYPE cover_letter_generation_seconds summary",
+            ]
+            lines += [f'cover_letter_generation_seconds{{quantile='
+                      f'"{q / 100}"}} {percentile(latencies, q):.4f}'
+                      for q in QUANTILES if latencies]
+            lines += [
+                f"cover_letter_generation_seconds_sum {self.latency_sum:.4f}",
+                "cover_letter_generation_seconds_count "
+                f"{self.counts['done'] + self.counts['error']}"
+            ]
+        return "\n".join(lines) + "\n"
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """
+    Maps the HTTP endpoints onto the server's LetterService.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):  # pylint: disable=C0103
+        """
+        Submit a job.
+        """
+        if self.path.rstrip("/") != "/letters":
+            self._send_json(404, {"error": "Not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        if length > MAX_BODY_BYTES:
+            self._send_json(413, {"error": "Request body too large"})
+            return
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+            job_posting = request["job_posting"]
+            if not isinstance(job_posting, str) or not job_posting.strip():
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            self._send_json(400, {"error": "Expected a JSON object with a "
+                                           "non-empty job_posting"})
+            return
+        profile = request.get("profile")
+        if profile is not None and not isinstance(profile, str):
+            self._send_json(400, {"error": "Expected profile to be a "
+                                           "string"})
+            return
+
+        service = self.server.service
+        try:
+            job = service.submit(job_posting,
+                                 bool(request.get("use_cache", True)),
+                                 profile)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        if job is None:
+            self._send_json(503, {"error": "Queue is full, retry later"},
+                            {"Retry-After": str(service.retry_after)})
+            return
+        self._send_json(202, job, {"Location": f"/letters/{job['id']}"})
+
+    def do_GET(self):  # pylint: disable=C0103
+        """
+        Report a job's status or result, the metrics or the health.
+        """
+        service = self.server.service
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path == "/metrics":
+            self._send(200, service.metrics().encode(),
+                       "text/plain; version=0.0.4")
+            return
+        if path == "/health":
+            self._send_json(200, {"status": "ok"})
+            return
+
+        match = JOB_PATH.match(path)
+        if match is None:
+            self._send_json(404, {"error": "Not found"})
+            return
+        if match.group(2):
+            job = service.result(match.group(1))
+            code = 200 if job and job["status"] in ("done", "error") else 202
+        else:
+            job = service.status(match.group(1))
+            code = 200
+        if job is None:
+            self._send_json(404, {"error": "Unknown job"})
+            return
+        self._send_json(code, job)
+
+    def _send_json(self, status, body, headers=None):
+        """
+        Send a JSON response.
+
+        Args:
+            status (int): HTTP status code.
+            body (dict): Response body.
+            headers (dict, optional): Extra response headers.
+        """
+        self._send(status, json.dumps(body, ensure_ascii=False).encode(),
+                   "application/json", headers)
+
+    def _send(self, status, payload, content_type, headers=None):
+        """
+        Send a complete response.
+
+        Args:
+            status (int): HTTP status code.
+            payload (bytes): Response body.
+            content_type (str): Value of the Content-Type header.
+            headers (dict, optional): Extra response headers.
+        """
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        """
+        Silence the per-request access log.
+        """
+
+
+class ServiceServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server holding the LetterService its handlers use.
+    """
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, service):
+        """
+        Bind the server.
+
+        Args:
+            address (tuple[str, int]): Host and port; port 0 picks a free
+                                       one.
+            service (LetterService): The started service.
+        """
+        super().__init__(address, ServiceHandler)
+        self.service = service
+
+
+def main():
+    """
+    Parse command line arguments and serve until interrupted.
+    """
+    parser = argparse.ArgumentParser(
+        description="Serve cover letter generation over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080,
+                        help="port to bind (default: 8080)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="concurrent generations (default: 4)")
+    parser.add_argument("--queue-size", type=int, default=32,
+                        help="jobs waiting before submissions are rejected "
+                             "(default: 32)")
+    parser.add_argument("--max-jobs", type=int, default=1000,
+                        help="finished jobs kept for polling (default: 1000)")
+    parser.add_argument("--api-base",
+                        help="override the API base, e.g. a local stub")
+    args = parser.parse_args()
+
+    if args.api_base:
+        from agent_methods import load_api_config  # pylint: disable=C0415
+        load_api_config()["api_base"] = args.api_base
+        load_api_config().pop("endpoints", None)
+
+    service = LetterService(workers=args.workers, queue_size=args.queue_size,
+                            max_jobs=args.max_jobs)
+    service.start()
+    server = ServiceServer((args.host, args.port), service)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,81 +1,199 @@
 import json
-from langchain.tools import Tool
+from contextvars import ContextVar
+from langchain.tools import BaseTool, StructuredTool, Tool
+from applicant_data import DATA_FILES
+from observations import observation_format
+from profiles import current_profile
+from prompts import canonical_json
 
 
-def get_work_history() -> dict[str, dict[str, str | None]] | str:
-    return read_applicant_data("Work History")
+current_posting = ContextVar("current_posting", default=None)
 
 
-def get_education_awards() -> dict[str, dict[str, str | None]] | str:
-    return read_applicant_data("Education & Awards")
+def get_work_history(top_k: int | None = None
+                     ) -> dict[str, dict[str, str | None]] | str:
+    return read_applicant_data("Work History", top_k)
 
 
-def get_projects() -> dict[str, dict[str, str | None]] | str:
-    return read_applicant_data("Projects")
+def get_education_awards(top_k: int | None = None
+                         ) -> dict[str, dict[str, str | None]] | str:
+    return read_applicant_data("Education & Awards", top_k)
 
 
-def get_skills() -> dict[str, None] | str:
-    return read_applicant_data("Skills")
+def get_projects(top_k: int | None = None
+                 ) -> dict[str, dict[str, str | None]] | str:
+    return read_applicant_data("Projects", top_k)
 
 
-def get_hobbies() -> dict[str, None] | str:
-    return read_applicant_data("Hobbies")
+def get_skills(top_k: int | None = None) -> dict[str, None] | str:
+    return read_applicant_data("Skills", top_k)
 
 
-def read_applicant_data(file_name: str) -> dict | str:
+def get_hobbies(top_k: int | None = None) -> dict[str, None] | str:
+    return read_applicant_data("Hobbies", top_k)
+
+
+def read_applicant_data(file_name: str, top_k: int | None = None
+                        ) -> dict | str:
     """
-    Read applicant data and removes the formatting entry in the JSON files
+    Read the current profile's applicant data from its cache, without the
+    formatting entry of the JSON files
+
+    When top_k is given and a job posting is being processed, only the top_k
+    entries most relevant to the posting are returned.
 
     Args:
         file_name (str): The name of the JSON file to read.
+        top_k (int, optional): Maximum number of entries to return.
 
     Returns:
         dict | str: The parsed JSON data or a message if no information
         is available.
     """
-    with open(f"applicant data/{file_name}.json", "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    data.pop(next(iter(data)))
+    profile = current_profile.get()
+    data = profile.cache.get(file_name)
+    posting = current_posting.get()
+    if data and top_k and posting:
+        ranked = profile.index.search(posting, top_k, [file_name])
+        data = {name: data.get(name) for _, name, _ in ranked}
     return data if data else "No information available"
 
 
-def get_available_tools() -> list[Tool]:
+def search_applicant_data(query: str, top_k: int = 5) -> dict | str:
+    """
+    Find the current profile's applicant data entries most relevant to a
+    query across all data files.
+
+    Args:
+        query (str): What to search for.
+        top_k (int): Maximum number of entries to return.
+
+    Returns:
+        dict | str: Matching entries grouped by data file, or a message if
+        nothing matches.
+    """
+    profile = current_profile.get()
+    results = {}
+    for category, name, score in profile.index.search(query, top_k):
+        if score > 0:
+            results.setdefault(category, {})[name] = \
+                profile.cache.get(category).get(name)
+    return results if results else "No information available"
+
+
+def ranked_top_k(retrieval: dict | None) -> dict[str, int | None]:
+    """
+    Work out how many entries to return per data file from the "retrieval"
+    section of the API config.
+
+    Args:
+        retrieval (dict, optional): The retrieval settings.
+
+    Returns:
+        dict[str, int | None]: top_k for each data file, None for files that
+        are returned whole.
+    """
+    enabled = bool(retrieval and retrieval.get("enabled"))
+    ranked = retrieval.get("categories", []) if enabled else []
+    return {name: retrieval["top_k"] if name in ranked else None
+            for name in DATA_FILES}
+
+
+def get_applicant_context(retrieval: dict | None = None,
+                          ranked: bool | None = None,
+                          observations: dict | None = None) -> str:
+    """
+    Serialise all applicant data into one block of text, used to inline the
+    data into a prompt instead of exposing it through tools.
+
+    Args:
+        retrieval (dict, optional): The retrieval settings, limiting ranked
+                                    files to their most relevant entries.
+        ranked (bool, optional): Only serialise the ranked files (True),
+                                 whose entries depend on the posting, or
+                                 only the files returned whole (False),
+                                 which are the same for every posting.
+                                 None serialises all files.
+        observations (dict, optional): The "observations" section of the
+                                       API config; the data is written as
+                                       the tools return it.
+
+    Returns:
+        str: One section per data file, headed by the file name.
+    """
+    observe = observation_format(observations)
+    sections = []
+    for file_name, top_k in ranked_top_k(retrieval).items():
+        if ranked is not None and ranked != (top_k is not None):
+            continue
+        data = observe(read_applicant_data(file_name, top_k))
+        if isinstance(data, dict):
+            data = canonical_json(data)
+        sections.append(f"{file_name}:\n{data}")
+    return "\n\n".join(sections)
+
+
+def get_available_tools(retrieval: dict | None = None,
+                        structured: bool = False,
+                        observations: dict | None = None) -> list[BaseTool]:
     """
     Generate a list of available tools using data from tool_descriptions.json.
 
+    When retrieval is enabled, the tools of the ranked data files only return
+    the entries most relevant to the current job posting, and a search tool
+    over all applicant data is added. Results are returned in the compact
+    observation format unless it is disabled in the "observations" settings.
+
+    Args:
+        retrieval (dict, optional): The "retrieval" section of the API
+                                    config.
+        structured (bool): Build tools whose schemas list their real
+                           arguments, for native tool calling. The data
+                           tools then take no arguments. ReAct agents need
+                           the default single string input tools.
+        observations (dict, optional): The "observations" section of the
+                                       API config.
+
     Returns:
-        list[Tool]: A list of Tool objects with appropriate names,
-        functions, and descriptions.
+        list[BaseTool]: A list of tools with appropriate names, functions,
+        and descriptions.
     """
     with open("config/tool_descriptions.json", "r", encoding="utf-8") as f:
         desc = json.load(f)
 
-    tools = [
-        Tool(
-            name="get_skills",
-            func=lambda _: get_skills(),
-            description=desc["get_skills"]
-        ),
-        Tool(
-            name="get_work_history",
-            func=lambda _: get_work_history(),
-            description=desc["get_work_history"]
-        ),
-        Tool(
-            name="get_education_awards",
-            func=lambda _: get_education_awards(),
-            description=desc["get_education_awards"]
-        ),
-        Tool(
-            name="get_projects",
-            func=lambda _: get_projects(),
-            description=desc["get_projects"]
-        ),
-        Tool(
-            name="get_hobbies",
-            func=lambda _: get_hobbies(),
-            description=desc["get_hobbies"]
+    top_k = ranked_top_k(retrieval)
+    observe = observation_format(observations)
+
+    data_tools = {
+        "get_skills": lambda: observe(get_skills(top_k["Skills"])),
+        "get_work_history":
+            lambda: observe(get_work_history(top_k["Work History"])),
+        "get_education_awards":
+            lambda: observe(get_education_awards(top_k["Education & Awards"])),
+        "get_projects": lambda: observe(get_projects(top_k["Projects"])),
+        "get_hobbies": lambda: observe(get_hobbies(top_k["Hobbies"]))
+    }
+
+    if structured:
+        tools = [StructuredTool.from_function(func=func, name=name,
+                                              description=desc[name])
+                 for name, func in data_tools.items()]
+    else:
+        tools = [Tool(name=name, func=lambda _, func=func: func(),
+                      description=desc[name])
+                 for name, func in data_tools.items()]
+
+    if retrieval and retrieval.get("enabled"):
+        def search(query: str) -> dict | str:
+            return observe(search_applicant_data(query, retrieval["top_k"]),
+                           grouped=True)
+
+        tools.append(
+            StructuredTool.from_function(
+                func=search, name="search_applicant_data",
+                description=desc["search_applicant_data"])
+            if structured else
+            Tool(name="search_applicant_data", func=search,
+                 description=desc["search_applicant_data"])
         )
-    ]
-    return tools
\ No newline at end of file
+    return tools
@@ -0,0 +1,360 @@
+"""
+Per-request tracing of cover letter generations.
+
+A TracingCallbackHandler attached to a generation records one span for every
+LLM call and tool invocation, with its latency, token usage and number of
+rate limit retries, plus one span for the whole generation. LLM spans also
+record the prompt tokens served from the provider's prompt cache and, for
+streamed calls, the time to the first token. Spans are
+appended as JSON lines to a rotating trace file.
+
+Usage (from the repository root):
+    python tracing.py summary
+    python tracing.py summary --path traces/trace.jsonl
+"""
+import argparse
+import glob
+import json
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from logging.handlers import RotatingFileHandler
+from langchain_core.callbacks import BaseCallbackHandler
+from callbacks import cached_tokens, token_usage
+
+
+DEFAULT_TRACE_PATH = "traces/trace.jsonl"
+
+PARSE_ERROR_TOOL = "_Exception"
+
+
+def get_trace_logger(tracing) -> logging.Logger | None:
+    """
+    Return the logger that writes spans to the rotating trace file
+    described by the "tracing" section of the API config.
+
+    Args:
+        tracing (dict | None): The tracing settings.
+
+    Returns:
+        logging.Logger | None: The trace logger, or None if tracing is
+        disabled.
+    """
+    if not tracing or not tracing.get("enabled"):
+        return None
+
+    logger = logging.getLogger("cover_letter.trace")
+    if not logger.handlers:
+        path = tracing.get("path", DEFAULT_TRACE_PATH)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        handler = RotatingFileHandler(
+            path, maxBytes=tracing.get("max_bytes", 5_000_000),
+            backupCount=tracing.get("backup_count", 5), encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Records spans for the LLM calls and tool invocations of one generation
+    and writes them to a trace logger.
+    """
+    run_inline = True
+
+    def __init__(self, logger):
+        """
+        Initialize the handler for a new trace.
+
+        Args:
+            logger (logging.Logger): Logger the spans are written to.
+        """
+        self.logger = logger
+        self.trace_id = uuid.uuid4().hex
+        self._open = {}
+        self._totals = {"llm_calls": 0, "tool_calls": 0, "parse_errors": 0,
+                        "prompt_tokens": 0, "completion_tokens": 0,
+                        "cached_tokens": 0, "retries": 0}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, parent_run_id, kind, name):
+        """
+        Open a span.
+
+        Args:
+            run_id (UUID): ID of the run the span covers.
+            parent_run_id (UUID | None): ID of the parent run.
+            kind (str): "llm", "tool" or "chain".
+            name (str): Name of the model, tool or chain.
+        """
+        with self._lock:
+            self._open[run_id] = {
+                "trace_id": self.trace_id,
+                "span_id": str(run_id),
+                "parent_id": str(parent_run_id) if parent_run_id else None,
+                "kind": kind,
+                "name": name,
+                "start": time.time(),
+                "_perf": time.perf_counter(),
+                "retries": 0
+            }
+
+    def _end(self, run_id, error=None, **fields):
+        """
+        Close a span and write it, and write the generation span when the
+        root run ends.
+
+        Args:
+            run_id (UUID): ID of the run the span covers.
+            error (BaseException, optional): Error the run failed with.
+            **fields: Extra fields recorded on the span.
+        """
+        with self._lock:
+            span = self._open.pop(run_id, None)
+            if span is None:
+                return
+            span["latency"] = round(time.perf_counter() - span.pop("_perf"), 4)
+            span.update(fields)
+            if error is not None:
+                span["error"] = repr(error)
+
+            totals = self._totals
+            if span["kind"] == "llm":
+                totals["llm_calls"] += 1
+                totals["prompt_tokens"] += span.get("prompt_tokens", 0)
+                totals["completion_tokens"] += span.get("completion_tokens", 0)
+                totals["cached_tokens"] += span.get("cached_tokens", 0)
+                totals["retries"] += span["retries"]
+            elif span["kind"] == "tool":
+                totals["tool_calls"] += 1
+                totals["parse_errors"] += span["name"] == PARSE_ERROR_TOOL
+
+            spans = [span] if span["kind"] != "chain" else []
+            if span["parent_id"] is None:
+                spans.append({
+                    "trace_id": self.trace_id,
+                    "kind": "generation",
+                    "start": span["start"],
+                    "latency": span["latency"],
+                    "error": span.get("error"),
+                    **totals
+                })
+        for record in spans:
+            self.logger.info(json.dumps(record, ensure_ascii=False))
+
+    def record(self, kind, **fields):
+        """
+        Write a span for work done outside LangChain, such as preprocessing
+        the posting.
+
+        Args:
+            kind (str): Kind of the span.
+            **fields: Fields recorded on the span.
+        """
+        self.logger.info(json.dumps({"trace_id": self.trace_id, "kind": kind,
+                                     "start": time.time(), **fields},
+                                    ensure_ascii=False))
+
+    def on_llm_start(self, serialized, prompts, *, run_id,
+                     parent_run_id=None, **kwargs):
+        """
+        Open an LLM span.
+        """
+        self._start(run_id, parent_run_id, "llm",
+                    (kwargs.get("invocation_params") or {}).get("model_name")
+                    or (serialized or {}).get("name", "llm"))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id,
+                            parent_run_id=None, **kwargs):
+        """
+        Open an LLM span for a chat model call.
+        """
+        self.on_llm_start(serialized, messages, run_id=run_id,
+                          parent_run_id=parent_run_id, **kwargs)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        """
+        Record the time to the first token of a streamed LLM call.
+        """
+        with self._lock:
+            span = self._open.get(run_id)
+            if span is not None and "first_token" not in span:
+                span["first_token"] = round(
+                    time.perf_counter() - span["_perf"], 4)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        """
+        Close an LLM span with its token usage.
+        """
+        prompt, completion = token_usage(response)
+        self._end(run_id, prompt_tokens=prompt, completion_tokens=completion,
+                  cached_tokens=cached_tokens(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        """
+        Close a failed LLM span.
+        """
+        self._end(run_id, error=error)
+
+    def on_retry(self, retry_state, *, run_id, **kwargs):
+        """
+        Count a rate limit or server error retry of an LLM call.
+        """
+        with self._lock:
+            if run_id in self._open:
+                self._open[run_id]["retries"] += 1
+
+    def on_tool_start(self, serialized, input_str, *, run_id,
+                      parent_run_id=None, **kwargs):
+        """
+        Open a tool span.
+        """
+        self._start(run_id, parent_run_id, "tool",
+                    (serialized or {}).get("name", "tool"))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        """
+        Close a tool span with the size of its output.
+        """
+        self._end(run_id, output_chars=len(str(output)))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        """
+        Close a failed tool span.
+        """
+        self._end(run_id, error=error)
+
+    def on_chain_start(self, serialized, inputs, *, run_id,
+                       parent_run_id=None, **kwargs):
+        """
+        Open a chain span. Only the root chain is written, as the generation
+        span.
+        """
+        self._start(run_id, parent_run_id, "chain",
+                    (serialized or {}).get("name", "chain"))
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        """
+        Close a chain span.
+        """
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        """
+        Close a failed chain span.
+        """
+        self._end(run_id, error=error)
+
+
+def percentile(values, pct) -> float:
+    """
+    Nearest-rank percentile of a list of numbers.
+
+    Args:
+        values (list[float]): The numbers.
+        pct (float): Percentile between 0 and 100.
+
+    Returns:
+        float: The percentile, or 0 for an empty list.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+def read_spans(path):
+    """
+    Read the spans of a trace file and its rotated backups, oldest first.
+
+    Args:
+        path (str): Path to the current trace file.
+
+    Yields:
+        dict: One span per line.
+    """
+    backups = sorted(glob.glob(f"{glob.escape(path)}.*"),
+                     key=lambda p: int(p.rsplit(".", 1)[1])
+                     if p.rsplit(".", 1)[1].isdigit() else 0, reverse=True)
+    for file_path in [*backups, path]:
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, "r", encoding="utf-8") as trace_file:
+            for line in trace_file:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def summarize(path) -> dict:
+    """
+    Summarise latency and token usage across all traced generations.
+
+    Args:
+        path (str): Path to the current trace file.
+
+    Returns:
+        dict: Counts, p50/p95 statistics per letter, per LLM call and per
+        tool call, and the share of prompt tokens served from the
+        provider's prompt cache.
+    """
+    letters, llm_calls, tool_calls, preprocessed = [], [], [], []
+    for span in read_spans(path):
+        {"generation": letters, "llm": llm_calls, "tool": tool_calls,
+         "preprocess": preprocessed}.get(span.get("kind"), []).append(span)
+
+    def stats(spans, key):
+        values = [s.get(key, 0) for s in spans]
+        return {"p50": percentile(values, 50), "p95": percentile(values, 95)}
+
+    for letter in letters:
+        letter["total_tokens"] = letter["prompt_tokens"] + \
+            letter["completion_tokens"]
+    prompt_tokens = sum(s.get("prompt_tokens", 0) for s in llm_calls)
+    cached = sum(s.get("cached_tokens", 0) for s in llm_calls)
+
+    return {
+        "letters": len(letters),
+        "failed": sum(1 for s in letters if s.get("error")),
+        "letter_latency": stats(letters, "latency"),
+        "tokens_per_letter": stats(letters, "total_tokens"),
+        "llm_calls_per_letter": stats(letters, "llm_calls"),
+        "llm_call_latency": stats(llm_calls, "latency"),
+        "llm_first_token": stats([s for s in llm_calls if "first_token" in s],
+                                 "first_token"),
+        "cached_token_share": round(cached / prompt_tokens, 3)
+        if prompt_tokens else 0.0,
+        "tool_call_latency": stats(tool_calls, "latency"),
+        "retries": sum(s.get("retries", 0) for s in letters),
+        "parse_errors": sum(s.get("parse_errors", 0) for s in letters),
+        "posting_tokens_saved": stats(preprocessed, "tokens_saved")
+    }
+
+
+def main():
+    """
+    Print a summary of the trace file.
+    """
+    parser = argparse.ArgumentParser(
+        description="Summarise cover letter generation traces.")
+    parser.add_argument("command", choices=["summary"])
+    parser.add_argument("--path", default=DEFAULT_TRACE_PATH,
+                        help=f"trace file (default: {DEFAULT_TRACE_PATH})")
+    args = parser.parse_args()
+
+    summary = summarize(args.path)
+    for name, value in summary.items():
+        if isinstance(value, dict):
+            value = f"p50 {value['p50']:.3f}  p95 {value['p95']:.3f}"
+        print(f"{name:<22}{value}")
+
+
+if __name__ == "__main__":
+    main()